@@ -0,0 +1,69 @@
+#!/usr/bin/env python3
+"""
+Dateizugriffe für parallele Scans (Security Expert Agent S7)
+Artefakte werden in eine temporäre Datei geschrieben und per os.replace
+veröffentlicht, gemeinsam genutzte Caches über fcntl-Locks geschützt
+"""
+
+import os
+import json
+import fcntl
+import secrets
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+
+def new_run_id() -> str:
+    """Eindeutige Kennung eines Scan-Laufs (auch bei gleichem Zeitstempel)"""
+    return f"{os.getpid()}-{secrets.token_hex(3)}"
+
+
+@contextmanager
+def atomic_path(path: Path):
+    """Temporärer Pfad im Zielverzeichnis, der bei Erfolg nach path umbenannt wird
+
+    Leser sehen immer nur die alte oder die vollständige neue Datei.
+    """
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{new_run_id()}.tmp")
+    try:
+        yield tmp
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            tmp.unlink()
+        except FileNotFoundError:
+            pass
+        raise
+
+
+@contextmanager
+def atomic_write(path: Path, binary: bool = False):
+    """open() für neue Artefakte: with atomic_write(path) as f: ..."""
+    with atomic_path(path) as tmp, open(tmp, 'xb' if binary else 'x') as f:
+        yield f
+
+
+def write_json_atomic(path: Path, data: Any, **dump_options):
+    with atomic_write(path) as f:
+        json.dump(data, f, **dump_options)
+
+
+@contextmanager
+def file_lock(path: Path, shared: bool = False, blocking: bool = True):
+    """flock auf einer Lock-Datei; liefert False, wenn blocking=False und der Lock belegt ist"""
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, 'a') as f:
+        flags = fcntl.LOCK_SH if shared else fcntl.LOCK_EX
+        try:
+            fcntl.flock(f.fileno(), flags if blocking else flags | fcntl.LOCK_NB)
+        except BlockingIOError:
+            acquired = False
+        else:
+            acquired = True
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
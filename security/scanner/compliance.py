@@ -0,0 +1,186 @@
+#!/usr/bin/env python3
+"""
+Compliance-Mapping für Security Expert Agent S7
+Indiziert Findings einmal nach CWE/OWASP-Kategorie und bewertet daraus
+alle Controls von OWASP Top 10, SANS/CWE Top 25 und Privacy in einem Durchlauf
+"""
+
+from typing import Dict, List, Any, Iterable, Tuple
+
+# Status-Reihenfolge: der schlechteste Status gewinnt
+STATUS_ORDER = ['PASS', 'REVIEW_REQUIRED', 'FAIL']
+# Ohne erfolgreichen Lauf eines beitragenden Tools gibt es keine Grundlage für PASS
+NOT_EVALUATED = 'NOT_EVALUATED'
+
+# Tools, die Code-Findings mit CWE/OWASP-Zuordnung liefern
+SAST_TOOLS = ('semgrep', 'eslint_security')
+
+SEVERITY_STATUS = {
+    'CRITICAL': 'FAIL',
+    'HIGH': 'REVIEW_REQUIRED',
+    'MEDIUM': 'REVIEW_REQUIRED',
+}
+
+
+class Control:
+    """Ein Compliance-Control mit seinen Zuordnungsregeln"""
+
+    def __init__(self, key: str, cwes: Iterable[int] = (), owasp: str = '', tools: Iterable[str] = (),
+                 fallback: Iterable[Tuple[str, str]] = (), default: str = 'PASS',
+                 sources: Iterable[str] = SAST_TOOLS):
+        self.key = key
+        self.cwes = {f"CWE-{cwe}" for cwe in cwes}
+        self.owasp = owasp
+        # Tools, deren Findings unabhängig von der CWE zum Control zählen
+        self.tools = set(tools)
+        # Für gespeicherte Ergebnisse ohne Findings: (tool, Kennzahl)
+        self.fallback = list(fallback)
+        self.default = default
+        # Tools, deren erfolgreicher Lauf das Control überhaupt bewertet
+        self.sources = set(sources) | self.tools | {tool for tool, _ in self.fallback}
+
+
+OWASP_TOP_10 = [
+    Control('A01_broken_access_control', owasp='A01', cwes=[
+        22, 23, 35, 59, 200, 201, 219, 264, 275, 276, 284, 285, 352, 359, 377, 402, 425, 441, 497,
+        538, 540, 548, 552, 566, 601, 639, 651, 668, 706, 862, 863, 913, 922, 1275]),
+    Control('A02_cryptographic_failures', owasp='A02', cwes=[
+        261, 296, 310, 319, 321, 322, 323, 324, 325, 326, 327, 328, 329, 330, 331, 335, 336, 337,
+        338, 340, 347, 523, 720, 757, 759, 760, 780, 818, 916]),
+    Control('A03_injection', owasp='A03', cwes=[
+        20, 74, 75, 77, 78, 79, 80, 83, 87, 88, 89, 90, 91, 93, 94, 95, 96, 97, 98, 99, 113, 116,
+        138, 184, 470, 471, 564, 610, 643, 644, 652, 917],
+        fallback=[('semgrep', 'critical_issues')]),
+    Control('A04_insecure_design', owasp='A04', cwes=[
+        73, 183, 209, 213, 235, 256, 257, 266, 269, 280, 311, 312, 313, 316, 419, 430, 434, 444,
+        451, 472, 501, 522, 525, 539, 579, 598, 602, 642, 646, 650, 653, 656, 657, 799, 807, 840,
+        841, 927, 1021, 1173]),
+    Control('A05_security_misconfiguration', owasp='A05', cwes=[
+        2, 11, 13, 15, 16, 260, 315, 520, 526, 537, 541, 547, 611, 614, 756, 776, 942, 1004, 1032, 1174]),
+    Control('A06_vulnerable_components', owasp='A06', cwes=[937, 1035, 1104],
+            tools=['dependency_check', 'trivy'], sources=(),
+            fallback=[('dependency_check', 'critical_vulnerabilities'), ('trivy', 'critical_vulnerabilities')]),
+    Control('A07_identification_failures', owasp='A07', cwes=[
+        255, 259, 287, 288, 290, 294, 295, 297, 300, 302, 304, 306, 307, 346, 384, 521, 613, 620,
+        640, 798, 940, 1216],
+        fallback=[('gitleaks', 'secrets_found')]),
+    Control('A08_software_integrity_failures', owasp='A08', cwes=[
+        345, 353, 426, 494, 502, 565, 784, 829, 830, 915]),
+    Control('A09_logging_failures', owasp='A09', cwes=[117, 223, 532, 778]),
+    Control('A10_ssrf', owasp='A10', cwes=[918]),
+]
+
+# CWE Top 25 (2023)
+SANS_TOP_25 = [
+    Control('cwe_787_out_of_bounds_write', cwes=[787]),
+    Control('cwe_79_xss', cwes=[79], fallback=[('eslint_security', 'security_issues')]),
+    Control('cwe_89_sql_injection', cwes=[89]),
+    Control('cwe_416_use_after_free', cwes=[416]),
+    Control('cwe_78_os_command_injection', cwes=[78]),
+    Control('cwe_20_input_validation', cwes=[20]),
+    Control('cwe_125_out_of_bounds_read', cwes=[125]),
+    Control('cwe_22_path_traversal', cwes=[22]),
+    Control('cwe_352_csrf', cwes=[352]),
+    Control('cwe_434_unrestricted_upload', cwes=[434]),
+    Control('cwe_862_missing_authorization', cwes=[862]),
+    Control('cwe_476_null_pointer_dereference', cwes=[476]),
+    Control('cwe_287_improper_authentication', cwes=[287]),
+    Control('cwe_190_integer_overflow', cwes=[190]),
+    Control('cwe_502_deserialization', cwes=[502]),
+    Control('cwe_77_command_injection', cwes=[77]),
+    Control('cwe_119_buffer_bounds', cwes=[119]),
+    Control('cwe_798_hardcoded_credentials', cwes=[798], fallback=[('gitleaks', 'secrets_found')]),
+    Control('cwe_918_ssrf', cwes=[918]),
+    Control('cwe_306_missing_authentication', cwes=[306]),
+    Control('cwe_362_race_condition', cwes=[362]),
+    Control('cwe_269_privilege_management', cwes=[269]),
+    Control('cwe_94_code_injection', cwes=[94]),
+    Control('cwe_863_incorrect_authorization', cwes=[863]),
+    Control('cwe_276_default_permissions', cwes=[276]),
+]
+
+PRIVACY = [
+    Control('data_minimization', cwes=[200, 359]),
+    Control('purpose_limitation', cwes=[201, 668]),
+    # Speicherfristen lassen sich nicht statisch prüfen
+    Control('storage_limitation', cwes=[312, 532], default='REVIEW_REQUIRED'),
+]
+
+FRAMEWORKS = {
+    'owasp_top_10': OWASP_TOP_10,
+    'sans_top_25': SANS_TOP_25,
+    'gdpr_privacy': PRIVACY,
+}
+
+
+def _worse(current: str, candidate: str) -> str:
+    return candidate if STATUS_ORDER.index(candidate) > STATUS_ORDER.index(current) else current
+
+
+class ComplianceEngine:
+    """Bewertet alle Frameworks über einen gemeinsamen Finding-Index"""
+
+    def __init__(self, frameworks: Dict[str, List[Control]] = None):
+        self.frameworks = frameworks or FRAMEWORKS
+
+        # Zuordnungen einmalig invertieren: Schlüssel -> betroffene Controls
+        self.by_cwe: Dict[str, List[Control]] = {}
+        self.by_owasp: Dict[str, List[Control]] = {}
+        self.by_tool: Dict[str, List[Control]] = {}
+        for controls in self.frameworks.values():
+            for control in controls:
+                for cwe in control.cwes:
+                    self.by_cwe.setdefault(cwe, []).append(control)
+                if control.owasp:
+                    self.by_owasp.setdefault(control.owasp, []).append(control)
+                for tool in control.tools:
+                    self.by_tool.setdefault(tool, []).append(control)
+
+    def index(self, scan_results: Dict[str, Any]) -> Dict[str, str]:
+        """Ein Durchlauf über alle Findings: schlechtester Status pro Control"""
+        statuses: Dict[str, str] = {}
+
+        for tool, results in scan_results.items():
+            if results.get('status') != 'success':
+                continue
+
+            for finding in results.get('findings', []):
+                status = SEVERITY_STATUS.get(finding.get('severity'))
+                if status is None:
+                    continue
+
+                controls = set()
+                for cwe in finding.get('cwes', []):
+                    controls.update(self.by_cwe.get(cwe, []))
+                for category in finding.get('owasp', []):
+                    controls.update(self.by_owasp.get(category, []))
+                controls.update(self.by_tool.get(tool, []))
+
+                for control in controls:
+                    statuses[control.key] = _worse(statuses.get(control.key, 'PASS'), status)
+
+        return statuses
+
+    def evaluate(self, scan_results: Dict[str, Any]) -> Dict[str, Dict[str, str]]:
+        """Bewertet alle Controls aller Frameworks"""
+        statuses = self.index(scan_results)
+        succeeded = {tool for tool, results in scan_results.items() if results.get('status') == 'success'}
+        compliance = {}
+
+        for framework, controls in self.frameworks.items():
+            compliance[framework] = {}
+            for control in controls:
+                status = _worse(control.default, statuses.get(control.key, 'PASS'))
+
+                # Gespeicherte Ergebnisse ohne normalisierte Findings
+                for tool, metric in control.fallback:
+                    results = scan_results.get(tool, {})
+                    if 'findings' not in results and results.get(metric, 0) > 0:
+                        status = _worse(status, 'REVIEW_REQUIRED')
+
+                if status == 'PASS' and not control.sources & succeeded:
+                    status = NOT_EVALUATED
+
+                compliance[framework][control.key] = status
+
+        return compliance
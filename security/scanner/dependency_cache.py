@@ -0,0 +1,190 @@
+#!/usr/bin/env python3
+"""
+Dependency-Check Cache für Security Expert Agent S7
+Speichert Analyse-Ergebnisse pro Quellbaum und Manifest, geschlüsselt über den Datei-Hash
+"""
+
+import os
+import json
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Iterable, Optional
+
+from atomic_files import file_lock, write_json_atomic
+
+logger = logging.getLogger('security-scanner')
+
+CACHE_VERSION = 2
+# Die Vulnerability-Datenbank wird täglich aktualisiert; ältere Ergebnisse
+# würden neue CVEs gegen unveränderte Manifeste verschweigen
+MAX_AGE_HOURS = 24
+
+# Manifeste/Lockfiles pro Ecosystem
+MANIFEST_PATTERNS = {
+    'nuget': ('*.csproj', 'packages.lock.json'),
+    'npm': ('package-lock.json',),
+}
+
+# Verzeichnisse, die nie eigene Manifeste enthalten
+IGNORED_DIRS = {'node_modules', '.git', 'bin', 'obj', 'dist', '.next'}
+
+
+def hash_file(path: Path) -> str:
+    """Berechnet den SHA-256 einer Datei"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(65536), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def discover_manifests(source_dir: Path, candidates: Optional[Iterable[str]] = None) -> Dict[str, Dict[str, str]]:
+    """Findet alle Manifeste unter source_dir und hasht sie
+
+    candidates: bereits bekannte Manifeste (Target-Index), spart den Verzeichnisdurchlauf
+    """
+    manifests = {}
+
+    if candidates is None:
+        candidates = []
+        for root, dirs, files in os.walk(source_dir):
+            dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+            candidates.extend(str((Path(root) / filename).relative_to(source_dir)) for filename in files)
+
+    for relative in candidates:
+        filename = Path(relative).name
+        for ecosystem, patterns in MANIFEST_PATTERNS.items():
+            if any(Path(filename).match(pattern) for pattern in patterns):
+                manifests[relative] = {
+                    'ecosystem': ecosystem,
+                    'hash': hash_file(source_dir / relative)
+                }
+                break
+
+    return manifests
+
+
+def attribute_dependencies(dependencies: List[Dict[str, Any]], manifests: List[str],
+                           source_dir: Path) -> Dict[str, List[Dict[str, Any]]]:
+    """Ordnet Dependencies aus einem Dependency-Check-Report ihrem Manifest zu"""
+    attributed = {manifest: [] for manifest in manifests}
+    # Tiefste Verzeichnisse zuerst, damit verschachtelte Projekte gewinnen
+    by_depth = sorted(manifests, key=lambda m: len(Path(m).parent.parts), reverse=True)
+
+    for dep in dependencies:
+        # npm-Dependencies tragen den Paketnamen als Suffix: package-lock.json?lodash
+        file_path = Path(dep.get('filePath', '').split('?', 1)[0])
+        try:
+            relative = file_path.relative_to(source_dir)
+        except ValueError:
+            relative = file_path
+
+        if str(relative) in attributed:
+            attributed[str(relative)].append(dep)
+            continue
+
+        for manifest in by_depth:
+            parent = Path(manifest).parent
+            if parent == Path('.') or parent in relative.parents:
+                attributed[manifest].append(dep)
+                break
+        else:
+            logger.warning(f"Could not attribute dependency {dep.get('fileName')} to a manifest")
+
+    return attributed
+
+
+class DependencyCheckCache:
+    """Persistenter Cache für Dependency-Check-Ergebnisse pro Manifest
+
+    Manifest-Pfade sind relativ zum Quellbaum; mehrere Bäume auf demselben
+    Reports-Volume bekommen daher je einen eigenen Namespace (aufgelöster
+    source_dir) und sehen bzw. entfernen nur ihre eigenen Einträge.
+    Einträge älter als max_age_hours gelten als Miss, damit unveränderte
+    Manifeste gegen die aktuelle Datenbank neu analysiert werden.
+    """
+
+    def __init__(self, cache_file: Path, source_dir: Path, max_age_hours: float = MAX_AGE_HOURS):
+        self.cache_file = cache_file
+        self.max_age = timedelta(hours=max_age_hours)
+        self.source_key = str(Path(source_dir).resolve())
+        self.lock_file = cache_file.with_name(cache_file.name + ".lock")
+        self.entries: Dict[str, Dict[str, Any]] = {}
+        self.hits = 0
+        self.misses = 0
+        # Änderungen dieses Laufs; save() überträgt nur diese
+        self.stored: Dict[str, Dict[str, Any]] = {}
+        self.removed: set = set()
+
+    def _read(self) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """Alle Namespaces der Cache-Datei"""
+        if not self.cache_file.exists():
+            return {}
+        try:
+            with open(self.cache_file, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            logger.warning(f"Ignoring unreadable dependency cache: {str(e)}")
+            return {}
+        # Version 1 war nur nach relativem Pfad geschlüsselt und lässt sich keinem Baum zuordnen
+        return data.get('sources', {}) if data.get('version') == CACHE_VERSION else {}
+
+    def load(self) -> 'DependencyCheckCache':
+        # Atomar ersetzt: Lesen ohne Lock sieht immer eine vollständige Datei
+        self.entries = self._read().get(self.source_key, {})
+        return self
+
+    def save(self):
+        """Überträgt die eigenen Änderungen auf den aktuellen Stand der Datei
+
+        Parallele Scans auf demselben Reports-Volume verlieren so keine
+        Einträge des jeweils anderen (Read-Modify-Write unter Lock).
+        """
+        with file_lock(self.lock_file):
+            sources = self._read()
+            entries = sources.setdefault(self.source_key, {})
+            for manifest in self.removed:
+                entries.pop(manifest, None)
+            entries.update(self.stored)
+            if not entries:
+                del sources[self.source_key]
+            write_json_atomic(self.cache_file, {'version': CACHE_VERSION, 'sources': sources})
+
+    def is_fresh(self, entry: Dict[str, Any], now: datetime) -> bool:
+        try:
+            return now - datetime.fromisoformat(entry['scanned_at']) < self.max_age
+        except (KeyError, TypeError, ValueError):
+            return False
+
+    def partition(self, manifests: Dict[str, Dict[str, str]], now: Optional[datetime] = None) -> List[str]:
+        """Liefert die Manifeste, die neu analysiert werden müssen (geändert oder veraltet)"""
+        now = now or datetime.now()
+        # Entfernte Manifeste dieses Quellbaums aus dem Cache werfen
+        for manifest in set(self.entries) - set(manifests):
+            del self.entries[manifest]
+            self.removed.add(manifest)
+
+        changed = []
+        for manifest, info in manifests.items():
+            entry = self.entries.get(manifest)
+            if entry and entry.get('hash') == info['hash'] and self.is_fresh(entry, now):
+                self.hits += 1
+            else:
+                self.misses += 1
+                changed.append(manifest)
+        return changed
+
+    def store(self, manifest: str, info: Dict[str, str], dependencies: List[Dict[str, Any]]):
+        self.entries[manifest] = self.stored[manifest] = {
+            'ecosystem': info['ecosystem'],
+            'hash': info['hash'],
+            'scanned_at': datetime.now().isoformat(),
+            'dependencies': dependencies
+        }
+        self.removed.discard(manifest)
+
+    def dependencies(self) -> List[Dict[str, Any]]:
+        """Alle gecachten Dependencies über alle Manifeste"""
+        return [dep for entry in self.entries.values() for dep in entry.get('dependencies', [])]
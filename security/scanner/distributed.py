@@ -0,0 +1,344 @@
+#!/usr/bin/env python3
+"""
+Verteilter Scan für Security Expert Agent S7
+Ein Coordinator zerlegt den Scan in Shards (pro Tool, für Semgrep/ESLint
+zusätzlich pro Verzeichnis) und verteilt sie an Worker-Pods oder lokale Prozesse
+"""
+
+import os
+import json
+import time
+import socket
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from multiprocessing.connection import Listener, Client, Connection
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple, Callable
+
+from dependency_cache import IGNORED_DIRS
+from findings import count_findings
+from metrics import QUEUE_DEPTH, SHARDS_IN_FLIGHT
+
+logger = logging.getLogger('security-scanner')
+
+# Tools, die zusätzlich pro Verzeichnis geshardet werden: (Wurzel, erlaubte Dateiendungen)
+SHARDED_TOOLS = {
+    'semgrep': (lambda scanner: scanner.source_dir, None),
+    'eslint_security': (lambda scanner: scanner.source_dir / "frontend", ('.js', '.jsx', '.ts', '.tsx')),
+}
+
+# Wartezeit eines Workers, wenn nur noch Shards anderer Worker laufen
+WAIT_INTERVAL = 0.5
+
+
+def parse_address(value: str) -> Tuple[str, int]:
+    """'host:port' -> ('host', port)"""
+    host, _, port = value.rpartition(':')
+    return host or '0.0.0.0', int(port)
+
+
+def _send(conn: Connection, message: Dict[str, Any]):
+    # JSON statt Pickle: Worker und Coordinator tauschen nur Daten aus
+    conn.send_bytes(json.dumps(message).encode('utf-8'))
+
+
+def _recv(conn: Connection) -> Dict[str, Any]:
+    return json.loads(conn.recv_bytes().decode('utf-8'))
+
+
+def plan_shards(scanner) -> List[Dict[str, Any]]:
+    """Zerlegt einen Scan in Shards"""
+    shards = []
+
+    for tool in scanner.tool_runners():
+        if not scanner.tools[tool]['enabled']:
+            continue
+
+        reason = scanner.skip_reason(tool)
+        if reason:
+            # Wird nicht verteilt, erscheint aber als übersprungen im Report
+            shards.append({'id': tool, 'tool': tool, 'skip': reason})
+            continue
+
+        groups = []
+        if tool in SHARDED_TOOLS:
+            root_of, extensions = SHARDED_TOOLS[tool]
+            groups = directory_groups(root_of(scanner), scanner.source_dir, extensions)
+
+        if not groups:
+            shards.append({'id': tool, 'tool': tool})
+            continue
+
+        for name, targets in groups:
+            shards.append({'id': f"{tool}:{name}", 'tool': tool, 'targets': targets})
+
+    return shards
+
+
+def directory_groups(root: Path, source_dir: Path,
+                     extensions: Optional[Tuple[str, ...]] = None) -> List[Tuple[str, List[str]]]:
+    """Ein Shard pro Unterverzeichnis plus einer für Dateien direkt in root"""
+    if not root.is_dir():
+        return []
+
+    groups = []
+    root_files = []
+    for entry in sorted(root.iterdir()):
+        if entry.name in IGNORED_DIRS:
+            continue
+        relative = str(entry.relative_to(source_dir))
+        if entry.is_dir():
+            groups.append((relative, [relative]))
+        elif extensions is None or entry.suffix in extensions:
+            root_files.append(relative)
+
+    if root_files:
+        groups.append((str(root.relative_to(source_dir)) + "/*", root_files))
+    return groups
+
+
+def merge_shard_results(tool: str, shard_results: List[Dict[str, Any]], scanner) -> Dict[str, Any]:
+    """Führt die normalisierten Ergebnisse aller Shards eines Tools zusammen"""
+    if len(shard_results) == 1 and not shard_results[0].get('shard_targets'):
+        return shard_results[0]
+
+    succeeded = [r for r in shard_results if r.get('status') == 'success']
+    failed = [r for r in shard_results if r.get('status') not in ('success', 'skipped')]
+
+    if not succeeded:
+        status = 'skipped' if not failed else failed[0].get('status', 'error')
+        merged = {'tool': tool, 'status': status, 'shards': len(shard_results)}
+        if failed:
+            merged['error'] = '; '.join(str(r.get('error', r.get('status'))) for r in failed)
+        return merged
+
+    findings = [finding for r in succeeded for finding in r.get('findings', [])]
+    merged = {
+        'tool': tool,
+        'status': 'success',
+        **count_findings(tool, findings),
+        'shards': len(shard_results),
+        'results': scanner.select_report_findings(tool, findings),
+        'findings': findings
+    }
+    if tool == 'eslint_security':
+        merged['files_scanned'] = sum(r.get('files_scanned', 0) for r in succeeded)
+
+    if failed:
+        # Teilweise Abdeckung muss im Report sichtbar bleiben
+        merged['failed_shards'] = [
+            {'shard': r.get('shard_id'), 'status': r.get('status'), 'error': r.get('error')} for r in failed
+        ]
+        logger.error(f"{tool}: {len(failed)} of {len(shard_results)} shards failed")
+
+    return merged
+
+
+class ScanCoordinator:
+    """Verteilt Shards an verbundene Worker und sammelt die Ergebnisse ein"""
+
+    def __init__(self, scanner, address: Tuple[str, int], authkey: bytes):
+        self.scanner = scanner
+        self.authkey = authkey
+        self.shards = plan_shards(scanner)
+        self.pending = deque(shard for shard in self.shards if 'skip' not in shard)
+        self.results: Dict[str, Dict[str, Any]] = {
+            shard['id']: {'tool': shard['tool'], 'status': 'skipped', 'reason': shard['skip']}
+            for shard in self.shards if 'skip' in shard
+        }
+        self.workers = set()
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.closing = False
+        # Standard-Backlog ist 1; mehrere Worker verbinden sich gleichzeitig
+        self.listener = Listener(address, backlog=64, authkey=authkey)
+
+        if len(self.results) == len(self.shards):
+            self.done.set()
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        return self.listener.address
+
+    @property
+    def queue_depth(self) -> int:
+        with self.lock:
+            return len(self.pending)
+
+    @property
+    def in_flight(self) -> int:
+        with self.lock:
+            return len(self.shards) - len(self.results) - len(self.pending)
+
+    def _next_message(self) -> Tuple[Dict[str, Any], Optional[Dict[str, Any]]]:
+        with self.lock:
+            if self.pending:
+                shard = self.pending.popleft()
+                return {'type': 'shard', 'shard': shard}, shard
+            if len(self.results) < len(self.shards):
+                # Laufende Shards können bei Worker-Ausfall zurückkommen
+                return {'type': 'wait', 'seconds': WAIT_INTERVAL}, None
+            return {'type': 'shutdown'}, None
+
+    def _handle(self, conn: Connection):
+        current = None
+        try:
+            while True:
+                message = _recv(conn)
+
+                if message.get('type') == 'result':
+                    with self.lock:
+                        self.results[message['shard_id']] = message['result']
+                        self.workers.add(message['result'].get('worker'))
+                        if len(self.results) == len(self.shards):
+                            self.done.set()
+                    logger.info(f"🧩 Shard {message['shard_id']} finished "
+                                f"({len(self.results)}/{len(self.shards)})")
+                    current = None
+
+                reply, current = self._next_message()
+                _send(conn, reply)
+                if reply['type'] == 'shutdown':
+                    break
+        except (EOFError, OSError) as e:
+            if current is not None:
+                logger.warning(f"Worker lost while running shard {current['id']}, requeueing: {str(e)}")
+                with self.lock:
+                    self.pending.appendleft(current)
+        finally:
+            conn.close()
+
+    def _accept_loop(self):
+        while not self.closing:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError) as e:
+                if not self.closing:
+                    logger.warning(f"Rejected worker connection: {str(e)}")
+                continue
+            if self.closing:
+                conn.close()
+                break
+            threading.Thread(target=self._handle, args=(conn,), daemon=True).start()
+
+    def serve(self, timeout: Optional[float] = None) -> Dict[str, Dict[str, Any]]:
+        """Wartet, bis alle Shards bearbeitet sind, und liefert die Tool-Ergebnisse"""
+        logger.info(f"🛰  Coordinator listening on {self.address} with {len(self.shards)} shards")
+
+        accept_thread = threading.Thread(target=self._accept_loop, daemon=True)
+        accept_thread.start()
+        # Grundlage für das Autoscaling der Worker-Pods
+        QUEUE_DEPTH.set_function(lambda: self.queue_depth)
+        SHARDS_IN_FLIGHT.set_function(lambda: self.in_flight)
+
+        try:
+            finished = self.done.wait(timeout)
+        finally:
+            QUEUE_DEPTH.set_function(None)
+            SHARDS_IN_FLIGHT.set_function(None)
+            QUEUE_DEPTH.set(0)
+            SHARDS_IN_FLIGHT.set(0)
+        self.close(accept_thread)
+
+        if not finished:
+            logger.error(f"Distributed scan timed out with {len(self.shards) - len(self.results)} shards open")
+
+        return self.merge()
+
+    def close(self, accept_thread: Optional[threading.Thread] = None):
+        self.closing = True
+        if accept_thread is not None and accept_thread.is_alive():
+            # accept() blockiert; eine eigene Verbindung weckt den Thread auf
+            try:
+                Client(self.address, authkey=self.authkey).close()
+            except OSError:
+                pass
+            accept_thread.join(timeout=5)
+        self.listener.close()
+
+    def merge(self) -> Dict[str, Dict[str, Any]]:
+        by_tool: Dict[str, List[Dict[str, Any]]] = {}
+        for shard in self.shards:
+            result = self.results.get(shard['id'], {'tool': shard['tool'], 'status': 'timeout'})
+            result['shard_id'] = shard['id']
+            result['shard_targets'] = shard.get('targets')
+            by_tool.setdefault(shard['tool'], []).append(result)
+
+        merged = {}
+        for tool, shard_results in by_tool.items():
+            merged[tool] = merge_shard_results(tool, shard_results, self.scanner)
+            for key in ('shard_id', 'shard_targets'):
+                merged[tool].pop(key, None)
+        return merged
+
+
+def run_worker(scanner, address: Tuple[str, int], authkey: bytes, connect_timeout: float = 60.0) -> int:
+    """Verbindet sich mit dem Coordinator und bearbeitet Shards, bis keine mehr offen sind"""
+    worker_id = f"{socket.gethostname()}-{os.getpid()}"
+    deadline = time.time() + connect_timeout
+
+    # Worker-Pods können vor dem Coordinator starten
+    while True:
+        try:
+            conn = Client(address, authkey=authkey)
+            break
+        except ConnectionRefusedError:
+            if time.time() > deadline:
+                raise
+            time.sleep(1)
+
+    logger.info(f"🛠  Worker {worker_id} connected to {address}")
+    processed = 0
+
+    try:
+        _send(conn, {'type': 'ready', 'worker': worker_id})
+        while True:
+            message = _recv(conn)
+
+            if message['type'] == 'shutdown':
+                break
+            if message['type'] == 'wait':
+                time.sleep(message.get('seconds', WAIT_INTERVAL))
+                _send(conn, {'type': 'ready', 'worker': worker_id})
+                continue
+
+            shard = message['shard']
+            logger.info(f"🧩 Worker {worker_id} running shard {shard['id']}")
+            try:
+                result = scanner.run_shard(shard)
+            except Exception as e:
+                result = {'tool': shard['tool'], 'status': 'error', 'error': str(e)}
+            finally:
+                # Tool-Ausgaben (runs/<run_id>) nicht pro Shard auf dem Worker liegen lassen
+                scanner.cleanup_work_dir()
+
+            # Der Pfad existiert nur auf dem Worker und ist jetzt gelöscht;
+            # die Findings selbst gehen mit dem Ergebnis an den Coordinator
+            result.pop('report_file', None)
+            result['worker'] = worker_id
+
+            _send(conn, {'type': 'result', 'shard_id': shard['id'], 'result': result})
+            processed += 1
+    finally:
+        conn.close()
+
+    logger.info(f"🛠  Worker {worker_id} finished after {processed} shards")
+    return processed
+
+
+def _local_worker_main(scanner_factory: Callable[[], Any], address: Tuple[str, int], authkey: bytes):
+    run_worker(scanner_factory(), address, authkey)
+
+
+def start_local_workers(count: int, scanner_factory: Callable[[], Any], address: Tuple[str, int],
+                        authkey: bytes) -> List[multiprocessing.Process]:
+    """Startet lokale Worker-Prozesse als Ersatz für Worker-Pods"""
+    context = multiprocessing.get_context('fork')
+    workers = []
+    for _ in range(count):
+        process = context.Process(target=_local_worker_main, args=(scanner_factory, address, authkey), daemon=True)
+        process.start()
+        workers.append(process)
+    return workers
@@ -0,0 +1,277 @@
+#!/usr/bin/env python3
+"""
+Normalisierte Findings für Security Expert Agent S7
+Bringt die Ausgaben aller Tools in ein gemeinsames Format
+"""
+
+import re
+import heapq
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Tuple
+
+# Gemeinsame Severity-Skala aller Tools
+SEVERITIES = ['CRITICAL', 'HIGH', 'MEDIUM', 'LOW', 'INFO']
+
+SEVERITY_ALIASES = {
+    'ERROR': 'HIGH',
+    'WARNING': 'MEDIUM',
+    'MODERATE': 'MEDIUM',
+    'NEGLIGIBLE': 'INFO',
+    'UNKNOWN': 'INFO',
+}
+
+# Standard-Anzahl der Findings pro Tool im Report
+DEFAULT_REPORT_LIMIT = 10
+
+LIKELIHOOD_SCORES = {'HIGH': 2, 'MEDIUM': 1, 'LOW': 0}
+
+CWE_PATTERN = re.compile(r'CWE-(\d+)', re.IGNORECASE)
+OWASP_PATTERN = re.compile(r'\b(A\d{2}):2021\b')
+
+
+def normalize_severity(value: Any) -> str:
+    severity = str(value or '').upper()
+    severity = SEVERITY_ALIASES.get(severity, severity)
+    return severity if severity in SEVERITIES else 'INFO'
+
+
+def normalize_cwes(values: Any) -> List[str]:
+    """Extrahiert CWE-IDs aus Strings wie 'CWE-89: Improper Neutralization...'"""
+    if isinstance(values, str):
+        values = [values]
+    cwes = []
+    for value in values or []:
+        cwes.extend(f"CWE-{m}" for m in CWE_PATTERN.findall(str(value)))
+    return cwes
+
+
+def normalize_owasp(values: Any) -> List[str]:
+    """Extrahiert OWASP-2021-Kategorien aus Strings wie 'A03:2021 - Injection'"""
+    if isinstance(values, str):
+        values = [values]
+    categories = []
+    for value in values or []:
+        categories.extend(OWASP_PATTERN.findall(str(value)))
+    return categories
+
+
+def relative_path(path: str, source_dir: Optional[Path]) -> str:
+    if not path or source_dir is None:
+        return path or ''
+    try:
+        return str(Path(path).relative_to(source_dir))
+    except ValueError:
+        return path
+
+
+def make_finding(tool: str, **fields) -> Dict[str, Any]:
+    finding = {
+        'tool': tool,
+        'rule_id': '',
+        'vulnerability_id': '',
+        'severity': 'INFO',
+        'path': '',
+        'line': None,
+        'package_ids': [],
+        'cwes': [],
+        'owasp': [],
+        'message': '',
+    }
+    finding.update(fields)
+    return finding
+
+
+def normalize_semgrep(scan_data: Dict[str, Any], source_dir: Optional[Path] = None) -> List[Dict[str, Any]]:
+    findings = []
+    for result in scan_data.get('results', []):
+        extra = result.get('extra', {})
+        metadata = extra.get('metadata', {})
+        findings.append(make_finding(
+            'semgrep',
+            rule_id=result.get('check_id', ''),
+            severity=normalize_severity(extra.get('severity')),
+            path=relative_path(result.get('path', ''), source_dir),
+            line=result.get('start', {}).get('line'),
+            cwes=normalize_cwes(metadata.get('cwe')),
+            owasp=normalize_owasp(metadata.get('owasp')),
+            exploitability=LIKELIHOOD_SCORES.get(str(metadata.get('likelihood', '')).upper(), 0),
+            message=extra.get('message') or result.get('message', '')
+        ))
+    return findings
+
+
+def normalize_trivy(scan_data: Dict[str, Any], source_dir: Optional[Path] = None) -> List[Dict[str, Any]]:
+    findings = []
+    for res in scan_data.get('Results', []) or []:
+        for vuln in res.get('Vulnerabilities', []) or []:
+            purl = vuln.get('PkgIdentifier', {}).get('PURL')
+            findings.append(make_finding(
+                'trivy',
+                vulnerability_id=vuln.get('VulnerabilityID', ''),
+                severity=normalize_severity(vuln.get('Severity')),
+                path=relative_path(res.get('Target', ''), source_dir),
+                package_ids=[purl] if purl else [],
+                package=f"{vuln.get('PkgName', '')}@{vuln.get('InstalledVersion', '')}",
+                cwes=normalize_cwes(vuln.get('CweIDs')),
+                cvss_score=vuln.get('CVSS', {}).get('nvd', {}).get('V3Score'),
+                # Über das Netzwerk ausnutzbar
+                exploitability=1 if 'AV:N' in vuln.get('CVSS', {}).get('nvd', {}).get('V3Vector', '') else 0,
+                message=vuln.get('Title', '')
+            ))
+    return findings
+
+
+def normalize_dependency_check(dependencies: List[Dict[str, Any]],
+                               source_dir: Optional[Path] = None) -> List[Dict[str, Any]]:
+    findings = []
+    for dep in dependencies:
+        package_ids = ([p.get('id', '') for p in dep.get('packages', [])]
+                       + [v.get('id', '') for v in dep.get('vulnerabilityIds', [])])
+        path = relative_path(dep.get('filePath', '').split('?', 1)[0], source_dir)
+        for vuln in dep.get('vulnerabilities', []):
+            findings.append(make_finding(
+                'dependency_check',
+                vulnerability_id=vuln.get('name', ''),
+                severity=normalize_severity(vuln.get('severity')),
+                path=path,
+                # Originaler filePath und SHA-1 für filePath/sha1 in Dependency-Check Suppressions
+                file_path=dep.get('filePath', ''),
+                sha1=dep.get('sha1', ''),
+                package_ids=[p for p in package_ids if p],
+                package=dep.get('fileName', ''),
+                cwes=normalize_cwes(vuln.get('cwes')),
+                cvss_score=(vuln.get('cvssv3', {}).get('baseScore')
+                            or vuln.get('cvssv2', {}).get('score')),
+                # CISA KEV: wird bereits aktiv ausgenutzt
+                exploitability=3 if vuln.get('knownExploitedVulnerability') else 0,
+                message=(vuln.get('description') or '')[:300]
+            ))
+    return findings
+
+
+def normalize_gitleaks(scan_data: Any, source_dir: Optional[Path] = None) -> List[Dict[str, Any]]:
+    if not isinstance(scan_data, list):
+        return []
+    return [
+        make_finding(
+            'gitleaks',
+            rule_id=leak.get('RuleID', ''),
+            severity='CRITICAL',  # Secrets sind immer kritisch
+            path=relative_path(leak.get('File', ''), source_dir),
+            line=leak.get('StartLine'),
+            fingerprint=leak.get('Fingerprint', ''),
+            exploitability=3,  # Ein geleaktes Secret ist direkt nutzbar
+            cwes=['CWE-798'],
+            message=leak.get('Description', '')
+        )
+        for leak in scan_data
+    ]
+
+
+# eslint-plugin-security Regeln -> CWE (ESLint liefert selbst keine CWE-Metadaten)
+ESLINT_RULE_CWES = {
+    'security/detect-eval-with-expression': ['CWE-95'],
+    'security/detect-non-literal-require': ['CWE-829'],
+    'security/detect-non-literal-fs-filename': ['CWE-22'],
+    'security/detect-child-process': ['CWE-78'],
+    'security/detect-object-injection': ['CWE-915'],
+    'security/detect-disable-mustache-escape': ['CWE-79'],
+    'security/detect-no-csrf-before-method-override': ['CWE-352'],
+    'security/detect-pseudoRandomBytes': ['CWE-338'],
+    'security/detect-possible-timing-attacks': ['CWE-208'],
+    'security/detect-buffer-noassert': ['CWE-119'],
+    'security/detect-new-buffer': ['CWE-119'],
+    'security/detect-unsafe-regex': ['CWE-1333'],
+    'security/detect-non-literal-regexp': ['CWE-1333'],
+}
+
+
+def normalize_eslint(scan_data: List[Dict[str, Any]], source_dir: Optional[Path] = None) -> List[Dict[str, Any]]:
+    findings = []
+    for file in scan_data:
+        path = relative_path(file.get('filePath', ''), source_dir)
+        for msg in file.get('messages', []):
+            rule_id = msg.get('ruleId') or ''
+            if rule_id.startswith('security/'):
+                severity = 'HIGH' if msg.get('severity') == 2 else 'MEDIUM'
+            else:
+                severity = 'LOW' if msg.get('severity') == 2 else 'INFO'
+            findings.append(make_finding(
+                'eslint_security',
+                rule_id=rule_id,
+                severity=severity,
+                path=path,
+                line=msg.get('line'),
+                cwes=list(ESLINT_RULE_CWES.get(rule_id, [])),
+                message=msg.get('message', '')
+            ))
+    return findings
+
+
+def count_findings(tool: str, findings: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Berechnet die tool-spezifischen Kennzahlen aus den Findings"""
+    if tool == 'semgrep':
+        return {
+            'total_issues': len(findings),
+            'critical_issues': len([f for f in findings if f['severity'] in ['CRITICAL', 'HIGH', 'MEDIUM']])
+        }
+    if tool == 'trivy':
+        return {
+            'total_vulnerabilities': len(findings),
+            'critical_vulnerabilities': len([f for f in findings if f['severity'] == 'CRITICAL'])
+        }
+    if tool == 'dependency_check':
+        return {
+            'total_vulnerabilities': len(findings),
+            'critical_vulnerabilities': len([f for f in findings if f['severity'] in ['CRITICAL', 'HIGH']])
+        }
+    if tool == 'gitleaks':
+        return {'secrets_found': len(findings)}
+    if tool == 'eslint_security':
+        return {
+            'total_issues': len(findings),
+            'security_issues': len([f for f in findings if f['rule_id'].startswith('security/')])
+        }
+    return {}
+
+
+def rank_key(finding: Dict[str, Any]) -> Tuple[int, float, int]:
+    """Sortierschlüssel: Severity, dann CVSS, dann Ausnutzbarkeit"""
+    severity = finding.get('severity', 'INFO')
+    severity_rank = len(SEVERITIES) - SEVERITIES.index(severity) if severity in SEVERITIES else 0
+    return (severity_rank, float(finding.get('cvss_score') or 0.0), int(finding.get('exploitability') or 0))
+
+
+class TopFindings:
+    """Begrenzter Heap für die schwersten N Findings eines Streams
+
+    Hält nie mehr als limit Einträge; bei Gleichstand gewinnt das frühere Finding.
+    """
+
+    def __init__(self, limit: int = DEFAULT_REPORT_LIMIT):
+        self.limit = limit
+        self.seen = 0
+        self._heap: List[Tuple[Tuple[int, float, int], int, Dict[str, Any]]] = []
+
+    def push(self, finding: Dict[str, Any]):
+        # -seen: bei gleichem Rang wird das spätere Finding zuerst verdrängt
+        entry = (rank_key(finding), -self.seen, finding)
+        self.seen += 1
+        if self.limit <= 0:
+            return
+        if len(self._heap) < self.limit:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def items(self) -> List[Dict[str, Any]]:
+        """Die gesammelten Findings, schwerste zuerst"""
+        return [entry[2] for entry in sorted(self._heap, key=lambda e: e[:2], reverse=True)]
+
+
+def select_top(findings: Iterable[Dict[str, Any]], limit: int = DEFAULT_REPORT_LIMIT) -> List[Dict[str, Any]]:
+    """Wählt die schwersten Findings aus einem beliebigen Iterable"""
+    top = TopFindings(limit)
+    for finding in findings:
+        top.push(finding)
+    return top.items()
@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+Metriken für Security Expert Agent S7
+Kleine OpenMetrics-Registry ohne externe Abhängigkeiten: Scrape-Endpoint
+(/metrics) für Worker- und Coordinator-Pods, Textfile für einmalige Scans
+"""
+
+import math
+import time
+import logging
+import threading
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple, Callable, Iterable
+
+from atomic_files import atomic_write
+
+logger = logging.getLogger('security-scanner')
+
+OPENMETRICS_CONTENT_TYPE = 'application/openmetrics-text; version=1.0.0; charset=utf-8'
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Tool-Laufzeiten reichen von Sekunden (GitLeaks) bis zu mehreren Minuten (Dependency Check)
+DURATION_BUCKETS = (0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1200)
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names: Tuple[str, ...], values: Tuple[str, ...], extra: str = '') -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value: float) -> str:
+    if math.isinf(value):
+        return '+Inf' if value > 0 else '-Inf'
+    if float(value).is_integer():
+        return str(int(value))
+    return repr(float(value))
+
+
+class _Metric:
+    kind = ''
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def header(self, openmetrics: bool) -> List[str]:
+        name = self.name if openmetrics or self.kind != 'counter' else f"{self.name}_total"
+        return [f"# HELP {name} {self.documentation}", f"# TYPE {name} {self.kind}"]
+
+
+class Counter(_Metric):
+    """Monoton steigender Zähler (Sample mit _total-Suffix)"""
+    kind = 'counter'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        if amount < 0:
+            raise ValueError("Counters can only increase")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            return [f"{self.name}_total{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+
+class Gauge(_Metric):
+    """Aktueller Wert; optional beim Scrape über eine Funktion bestimmt"""
+    kind = 'gauge'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = ()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+        self._function: Optional[Callable[[], float]] = None
+
+    def set(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def set_function(self, function: Optional[Callable[[], float]]):
+        """Nur für Gauges ohne Labels, z.B. die Queue-Tiefe des Coordinators"""
+        self._function = function
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def value(self, **labels) -> float:
+        if self._function is not None:
+            return self._function()
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self) -> List[str]:
+        if self._function is not None:
+            return [f"{self.name} {_format_value(self._function())}"]
+        with self._lock:
+            return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}"
+                    for key, value in sorted(self._values.items())]
+
+
+class Histogram(_Metric):
+    """Verteilung mit festen Buckets (_bucket, _count, _sum)"""
+    kind = 'histogram'
+
+    def __init__(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                 buckets: Iterable[float] = DURATION_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self._values: Dict[Tuple[str, ...], Tuple[List[int], float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def count(self, **labels) -> int:
+        counts, _ = self._values.get(self._key(labels), ([0], 0.0))
+        return counts[-1]
+
+    def samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            for key, (counts, total) in sorted(self._values.items()):
+                for bound, count in zip(self.buckets, counts):
+                    le = f'le="{_format_value(bound)}"'
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {count}")
+                labels = _format_labels(self.labelnames, key)
+                lines.append(f"{self.name}_count{labels} {counts[-1]}")
+                lines.append(f"{self.name}_sum{labels} {_format_value(total)}")
+        return lines
+
+
+class MetricsRegistry:
+    """Sammlung aller Metriken eines Scanner-Prozesses"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def _register(self, metric: _Metric) -> _Metric:
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name: str, documentation: str, labelnames: Iterable[str] = ()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name: str, documentation: str, labelnames: Iterable[str] = (),
+                  buckets: Iterable[float] = DURATION_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self, openmetrics: bool = True) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.header(openmetrics))
+            lines.extend(metric.samples())
+        if openmetrics:
+            lines.append('# EOF')
+        return '\n'.join(lines) + '\n'
+
+    def write_textfile(self, path: Path):
+        """Schreibt die Metriken atomar für den node_exporter Textfile-Collector"""
+        with atomic_write(path) as f:
+            f.write(self.render(openmetrics=False))
+
+    def serve(self, port: int, host: str = '0.0.0.0') -> ThreadingHTTPServer:
+        """Startet den Scrape-Endpoint in einem Daemon-Thread"""
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?', 1)[0] != '/metrics':
+                    self.send_error(404)
+                    return
+                openmetrics = 'application/openmetrics-text' in self.headers.get('Accept', '')
+                body = registry.render(openmetrics).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', OPENMETRICS_CONTENT_TYPE if openmetrics else PROMETHEUS_CONTENT_TYPE)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                # Scrapes alle 15s sollen das Scanner-Log nicht füllen
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self._server.daemon_threads = True
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        logger.info(f"📈 Metrics endpoint listening on {host}:{self._server.server_address[1]}/metrics")
+        return self._server
+
+    def shutdown(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+REGISTRY = MetricsRegistry()
+
+SCANS = REGISTRY.counter('security_scanner_scans', 'Completed scans', ['mode'])
+SCAN_DURATION = REGISTRY.histogram('security_scanner_scan_duration_seconds', 'Duration of complete scans', ['mode'])
+TOOL_RUNS = REGISTRY.counter('security_scanner_tool_runs', 'Tool runs by result status', ['tool', 'status'])
+TOOL_DURATION = REGISTRY.histogram('security_scanner_tool_duration_seconds', 'Duration of tool runs', ['tool'])
+SUBPROCESS_FAILURES = REGISTRY.counter('security_scanner_subprocess_failures',
+                                       'Tool processes that timed out, were killed or could not start',
+                                       ['command', 'reason'])
+CACHE_REQUESTS = REGISTRY.counter('security_scanner_cache_requests', 'Cache lookups by result', ['cache', 'result'])
+QUEUE_DEPTH = REGISTRY.gauge('security_scanner_queue_depth', 'Shards waiting for a worker')
+SHARDS_IN_FLIGHT = REGISTRY.gauge('security_scanner_shards_in_flight', 'Shards currently running on workers')
+FINDINGS = REGISTRY.gauge('security_scanner_findings', 'Unsuppressed findings of the last scan',
+                          ['tool', 'severity'])
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels):
+    """Misst die Dauer eines Blocks: with timed(TOOL_DURATION, tool='trivy'): ..."""
+    start = time.monotonic()
+    try:
+        yield
+    finally:
+        histogram.observe(time.monotonic() - start, **labels)
@@ -0,0 +1,215 @@
+#!/usr/bin/env python3
+"""
+Prozess-Runner für Security Expert Agent S7
+Führt Tools per asyncio in einer eigenen Prozessgruppe aus: Timeout und
+Abbruch beenden auch Enkelprozesse (JVM, node), stdout wird ab einer
+Größe auf Platte ausgelagert, stderr wird parallel und begrenzt gelesen
+"""
+
+import os
+import json
+import signal
+import asyncio
+import logging
+import tempfile
+import subprocess
+from collections import deque
+from typing import Dict, List, Any, Optional
+
+from metrics import SUBPROCESS_FAILURES
+
+logger = logging.getLogger('security-scanner')
+
+CHUNK_SIZE = 64 * 1024
+# Ab dieser Größe landet stdout in einer temporären Datei
+SPOOL_LIMIT = 8 * 1024 * 1024
+# Von stderr wird nur das Ende behalten
+STDERR_LIMIT = 64 * 1024
+# Zeit zwischen SIGTERM und SIGKILL
+TERMINATE_GRACE = 5.0
+
+
+class BoundedTail:
+    """Puffer, der nur die letzten limit Bytes behält"""
+
+    def __init__(self, limit: int = STDERR_LIMIT):
+        self.limit = limit
+        self.size = 0
+        self.truncated = False
+        self._chunks = deque()
+
+    def write(self, chunk: bytes):
+        self._chunks.append(chunk)
+        self.size += len(chunk)
+        while self.size - len(self._chunks[0]) >= self.limit:
+            self.size -= len(self._chunks.popleft())
+            self.truncated = True
+
+    def getvalue(self) -> str:
+        data = b''.join(self._chunks)[-self.limit:]
+        return data.decode('utf-8', errors='replace')
+
+
+class ProcessResult:
+    """Ergebnis eines Tool-Laufs, kompatibel zu subprocess.CompletedProcess
+
+    Als Context-Manager verwenden, damit ausgelagertes stdout sofort gelöscht wird.
+    """
+
+    def __init__(self, args: List[str], returncode: int, stdout_file, stderr: str):
+        self.args = args
+        self.returncode = returncode
+        self.stdout_file = stdout_file
+        self.stderr = stderr
+
+    @property
+    def spilled(self) -> bool:
+        """True, wenn stdout auf Platte ausgelagert wurde"""
+        return bool(getattr(self.stdout_file, '_rolled', False))
+
+    @property
+    def stdout(self) -> str:
+        """Komplettes stdout als String (nur für kleine Ausgaben)"""
+        self.stdout_file.seek(0)
+        return self.stdout_file.read().decode('utf-8', errors='replace')
+
+    @property
+    def stdout_size(self) -> int:
+        return self.stdout_file.seek(0, os.SEEK_END)
+
+    def load_json(self, default: Any = None) -> Any:
+        """Parst stdout aus dem (Spool-)File
+
+        Nicht inkrementell: json.load liest die Ausgabe komplett als Bytes, dekodiert
+        sie zu einem String und baut daraus die Objekte. Der Spitzenverbrauch liegt
+        damit bei etwa Bytes + String + Objektbaum der gesamten Ausgabe; das
+        Auslagern begrenzt nur den Speicher, solange das Tool läuft.
+        Leere Ausgabe liefert default; ungültiges JSON wirft json.JSONDecodeError.
+        """
+        if not self.stdout_size:
+            return default
+        self.stdout_file.seek(0)
+        return json.load(self.stdout_file)
+
+    def close(self):
+        self.stdout_file.close()
+
+    def __enter__(self) -> 'ProcessResult':
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+
+def _signal_group(pid: int, sig: int) -> bool:
+    try:
+        os.killpg(pid, sig)
+        return True
+    except (ProcessLookupError, PermissionError):
+        return False
+
+
+class _ExitAwareProtocol(asyncio.subprocess.SubprocessStreamProtocol):
+    """Meldet das Prozessende sofort, auch wenn Enkelprozesse die Pipes noch offen halten
+
+    Process.wait() kehrt erst zurück, wenn alle Pipes geschlossen sind.
+    """
+
+    def __init__(self, limit: int, loop: asyncio.AbstractEventLoop):
+        super().__init__(limit=limit, loop=loop)
+        self.exited = loop.create_future()
+
+    def process_exited(self):
+        super().process_exited()
+        if not self.exited.done():
+            self.exited.set_result(None)
+
+
+async def _terminate(pid: int, exited: asyncio.Future, grace: float = TERMINATE_GRACE):
+    """SIGTERM an die ganze Prozessgruppe, nach grace Sekunden SIGKILL"""
+    if _signal_group(pid, signal.SIGTERM):
+        try:
+            await asyncio.wait_for(asyncio.shield(exited), grace)
+        except asyncio.TimeoutError:
+            pass
+    _signal_group(pid, signal.SIGKILL)
+    await asyncio.shield(exited)
+
+
+async def _drain(stream: asyncio.StreamReader, sink):
+    while True:
+        chunk = await stream.read(CHUNK_SIZE)
+        if not chunk:
+            break
+        sink.write(chunk)
+
+
+async def run_command_async(cmd: List[str], timeout: float, cwd: Optional[str] = None,
+                            env: Optional[Dict[str, str]] = None, spool_limit: int = SPOOL_LIMIT,
+                            stderr_limit: int = STDERR_LIMIT) -> ProcessResult:
+    """Führt ein Tool aus; wirft subprocess.TimeoutExpired wie subprocess.run"""
+    loop = asyncio.get_running_loop()
+    stdout_file = tempfile.SpooledTemporaryFile(max_size=spool_limit)
+    stderr_tail = BoundedTail(stderr_limit)
+
+    command = os.path.basename(cmd[0])
+    try:
+        transport, protocol = await loop.subprocess_exec(
+            lambda: _ExitAwareProtocol(CHUNK_SIZE, loop),
+            *cmd,
+            stdin=subprocess.DEVNULL,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+            cwd=cwd,
+            env=env,
+            # Eigene Session/Prozessgruppe, damit Enkelprozesse mit beendet werden
+            start_new_session=True
+        )
+    except OSError:
+        SUBPROCESS_FAILURES.inc(command=command, reason='not_found')
+        raise
+    pid = transport.get_pid()
+
+    # stdout und stderr parallel lesen, damit keine Pipe vollläuft
+    drains = asyncio.gather(_drain(protocol.stdout, stdout_file), _drain(protocol.stderr, stderr_tail))
+
+    try:
+        try:
+            await asyncio.wait_for(asyncio.shield(protocol.exited), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"{cmd[0]} timed out after {timeout}s, killing process group {pid}")
+            SUBPROCESS_FAILURES.inc(command=command, reason='timeout')
+            await _terminate(pid, protocol.exited)
+            drains.cancel()
+            stdout_file.close()
+            raise subprocess.TimeoutExpired(cmd, timeout, stderr=stderr_tail.getvalue())
+        except asyncio.CancelledError:
+            SUBPROCESS_FAILURES.inc(command=command, reason='cancelled')
+            await _terminate(pid, protocol.exited)
+            drains.cancel()
+            stdout_file.close()
+            raise
+
+        # Übrig gebliebene Enkelprozesse halten sonst die Pipes offen
+        _signal_group(pid, signal.SIGKILL)
+        try:
+            await asyncio.wait_for(drains, TERMINATE_GRACE)
+        except asyncio.TimeoutError:
+            logger.warning(f"{cmd[0]} output pipes still open after exit, output may be incomplete")
+    finally:
+        transport.close()
+
+    if transport.get_returncode() < 0:
+        # Von außen per Signal beendet, z.B. OOM-Killer
+        SUBPROCESS_FAILURES.inc(command=command, reason='killed')
+
+    if stderr_tail.truncated:
+        logger.debug(f"{cmd[0]} stderr truncated to last {stderr_limit} bytes")
+
+    return ProcessResult(cmd, transport.get_returncode(), stdout_file, stderr_tail.getvalue())
+
+
+def run_command(cmd: List[str], timeout: float, cwd: Optional[str] = None,
+                env: Optional[Dict[str, str]] = None) -> ProcessResult:
+    """Synchrone Variante für die Scan-Methoden"""
+    return asyncio.run(run_command_async(cmd, timeout, cwd=cwd, env=env))
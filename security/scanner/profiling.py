@@ -0,0 +1,201 @@
+#!/usr/bin/env python3
+"""
+Profiling für Security Expert Agent S7
+Opt-in (--profile): misst die Python-Seite des Scanners pro Phase (Index,
+Tools, Suppressions, Report). Sampling schreibt Collapsed Stacks für
+Flamegraphs (flamegraph.pl, speedscope), cProfile eine .pstats-Datei pro Phase
+"""
+
+import os
+import sys
+import time
+import pstats
+import cProfile
+import logging
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+from atomic_files import atomic_path, atomic_write, write_json_atomic
+
+logger = logging.getLogger('security-scanner')
+
+PROFILE_MODES = ('sampling', 'cprofile')
+SAMPLE_INTERVAL = 0.005
+# Funktionen pro Phase in der Zusammenfassung
+SUMMARY_TOP = 20
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    # ';' trennt im Collapsed-Format die Frames
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}".replace(';', ':')
+
+
+def _thread_cpu_clock(ident: int) -> Optional[int]:
+    """CPU-Uhr eines Threads (Linux); None, wenn nicht verfügbar"""
+    try:
+        return time.pthread_getcpuclockid(ident)
+    except (AttributeError, OSError):
+        return None
+
+
+class _Sampler(threading.Thread):
+    """Nimmt in festen Abständen den Stack des Scan-Threads auf
+
+    Samples, in denen der Thread keine CPU-Zeit verbraucht hat (Warten auf
+    Tool-Prozesse), werden verworfen: gemessen wird nur die Python-Seite.
+    """
+
+    def __init__(self, profiler: 'ScanProfiler', ident: int, interval: float):
+        super().__init__(name='scan-profiler', daemon=True)
+        self.profiler = profiler
+        self.target_ident = ident
+        self.interval = interval
+        self.stacks: Counter = Counter()
+        self.idle_samples = 0
+        self.stopped = threading.Event()
+        self.cpu_clock = _thread_cpu_clock(ident)
+
+    def run(self):
+        last_cpu = time.clock_gettime(self.cpu_clock) if self.cpu_clock is not None else None
+
+        while not self.stopped.wait(self.interval):
+            if self.cpu_clock is not None:
+                try:
+                    cpu = time.clock_gettime(self.cpu_clock)
+                except OSError:
+                    # Scan-Thread beendet
+                    break
+                busy = cpu > last_cpu
+                last_cpu = cpu
+                if not busy:
+                    self.idle_samples += 1
+                    continue
+
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is None:
+                continue
+
+            frames = []
+            while frame is not None:
+                frames.append(_frame_name(frame))
+                frame = frame.f_back
+            frames.reverse()
+            self.stacks[';'.join(self.profiler.current_phases + tuple(frames))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join(timeout=5)
+
+
+class ScanProfiler:
+    """Profiling pro Phase; Ausgabe neben dem Report"""
+
+    def __init__(self, mode: str = 'sampling', interval: float = SAMPLE_INTERVAL):
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode {mode}, expected one of {PROFILE_MODES}")
+        self.mode = mode
+        self.interval = interval
+        self.current_phases: Tuple[str, ...] = ('scan',)
+        self.wall_times: Dict[str, float] = {}
+        self.profiles: Dict[str, cProfile.Profile] = {}
+        self.sampler: Optional[_Sampler] = None
+
+    def _start_sampler(self):
+        if self.mode == 'sampling':
+            self.sampler = _Sampler(self, threading.get_ident(), self.interval)
+            self.sampler.start()
+
+    def start(self) -> 'ScanProfiler':
+        self._start_sampler()
+        logger.info(f"⏱  Profiling enabled ({self.mode})")
+        return self
+
+    def stop(self):
+        if self.sampler is not None:
+            self.sampler.stop()
+
+    def reset(self) -> 'ScanProfiler':
+        """Beginnt ein neues Profil (Watch-Modus: ein Profil pro Scan statt kumuliert)"""
+        self.stop()
+        self.current_phases = ('scan',)
+        self.wall_times = {}
+        self.profiles = {}
+        self._start_sampler()
+        return self
+
+    @contextmanager
+    def phase(self, name: str):
+        """Markiert eine Phase; verschachtelte Phasen erscheinen im Stack als Pfad"""
+        parent = self.current_phases
+        self.current_phases = parent + (name,)
+        key = '/'.join(self.current_phases[1:])
+
+        outer = self.profiles.get('/'.join(parent[1:])) if self.mode == 'cprofile' else None
+        profile = self.profiles.setdefault(key, cProfile.Profile()) if self.mode == 'cprofile' else None
+        if outer is not None:
+            outer.disable()
+        if profile is not None:
+            profile.enable()
+
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.wall_times[key] = self.wall_times.get(key, 0.0) + time.monotonic() - start
+            if profile is not None:
+                profile.disable()
+            if outer is not None:
+                outer.enable()
+            self.current_phases = parent
+
+    def _top_functions(self, profile: cProfile.Profile) -> List[Dict[str, Any]]:
+        stats = pstats.Stats(profile)
+        rows = []
+        for (filename, line, function), (_, calls, own, cumulative, _) in stats.stats.items():
+            rows.append({'function': f"{os.path.basename(filename)}:{line}:{function}", 'calls': calls,
+                         'own_seconds': round(own, 6), 'cumulative_seconds': round(cumulative, 6)})
+        rows.sort(key=lambda row: row['cumulative_seconds'], reverse=True)
+        return rows[:SUMMARY_TOP]
+
+    def write(self, report_file: Path) -> List[Path]:
+        """Schreibt die Profile neben den Report (gleicher Dateiname, andere Endung)"""
+        self.stop()
+        base = report_file.with_suffix('')
+        written = []
+        summary: Dict[str, Any] = {'mode': self.mode, 'report': report_file.name, 'phases': {}}
+
+        for key, seconds in self.wall_times.items():
+            summary['phases'][key] = {'wall_seconds': round(seconds, 6)}
+
+        if self.mode == 'sampling':
+            collapsed = base.with_name(base.name + ".profile.collapsed")
+            with atomic_write(collapsed) as f:
+                for stack, count in sorted(self.sampler.stacks.items()):
+                    f.write(f"{stack} {count}\n")
+            written.append(collapsed)
+            summary['interval_seconds'] = self.interval
+            summary['cpu_samples'] = sum(self.sampler.stacks.values())
+            summary['idle_samples'] = self.sampler.idle_samples
+            for key in summary['phases']:
+                prefix = ';'.join(('scan',) + tuple(key.split('/')))
+                summary['phases'][key]['cpu_samples'] = sum(
+                    count for stack, count in self.sampler.stacks.items()
+                    if stack == prefix or stack.startswith(prefix + ';'))
+        else:
+            for key, profile in self.profiles.items():
+                stats_file = base.with_name(f"{base.name}.{key.replace('/', '.').replace(':', '-')}.pstats")
+                with atomic_path(stats_file) as tmp:
+                    profile.dump_stats(str(tmp))
+                written.append(stats_file)
+                summary['phases'][key]['top_functions'] = self._top_functions(profile)
+
+        summary_file = base.with_name(base.name + ".profile.json")
+        write_json_atomic(summary_file, summary, indent=2)
+        written.append(summary_file)
+
+        logger.info(f"⏱  Profile written: {', '.join(str(p.name) for p in written)}")
+        return written
@@ -0,0 +1,417 @@
+#!/usr/bin/env python3
+"""
+Report-Retention für Security Expert Agent S7
+Ältere Reports werden zu Tages- und Wochen-Rollups verdichtet, Tool-Ergebnisse
+und Artefakte per Content-Hash dedupliziert abgelegt und Alters- sowie
+Größenbudgets für das Reports-Volume durchgesetzt
+"""
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import logging
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from atomic_files import atomic_write, file_lock, write_json_atomic
+from findings import SEVERITIES
+from rule_packs import SETTINGS_FILE
+
+logger = logging.getLogger('security-scanner')
+
+# security-report-YYYYMMDD-HHMMSS[-<suffix>].json; Begleitdateien (<stem>.profile.json) passen nicht
+REPORT_PATTERN = re.compile(r'^security-report-(\d{8}-\d{6})(?:-[\w-]+)?\.json$')
+ROLLUP_DIR = "rollups"
+ARTIFACT_DIR = "artifacts"
+RUN_DIR = "runs"
+LOCK_FILE = ".retention.lock"
+# Arbeitsverzeichnisse abgebrochener Läufe bzw. von Workern
+STALE_RUN_HOURS = 24
+# Eigene Aufräumregeln (Dependency-Cache, Rule-Sets)
+EXCLUDED_DIRS = {"cache"}
+
+# Standardwerte für den reporting-Abschnitt in security-settings.json
+DEFAULT_RETENTION = {
+    'retention_days': 90,
+    'raw_report_days': 7,
+    'daily_rollup_days': 30,
+    'max_size_mb': 2048,
+}
+
+# Im Rollup nicht benötigt: Rohausgabe und Top-Findings lassen sich aus den Findings ableiten
+COMPACTED_KEYS = ('raw_output', 'results')
+
+
+def load_retention_settings(config_dir: Path) -> Dict[str, Any]:
+    """reporting-Abschnitt aus security-settings.json mit Standardwerten"""
+    settings = dict(DEFAULT_RETENTION)
+    settings_file = config_dir / SETTINGS_FILE
+    if not settings_file.exists():
+        return settings
+    try:
+        with open(settings_file, 'r') as f:
+            reporting = json.load(f).get('reporting', {})
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning(f"Ignoring unreadable {settings_file}: {str(e)}")
+        return settings
+    settings.update({key: reporting[key] for key in DEFAULT_RETENTION if key in reporting})
+    return settings
+
+
+def report_time(path: Path) -> Optional[datetime]:
+    """Zeitpunkt eines Reports aus dem Dateinamen; None für andere Dateien"""
+    match = REPORT_PATTERN.match(path.name)
+    if not match:
+        return None
+    try:
+        return datetime.strptime(match.group(1), '%Y%m%d-%H%M%S')
+    except ValueError:
+        return None
+
+
+def list_reports(reports_dir: Path) -> List[Tuple[datetime, Path]]:
+    """Reports im Verzeichnis, älteste zuerst"""
+    reports = []
+    with os.scandir(reports_dir) as entries:
+        for entry in entries:
+            timestamp = report_time(Path(entry.name))
+            if timestamp is not None and entry.is_file():
+                reports.append((timestamp, Path(entry.path)))
+    return sorted(reports)
+
+
+def directory_size(path: Path, excluded: Set[str] = frozenset()) -> int:
+    total = 0
+    for root, dirs, files in os.walk(path):
+        if root == str(path):
+            dirs[:] = [d for d in dirs if d not in excluded]
+        for filename in files:
+            try:
+                total += os.lstat(os.path.join(root, filename)).st_size
+            except OSError:
+                continue
+    return total
+
+
+class ArtifactStore:
+    """Content-adressierte Ablage (sha256) unter artifacts/<aa>/<digest>
+
+    Identische Tool-Ergebnisse und Artefakte verschiedener Läufe liegen nur
+    einmal auf dem Volume. Treffer aktualisieren die mtime, damit die
+    Garbage Collection gerade wiederverwendete Einträge nicht entfernt.
+    """
+
+    def __init__(self, root: Path):
+        self.root = root
+
+    def path(self, digest: str) -> Path:
+        return self.root / digest[:2] / digest
+
+    def _store(self, digest: str, write) -> str:
+        target = self.path(digest)
+        # Shared: parallele Scans schreiben gleichzeitig, nur die GC schließt sie aus
+        with file_lock(self.root / ".lock", shared=True):
+            if target.exists():
+                os.utime(target)
+                return digest
+            with atomic_write(target, binary=True) as f:
+                write(f)
+        return digest
+
+    def put_bytes(self, data: bytes) -> str:
+        return self._store(hashlib.sha256(data).hexdigest(), lambda f: f.write(data))
+
+    def put_json(self, value: Any) -> str:
+        """Kanonisches JSON (sortierte Keys), damit gleiche Inhalte denselben Hash haben"""
+        return self.put_bytes(json.dumps(value, sort_keys=True, separators=(',', ':')).encode('utf-8'))
+
+    def put_file(self, path: Path) -> str:
+        digest = hashlib.sha256()
+        with open(path, 'rb') as f:
+            for chunk in iter(lambda: f.read(1 << 20), b''):
+                digest.update(chunk)
+
+        def copy(target):
+            with open(path, 'rb') as source:
+                shutil.copyfileobj(source, target)
+        return self._store(digest.hexdigest(), copy)
+
+    def load_json(self, digest: str) -> Any:
+        with open(self.path(digest), 'r') as f:
+            return json.load(f)
+
+    def collect(self, referenced: Set[str], cutoff: float) -> Tuple[int, int]:
+        """Löscht nicht referenzierte Einträge, die seit cutoff nicht mehr genutzt wurden"""
+        removed = freed = 0
+        if not self.root.exists():
+            return removed, freed
+        with file_lock(self.root / ".lock"):
+            for shard in self.root.iterdir():
+                if not shard.is_dir():
+                    continue
+                for entry in shard.iterdir():
+                    if entry.name in referenced or entry.name.startswith('.'):
+                        continue
+                    stat = entry.stat()
+                    if stat.st_mtime < cutoff:
+                        entry.unlink()
+                        removed += 1
+                        freed += stat.st_size
+        return removed, freed
+
+
+def rollup_entry(report: Dict[str, Any], name: str, store: ArtifactStore) -> Dict[str, Any]:
+    """Kompakter Eintrag eines Reports; Tool-Ergebnisse liegen dedupliziert im Store"""
+    tool_results = {}
+    findings = {}
+    artifacts = []
+    for tool, result in report.get('tool_results', {}).items():
+        tool_results[tool] = store.put_json({k: v for k, v in result.items() if k not in COMPACTED_KEYS})
+        counts = dict.fromkeys(SEVERITIES, 0)
+        for finding in result.get('findings', []):
+            counts[finding['severity']] = counts.get(finding['severity'], 0) + 1
+        findings[tool] = counts
+        if result.get('report_sha256'):
+            artifacts.append(result['report_sha256'])
+
+    metadata = report.get('scan_metadata', {})
+    return {
+        'report': name,
+        'timestamp': metadata.get('timestamp'),
+        'security_summary': report.get('security_summary', {}),
+        'tools_status': {tool: result.get('status') for tool, result in report.get('tool_results', {}).items()},
+        'findings': findings,
+        'tool_results': tool_results,
+        'artifacts': sorted(set(artifacts)),
+    }
+
+
+def entry_references(entry: Dict[str, Any]) -> Set[str]:
+    return set(entry.get('tool_results', {}).values()) | set(entry.get('artifacts', []))
+
+
+class ReportRetention:
+    """Verdichtet und begrenzt das Reports-Verzeichnis
+
+    Reports jünger als raw_report_days bleiben unverändert, ältere gehen in
+    Tages-Rollups (alle Läufe), Tages-Rollups älter als daily_rollup_days in
+    Wochen-Rollups (letzter Lauf pro Tag). Nach retention_days wird gelöscht.
+    Der neueste Report bleibt immer erhalten (security-scanner report).
+    """
+
+    def __init__(self, reports_dir: Path, retention_days: int = 90, raw_report_days: int = 7,
+                 daily_rollup_days: int = 30, max_size_mb: float = 2048):
+        self.reports_dir = reports_dir
+        self.retention_days = retention_days
+        self.raw_report_days = raw_report_days
+        self.daily_rollup_days = daily_rollup_days
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self.rollup_dir = reports_dir / ROLLUP_DIR
+        self.store = ArtifactStore(reports_dir / ARTIFACT_DIR)
+
+    @classmethod
+    def from_settings(cls, reports_dir: Path, config_dir: Path) -> 'ReportRetention':
+        return cls(reports_dir, **load_retention_settings(config_dir))
+
+    def _rollup_path(self, granularity: str, period: str) -> Path:
+        return self.rollup_dir / granularity / f"security-rollup-{period}.json"
+
+    def _load_rollup(self, path: Path, granularity: str, period: str) -> Dict[str, Any]:
+        if path.exists():
+            try:
+                with open(path, 'r') as f:
+                    return json.load(f)
+            except json.JSONDecodeError as e:
+                logger.warning(f"Replacing unreadable rollup {path}: {str(e)}")
+        return {'granularity': granularity, 'period': period, 'reports': []}
+
+    def rollups(self, granularity: str) -> List[Tuple[datetime, Path]]:
+        """Rollups einer Granularität mit dem Ende ihres Zeitraums, älteste zuerst"""
+        directory = self.rollup_dir / granularity
+        if not directory.exists():
+            return []
+        rollups = []
+        for path in directory.glob("security-rollup-*.json"):
+            period = path.stem[len("security-rollup-"):]
+            try:
+                if granularity == 'daily':
+                    end = datetime.strptime(period, '%Y-%m-%d') + timedelta(days=1)
+                else:
+                    end = datetime.strptime(period + '-1', '%G-W%V-%u') + timedelta(days=7)
+            except ValueError:
+                continue
+            rollups.append((end, path))
+        return sorted(rollups)
+
+    def compact_report(self, timestamp: datetime, path: Path) -> int:
+        """Überführt einen Report in sein Tages-Rollup und löscht ihn samt Begleitdateien"""
+        period = timestamp.strftime('%Y-%m-%d')
+        rollup_path = self._rollup_path('daily', period)
+        rollup = self._load_rollup(rollup_path, 'daily', period)
+
+        try:
+            with open(path, 'r') as f:
+                report = json.load(f)
+        except json.JSONDecodeError as e:
+            logger.warning(f"Dropping unreadable report {path.name}: {str(e)}")
+            report = None
+
+        if report is not None and path.name not in {entry['report'] for entry in rollup['reports']}:
+            rollup['reports'].append(rollup_entry(report, path.name, self.store))
+            rollup['reports'].sort(key=lambda entry: entry['report'])
+            write_json_atomic(rollup_path, rollup, indent=1)
+
+        # Profile u.ä. teilen sich den Dateistamm mit dem Report
+        freed = 0
+        for companion in path.parent.glob(f"{path.stem}.*"):
+            freed += companion.stat().st_size
+            companion.unlink()
+        return freed
+
+    def roll_up_week(self, path: Path) -> int:
+        """Überführt ein Tages-Rollup in sein Wochen-Rollup (letzter Lauf des Tages)"""
+        with open(path, 'r') as f:
+            daily = json.load(f)
+        freed = path.stat().st_size
+
+        day = datetime.strptime(daily['period'], '%Y-%m-%d')
+        iso = day.isocalendar()
+        period = f"{iso[0]}-W{iso[1]:02d}"
+        weekly_path = self._rollup_path('weekly', period)
+        weekly = self._load_rollup(weekly_path, 'weekly', period)
+
+        if daily['reports']:
+            last = dict(daily['reports'][-1], day=daily['period'], runs=len(daily['reports']))
+            weekly['reports'] = [entry for entry in weekly['reports'] if entry.get('day') != daily['period']]
+            weekly['reports'].append(last)
+            weekly['reports'].sort(key=lambda entry: entry['day'])
+            write_json_atomic(weekly_path, weekly, indent=1)
+
+        path.unlink()
+        return freed
+
+    def referenced(self, extra_reports: List[Path] = ()) -> Set[str]:
+        """Store-Einträge, auf die Rollups oder übrig gebliebene alte Reports verweisen"""
+        digests = set()
+        for granularity in ('daily', 'weekly'):
+            for _, path in self.rollups(granularity):
+                with open(path, 'r') as f:
+                    for entry in json.load(f).get('reports', []):
+                        digests |= entry_references(entry)
+        for path in extra_reports:
+            try:
+                with open(path, 'r') as f:
+                    results = json.load(f).get('tool_results', {})
+            except (OSError, json.JSONDecodeError):
+                continue
+            digests |= {result['report_sha256'] for result in results.values() if result.get('report_sha256')}
+        return digests
+
+    def run(self, now: Optional[datetime] = None) -> Dict[str, int]:
+        """Verdichtet, löscht und prüft das Größenbudget; liefert eine Zusammenfassung
+
+        Läuft bereits eine Retention auf demselben Verzeichnis, wird nichts getan.
+        """
+        now = now or datetime.now()
+        with file_lock(self.reports_dir / LOCK_FILE, blocking=False) as acquired:
+            if not acquired:
+                logger.info("🗄  Retention already running in another scan, skipping")
+                return {'skipped': 1}
+            summary = self._run(now)
+        return summary
+
+    def remove_stale_runs(self, now: datetime) -> int:
+        """Löscht Arbeitsverzeichnisse, in die seit STALE_RUN_HOURS niemand geschrieben hat"""
+        runs_dir = self.reports_dir / RUN_DIR
+        if not runs_dir.exists():
+            return 0
+        cutoff = (now - timedelta(hours=STALE_RUN_HOURS)).timestamp()
+        freed = 0
+        for run_dir in runs_dir.iterdir():
+            if run_dir.is_dir() and run_dir.stat().st_mtime < cutoff:
+                freed += directory_size(run_dir)
+                shutil.rmtree(run_dir, ignore_errors=True)
+        return freed
+
+    def _run(self, now: datetime) -> Dict[str, int]:
+        raw_cutoff = now - timedelta(days=self.raw_report_days)
+        daily_cutoff = now - timedelta(days=self.daily_rollup_days)
+        retention_cutoff = now - timedelta(days=self.retention_days)
+        summary = dict.fromkeys(('compacted', 'rolled_up', 'expired', 'artifacts_removed', 'freed_bytes'), 0)
+
+        reports = list_reports(self.reports_dir)
+        latest = reports.pop() if reports else None
+
+        # 1. Alte Reports -> Tages-Rollups
+        for timestamp, path in reports:
+            if timestamp >= raw_cutoff:
+                break
+            summary['freed_bytes'] += self.compact_report(timestamp, path)
+            summary['compacted'] += 1
+
+        # 2. Alte Tages-Rollups -> Wochen-Rollups
+        for end, path in self.rollups('daily'):
+            if end > daily_cutoff:
+                break
+            summary['freed_bytes'] += self.roll_up_week(path)
+            summary['rolled_up'] += 1
+
+        # 3. Abgelaufene Rollups löschen
+        for granularity in ('daily', 'weekly'):
+            for end, path in self.rollups(granularity):
+                if end > retention_cutoff:
+                    break
+                summary['freed_bytes'] += path.stat().st_size
+                path.unlink()
+                summary['expired'] += 1
+
+        summary['freed_bytes'] += self.remove_stale_runs(now)
+        # Laufende Scans legen Artefakte ab, bevor ihr Report existiert; solange ihr
+        # Arbeitsverzeichnis als aktiv gilt, bleiben auch unreferenzierte Einträge
+        in_flight_cutoff = now - timedelta(hours=STALE_RUN_HOURS)
+        kept_old = [latest[1]] if latest and latest[0] < raw_cutoff else []
+        self._collect(summary, kept_old, min(raw_cutoff, in_flight_cutoff))
+
+        # 4. Größenbudget: erst Reports verdichten, dann älteste Rollups löschen
+        total = directory_size(self.reports_dir, EXCLUDED_DIRS)
+        if total > self.max_bytes:
+            remaining = [entry for entry in list_reports(self.reports_dir) if not latest or entry[1] != latest[1]]
+            for timestamp, path in remaining:
+                if total <= self.max_bytes:
+                    break
+                freed = self.compact_report(timestamp, path)
+                summary['compacted'] += 1
+                summary['freed_bytes'] += freed
+                total -= freed
+
+            while total > self.max_bytes:
+                oldest = sorted(self.rollups('daily') + self.rollups('weekly'))
+                if not oldest:
+                    break
+                _, path = oldest[0]
+                summary['freed_bytes'] += path.stat().st_size
+                path.unlink()
+                summary['expired'] += 1
+                # Verkürzte Grace-Period: das Budget hat Vorrang, Verweise aller Reports zählen
+                self._collect(summary, [path for _, path in list_reports(self.reports_dir)], in_flight_cutoff)
+                total = directory_size(self.reports_dir, EXCLUDED_DIRS)
+
+            if total > self.max_bytes:
+                logger.warning(f"Reports directory still exceeds its budget: {total} bytes > {self.max_bytes}")
+        summary['total_bytes'] = total
+
+        if summary['compacted'] or summary['rolled_up'] or summary['expired'] or summary['artifacts_removed']:
+            logger.info(f"🗄  Retention: {summary['compacted']} reports compacted, {summary['rolled_up']} daily "
+                        f"rollups merged, {summary['expired']} rollups expired, "
+                        f"{summary['artifacts_removed']} artifacts removed, "
+                        f"{summary['freed_bytes'] / 1024 / 1024:.1f} MB freed")
+        return summary
+
+    def _collect(self, summary: Dict[str, int], kept_old: List[Path], cutoff: datetime):
+        # Einträge jünger als cutoff gehören ggf. zu noch nicht verdichteten Reports
+        removed, freed = self.store.collect(self.referenced(kept_old), cutoff.timestamp())
+        summary['artifacts_removed'] += removed
+        summary['freed_bytes'] += freed
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""
+Semgrep Rule-Packs für Security Expert Agent S7
+Registry-Packs werden beim Image-Build heruntergeladen und per SHA-256 gepinnt.
+Ein Scan nutzt nur die Packs der erkannten Sprachen plus die eigenen Regeln,
+zusammengestellt als versionierter Eintrag im Cache (kein Netzwerk nötig)
+"""
+
+import os
+import json
+import time
+import shutil
+import hashlib
+import logging
+import urllib.request
+from datetime import datetime
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+
+from atomic_files import atomic_write, file_lock, new_run_id, write_json_atomic
+from dependency_cache import hash_file
+from metrics import CACHE_REQUESTS
+
+logger = logging.getLogger('security-scanner')
+
+CACHE_VERSION = 1
+LOCK_FILE = "semgrep-rule-packs.lock.json"
+REGISTRY_URL = "https://semgrep.dev/c/{pack}"
+SETTINGS_FILE = "security-settings.json"
+# Rule-Sets, die so lange nicht genutzt wurden, werden aus dem Cache entfernt
+RULE_SET_MAX_AGE_DAYS = 30
+
+# Sprache -> Registry-Packs, falls security-settings.json nichts vorgibt
+DEFAULT_RULE_PACKS = {
+    'csharp': ['p/csharp'],
+    'javascript': ['p/javascript', 'p/react'],
+    'typescript': ['p/typescript', 'p/react'],
+    'python': ['p/python'],
+    'dockerfile': ['p/dockerfile'],
+}
+
+
+def pack_filename(pack: str) -> str:
+    """'p/csharp' -> 'p-csharp.yml'"""
+    return pack.replace('/', '-') + '.yml'
+
+
+def load_semgrep_settings(config_dir: Path) -> Dict[str, Any]:
+    """Semgrep-Abschnitt aus security-settings.json (leer, wenn nicht vorhanden)"""
+    settings_file = config_dir / SETTINGS_FILE
+    if not settings_file.exists():
+        return {}
+    try:
+        with open(settings_file, 'r') as f:
+            settings = json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        logger.warning(f"Ignoring unreadable {settings_file}: {str(e)}")
+        return {}
+    return settings.get('security_tools', {}).get('sast', {}).get('semgrep', {})
+
+
+class RulePackStore:
+    """Gepinnte Rule-Packs im Image plus versionierte Auswahl im Cache"""
+
+    def __init__(self, rules_dir: Path, cache_dir: Path,
+                 rule_packs: Optional[Dict[str, List[str]]] = None):
+        self.rules_dir = rules_dir
+        self.cache_dir = cache_dir
+        self.rule_packs = rule_packs or DEFAULT_RULE_PACKS
+        self.lock: Dict[str, Dict[str, Any]] = {}
+        # Packs, die beim letzten resolve() ihren Pin verletzt haben
+        self.rejected: List[str] = []
+
+    def load(self) -> 'RulePackStore':
+        lock_file = self.rules_dir / LOCK_FILE
+        if lock_file.exists():
+            try:
+                with open(lock_file, 'r') as f:
+                    data = json.load(f)
+                if data.get('version') == CACHE_VERSION:
+                    self.lock = data.get('packs', {})
+            except (json.JSONDecodeError, OSError) as e:
+                logger.warning(f"Ignoring unreadable rule pack lock: {str(e)}")
+        return self
+
+    def all_packs(self) -> List[str]:
+        return sorted({pack for packs in self.rule_packs.values() for pack in packs})
+
+    def fetch(self, packs: Optional[List[str]] = None, timeout: float = 60.0) -> Dict[str, Dict[str, Any]]:
+        """Lädt Packs aus der Registry und pinnt sie im Lockfile (nur beim Image-Build)"""
+        self.rules_dir.mkdir(parents=True, exist_ok=True)
+
+        for pack in packs or self.all_packs():
+            target = self.rules_dir / pack_filename(pack)
+            logger.info(f"📥 Fetching Semgrep rule pack {pack}")
+            with urllib.request.urlopen(REGISTRY_URL.format(pack=pack), timeout=timeout) as response:
+                content = response.read()
+            with atomic_write(target, binary=True) as f:
+                f.write(content)
+            self.lock[pack] = {
+                'file': target.name,
+                'sha256': hashlib.sha256(content).hexdigest(),
+                'fetched': datetime.now().isoformat()
+            }
+
+        write_json_atomic(self.rules_dir / LOCK_FILE, {'version': CACHE_VERSION, 'packs': self.lock},
+                          indent=2, sort_keys=True)
+        return self.lock
+
+    def select(self, languages: Iterable[str]) -> List[str]:
+        """Packs der erkannten Sprachen, die lokal gepinnt vorliegen"""
+        selected = sorted({pack for language in languages for pack in self.rule_packs.get(language, [])})
+        missing = [pack for pack in selected if pack not in self.lock]
+        if missing:
+            logger.warning(f"Semgrep rule packs not pinned locally, skipping: {', '.join(missing)}")
+        return [pack for pack in selected if pack in self.lock]
+
+    def resolve(self, languages: Iterable[str], custom_rules: Optional[Path] = None) -> Optional[Path]:
+        """Liefert ein Rule-Verzeichnis für --config oder None, wenn keine Regeln vorliegen
+
+        Der Eintrag ist über die Pack-Hashes und die eigenen Regeln versioniert
+        und wird nur beim ersten Lauf mit dieser Kombination angelegt. Packs mit
+        verletztem Pin landen in self.rejected und nicht im Eintrag.
+        """
+        self.rejected = []
+        packs = {}
+        sources = {}
+        for pack in self.select(languages):
+            packs[pack_filename(pack)] = pack
+            sources[pack_filename(pack)] = (self.rules_dir / self.lock[pack]['file'], self.lock[pack]['sha256'])
+
+        if custom_rules is not None:
+            if custom_rules.is_file():
+                sources[f"custom-{custom_rules.name}"] = (custom_rules, hash_file(custom_rules))
+            else:
+                logger.warning(f"Custom Semgrep rules not found: {custom_rules}")
+
+        if not sources:
+            return None
+
+        entry = self._entry(sources)
+
+        # Shared: Scans nutzen und erzeugen Einträge parallel, prune() schließt sie aus
+        with file_lock(self.cache_dir / ".cache.lock", shared=True):
+            if entry.is_dir():
+                CACHE_REQUESTS.inc(cache='semgrep_rules', result='hit')
+                os.utime(entry)
+                logger.info(f"📚 Using cached Semgrep rule set {entry.name}")
+                return entry
+
+            CACHE_REQUESTS.inc(cache='semgrep_rules', result='miss')
+            staging = entry.with_name(entry.name + f".tmp-{new_run_id()}")
+            staging.mkdir(parents=True)
+            try:
+                for name, (path, sha256) in list(sources.items()):
+                    if not name.startswith('custom-') and hash_file(path) != sha256:
+                        # Pin verletzt: Pack wurde nach dem Build verändert
+                        logger.error(f"Semgrep rule pack {path.name} does not match its pinned hash, skipping")
+                        self.rejected.append(packs[name])
+                        del sources[name]
+                        continue
+                    shutil.copyfile(path, staging / name)
+
+                if not sources:
+                    return None
+                if self.rejected:
+                    # Nur unter dem Schlüssel der übernommenen Dateien ablegen, sonst
+                    # bliebe der unvollständige Eintrag nach Reparatur des Packs aktiv
+                    entry = self._entry(sources)
+                if not entry.is_dir():
+                    staging.rename(entry)
+            except OSError:
+                # Paralleler Lauf hat denselben Eintrag schon angelegt
+                if not entry.is_dir():
+                    raise
+            finally:
+                shutil.rmtree(staging, ignore_errors=True)
+
+        self.prune()
+        logger.info(f"📚 Compiled Semgrep rule set {entry.name} from {len(sources)} rule files")
+        return entry
+
+    def _entry(self, sources: Dict[str, Any]) -> Path:
+        """Cache-Eintrag für die Kombination aus Dateinamen und Hashes"""
+        digest = hashlib.sha256(str(CACHE_VERSION).encode('utf-8'))
+        for name, (_, sha256) in sorted(sources.items()):
+            digest.update(f"{name}:{sha256}".encode('utf-8'))
+        return self.cache_dir / f"v{CACHE_VERSION}-{digest.hexdigest()[:16]}"
+
+    def prune(self, max_age_days: int = RULE_SET_MAX_AGE_DAYS):
+        """Entfernt lange nicht genutzte Rule-Sets (Shards nutzen verschiedene Sets parallel)"""
+        cutoff = time.time() - max_age_days * 86400
+        with file_lock(self.cache_dir / ".cache.lock", blocking=False) as acquired:
+            if not acquired:
+                # Andere Scans nutzen den Cache gerade, beim nächsten Mal
+                return
+            for entry in self.cache_dir.glob("v*-*"):
+                if '.tmp-' not in entry.name and entry.is_dir() and entry.stat().st_mtime < cutoff:
+                    shutil.rmtree(entry, ignore_errors=True)
@@ -7,13 +7,36 @@ Koordiniert verschiedene Security-Tools und generiert einheitliche Reports
 import os
 import sys
 import json
+import argparse
+import shutil
+import signal
 import subprocess
 import time
+from contextlib import nullcontext
 from datetime import datetime
-from typing import Dict, List, Any
+from typing import Dict, List, Any, Optional, Callable, Tuple
 import logging
 from pathlib import Path
 
+from atomic_files import atomic_write, new_run_id, write_json_atomic
+from compliance import ComplianceEngine
+from dependency_cache import DependencyCheckCache, discover_manifests, attribute_dependencies
+from distributed import ScanCoordinator, parse_address, run_worker, start_local_workers
+from findings import (
+    DEFAULT_REPORT_LIMIT, SEVERITIES, count_findings, select_top, normalize_semgrep, normalize_trivy,
+    normalize_dependency_check, normalize_gitleaks, normalize_eslint
+)
+from metrics import (
+    REGISTRY, CACHE_REQUESTS, FINDINGS, SCAN_DURATION, SCANS, TOOL_DURATION, TOOL_RUNS, timed
+)
+from process_runner import run_command
+from profiling import PROFILE_MODES, ScanProfiler
+from retention import ArtifactStore, ReportRetention
+from rule_packs import RulePackStore, load_semgrep_settings
+from suppressions import SuppressionEngine
+from target_index import LANGUAGES, TargetIndex
+from watcher import DEBOUNCE, FULL_INTERVAL, MAX_DELAY, POLL_INTERVAL, ScanWatcher, merge_incremental
+
 # Logging Setup
 logging.basicConfig(
     level=logging.INFO,
@@ -23,57 +46,185 @@ logger = logging.getLogger('security-scanner')
 
 class SecurityScanner:
     def __init__(self):
-        self.scan_results = {}
+        self._scan_results = {}
+        self._target_index: Optional[TargetIndex] = None
+        self._work_dir: Optional[Path] = None
+        self.run_id = new_run_id()
+        self.profiler: Optional[ScanProfiler] = None
+        self.report_file: Optional[Path] = None
+        self.results_source: Optional[Path] = None
+        self.source_metadata: Dict[str, Any] = {}
         self.reports_dir = Path("/security/reports")
         self.reports_dir.mkdir(parents=True, exist_ok=True)
         self.source_dir = Path("/app/src")
+        self.config_dir = Path("/security/config")
+        # Beim Image-Build gepinnte Semgrep Rule-Packs
+        self.rules_dir = Path(os.environ.get('SEMGREP_RULES_DIR', '/security/rules'))
         
-        # Tool-Konfiguration
+        # Tool-Konfiguration; requires wird gegen den Target-Index geprüft
         self.tools = {
-            'semgrep': {'enabled': True, 'severity_threshold': 'WARNING'},
-            'trivy': {'enabled': True, 'severity_threshold': 'HIGH'},
-            'dependency_check': {'enabled': True, 'severity_threshold': 'MEDIUM'},
-            'gitleaks': {'enabled': True},
-            'eslint_security': {'enabled': True},
+            'semgrep': {'enabled': True, 'severity_threshold': 'WARNING', 'report_limit': 10,
+                        'requires': {'languages': LANGUAGES}},
+            'trivy': {'enabled': True, 'severity_threshold': 'HIGH', 'report_limit': 5,
+                      'requires': {'lockfiles': ['nuget', 'npm', 'pip']}},
+            'dependency_check': {'enabled': True, 'severity_threshold': 'MEDIUM', 'report_limit': 10,
+                                 'requires': {'manifests': ['nuget', 'npm']}},
+            'gitleaks': {'enabled': True, 'report_limit': 10},
+            'eslint_security': {'enabled': True, 'report_limit': 5,
+                                'requires': {'paths': ['frontend'], 'languages': ['javascript', 'typescript']}},
             'safety': {'enabled': True}
         }
         
-    def run_semgrep_scan(self) -> Dict[str, Any]:
-        """Führt Semgrep SAST-Scan durch"""
+    @classmethod
+    def from_results(cls, path: Path) -> 'SecurityScanner':
+        """Erzeugt einen Scanner aus einem gespeicherten Report ohne Tools auszuführen
+        
+        path kann ein Report oder ein Reports-Verzeichnis sein (neuester Report).
+        Die Ergebnisse werden erst beim ersten Zugriff geladen.
+        """
+        path = Path(path)
+        if path.is_dir():
+            # Nur Reports, keine Begleitdateien wie *.profile.json
+            reports = sorted(p for p in path.glob("security-report-*.json") if p.suffixes == ['.json'])
+            if not reports:
+                raise FileNotFoundError(f"No security reports found in {path}")
+            path = reports[-1]
+        elif not path.exists():
+            raise FileNotFoundError(f"Security report not found: {path}")
+        
+        scanner = cls()
+        scanner.reports_dir = path.parent
+        scanner.results_source = path
+        scanner._scan_results = None
+        return scanner
+
+    @property
+    def scan_results(self) -> Dict[str, Any]:
+        """Tool-Ergebnisse; bei from_results() lazy aus dem Report geladen"""
+        if self._scan_results is None:
+            logger.info(f"📂 Loading stored results from {self.results_source}")
+            with open(self.results_source, 'r') as f:
+                stored = json.load(f)
+            self.source_metadata = stored.get('scan_metadata', {})
+            if self.source_metadata.get('source_directory'):
+                self.source_dir = Path(self.source_metadata['source_directory'])
+            self._scan_results = stored.get('tool_results', {})
+        return self._scan_results
+
+    @scan_results.setter
+    def scan_results(self, value: Dict[str, Any]):
+        self._scan_results = value
+
+    @property
+    def cache_dir(self) -> Path:
+        """Cache liegt im persistenten Reports-Volume"""
+        return self.reports_dir / "cache"
+
+    @property
+    def work_dir(self) -> Path:
+        """Arbeitsverzeichnis dieses Laufs für Tool-Ausgaben (runs/<run_id>)
+
+        Parallele Scans auf demselben Reports-Volume überschreiben so nicht
+        gegenseitig gitleaks-report.json oder die Dependency-Check-Ausgabe.
+        """
+        if self._work_dir is None:
+            self._work_dir = self.reports_dir / "runs" / self.run_id
+            self._work_dir.mkdir(parents=True)
+        return self._work_dir
+
+    def begin_run(self) -> None:
+        """Neue Run-ID, frischer Target-Index und neues Profil für jeden Scan (Watch-Modus: mehrere pro Prozess)"""
+        self.run_id = new_run_id()
+        self._work_dir = None
+        self._target_index = None
+        if self.profiler is not None:
+            self.profiler.reset()
+
+    def cleanup_work_dir(self) -> None:
+        if self._work_dir is not None:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+            self._work_dir = None
+
+    @property
+    def target_index(self) -> TargetIndex:
+        """Index über source_dir, einmal pro Scan aufgebaut"""
+        if self._target_index is None:
+            self._target_index = TargetIndex.build(self.source_dir)
+        return self._target_index
+
+    def enable_profiling(self, mode: str = 'sampling') -> None:
+        """Profiling der Python-Seite pro Phase (--profile)"""
+        self.profiler = ScanProfiler(mode).start()
+
+    def phase(self, name: str):
+        """Markiert eine Scan-Phase für den Profiler (ohne Profiling wirkungslos)"""
+        return self.profiler.phase(name) if self.profiler is not None else nullcontext()
+
+    def write_profile(self) -> None:
+        if self.profiler is None or self.report_file is None:
+            return
+        try:
+            self.profiler.write(self.report_file)
+        except OSError as e:
+            logger.warning(f"Could not write profile: {str(e)}")
+
+    def skip_reason(self, tool: str) -> Optional[str]:
+        """Grund, ein Tool ohne passende Eingaben gar nicht erst zu starten"""
+        requires = self.tools[tool].get('requires')
+        return self.target_index.missing(requires) if requires else None
+        
+    def run_semgrep_scan(self, targets: Optional[List[Path]] = None) -> Dict[str, Any]:
+        """Führt Semgrep SAST-Scan durch (optional nur für einzelne Pfade)"""
         logger.info("🔍 Starting Semgrep SAST scan...")
         
         try:
+            targets = targets or [self.source_dir]
+            rule_set, rejected = self.resolve_semgrep_rules(targets)
+            if rule_set is None:
+                logger.error("No local Semgrep rules available, run 'security-scanner rules' at build time")
+                error = f"No pinned rule packs in {self.rules_dir} and no custom rules"
+                if rejected:
+                    error = f"Rule packs do not match their pinned hash: {', '.join(rejected)}"
+                return {
+                    'tool': 'semgrep',
+                    'status': 'error',
+                    'error': error,
+                    'rejected_rule_packs': rejected
+                }
+            
             cmd = [
                 'semgrep',
-                '--config=auto',
+                f'--config={rule_set}',
+                # Air-gapped Runner: keine Registry- oder Metrics-Zugriffe
+                '--metrics=off',
                 '--json',
-                '--quiet',
-                str(self.source_dir)
+                '--quiet'
             ]
+            cmd.extend(str(target) for target in targets)
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            # Ausgabe direkt aus der (ggf. ausgelagerten) Datei parsen, danach sofort löschen
+            with run_command(cmd, timeout=300) as result:
+                returncode, stderr = result.returncode, result.stderr
+                scan_data = result.load_json({"results": []}) if returncode == 0 else None
             
-            if result.returncode == 0:
-                scan_data = json.loads(result.stdout) if result.stdout else {"results": []}
-                
-                # Filtere nach Severity
-                critical_issues = [r for r in scan_data.get('results', []) 
-                                 if r.get('extra', {}).get('severity') in ['ERROR', 'WARNING']]
+            if returncode == 0:
+                findings = normalize_semgrep(scan_data, self.source_dir)
                 
                 return {
                     'tool': 'semgrep',
                     'status': 'success',
-                    'total_issues': len(scan_data.get('results', [])),
-                    'critical_issues': len(critical_issues),
-                    'results': critical_issues[:10],  # Top 10 für Report
-                    'raw_output': result.stdout
+                    # Nicht angewendete Packs: Abdeckung fehlt, bis der Pin wieder stimmt
+                    'rejected_rule_packs': rejected,
+                    **count_findings('semgrep', findings),
+                    'results': self.select_report_findings('semgrep', findings),
+                    'findings': findings
                 }
             else:
-                logger.error(f"Semgrep scan failed: {result.stderr}")
+                logger.error(f"Semgrep scan failed: {stderr}")
                 return {
                     'tool': 'semgrep',
                     'status': 'error',
-                    'error': result.stderr
+                    'error': stderr
                 }
                 
         except subprocess.TimeoutExpired:
@@ -83,6 +234,22 @@ class SecurityScanner:
             logger.error(f"Semgrep scan exception: {str(e)}")
             return {'tool': 'semgrep', 'status': 'error', 'error': str(e)}
 
+    def resolve_semgrep_rules(self, targets: List[Path]) -> Tuple[Optional[Path], List[str]]:
+        """Rule-Set aus den Packs der erkannten Sprachen und den eigenen Regeln
+
+        Liefert zusätzlich die Packs, die wegen verletztem Pin ausgelassen wurden.
+        """
+        settings = load_semgrep_settings(self.config_dir)
+        store = RulePackStore(self.rules_dir, self.cache_dir / "semgrep-rules",
+                              settings.get('rule_packs')).load()
+        
+        languages = self.target_index.languages_under(targets)
+        logger.info(f"🔍 Languages detected for Semgrep: {', '.join(sorted(languages)) or 'none'}")
+        
+        custom_rules = settings.get('custom_rules')
+        rule_set = store.resolve(languages, Path(custom_rules) if custom_rules else None)
+        return rule_set, store.rejected
+
     def run_trivy_scan(self) -> Dict[str, Any]:
         """Führt Trivy Vulnerability-Scan durch"""
         logger.info("🐳 Starting Trivy vulnerability scan...")
@@ -94,37 +261,32 @@ class SecurityScanner:
                 'fs',
                 '--format', 'json',
                 '--severity', 'HIGH,CRITICAL',
+                # Secrets deckt GitLeaks ab; Trivy liefert nur Vulnerabilities
+                '--scanners', 'vuln',
                 str(self.source_dir)
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=300)
+            with run_command(cmd, timeout=300) as result:
+                returncode, stderr = result.returncode, result.stderr
+                scan_data = result.load_json({"Results": []}) if returncode == 0 else None
             
-            if result.returncode == 0:
-                scan_data = json.loads(result.stdout) if result.stdout else {"Results": []}
-                
+            if returncode == 0:
                 # Extrahiere Vulnerabilities
-                total_vulns = 0
-                critical_vulns = 0
-                
-                for res in scan_data.get('Results', []):
-                    vulns = res.get('Vulnerabilities', [])
-                    total_vulns += len(vulns)
-                    critical_vulns += len([v for v in vulns if v.get('Severity') == 'CRITICAL'])
+                findings = normalize_trivy(scan_data, self.source_dir)
                 
                 return {
                     'tool': 'trivy',
                     'status': 'success',
-                    'total_vulnerabilities': total_vulns,
-                    'critical_vulnerabilities': critical_vulns,
-                    'results': scan_data.get('Results', [])[:5],  # Top 5 für Report
-                    'raw_output': result.stdout
+                    **count_findings('trivy', findings),
+                    'results': self.select_report_findings('trivy', findings),
+                    'findings': findings
                 }
             else:
-                logger.error(f"Trivy scan failed: {result.stderr}")
+                logger.error(f"Trivy scan failed: {stderr}")
                 return {
                     'tool': 'trivy',
                     'status': 'error',
-                    'error': result.stderr
+                    'error': stderr
                 }
                 
         except subprocess.TimeoutExpired:
@@ -135,57 +297,80 @@ class SecurityScanner:
             return {'tool': 'trivy', 'status': 'error', 'error': str(e)}
 
     def run_dependency_check(self) -> Dict[str, Any]:
-        """Führt OWASP Dependency Check durch"""
+        """Führt OWASP Dependency Check durch (inkrementell pro Manifest)"""
         logger.info("📦 Starting OWASP Dependency Check...")
         
         try:
-            output_dir = self.reports_dir / "dependency-check"
+            output_dir = self.work_dir / "dependency-check"
             output_dir.mkdir(exist_ok=True)
             
-            cmd = [
-                'dependency-check',
-                '--project', 'booking-system',
-                '--scan', str(self.source_dir),
-                '--out', str(output_dir),
-                '--format', 'JSON',
-                '--enableExperimental'
-            ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=600)
+            # Nur Manifeste mit geändertem Hash neu analysieren
+            manifests = discover_manifests(self.source_dir, self.target_index.manifest_paths())
+            cache = DependencyCheckCache(self.cache_dir / "dependency-check-cache.json",
+                                         self.source_dir).load()
+            changed = cache.partition(manifests)
+            CACHE_REQUESTS.inc(cache.hits, cache='dependency_check', result='hit')
+            CACHE_REQUESTS.inc(cache.misses, cache='dependency_check', result='miss')
             
-            # Dependency Check kann auch bei Findings mit 0 returnen
-            report_file = output_dir / "dependency-check-report.json"
+            logger.info(f"📦 {len(manifests)} manifests found, {len(changed)} changed or expired since last run")
             
-            if report_file.exists():
+            if changed:
+                cmd = [
+                    'dependency-check',
+                    '--project', 'booking-system',
+                    '--out', str(output_dir),
+                    '--format', 'JSON',
+                    '--enableExperimental'
+                ]
+                for manifest in changed:
+                    cmd.extend(['--scan', str(self.source_dir / manifest)])
+                
+                # Ergebnis steht in --out, stdout wird nicht gebraucht
+                run_command(cmd, timeout=600).close()
+                
+                # Dependency Check kann auch bei Findings mit 0 returnen
+                report_file = output_dir / "dependency-check-report.json"
+                
+                if not report_file.exists():
+                    logger.error("Dependency check report not generated")
+                    return {
+                        'tool': 'dependency_check',
+                        'status': 'error',
+                        'error': 'Report file not found'
+                    }
+                
                 with open(report_file, 'r') as f:
                     scan_data = json.load(f)
                 
-                # Extrahiere Vulnerability-Statistiken
-                dependencies = scan_data.get('dependencies', [])
-                total_vulns = 0
-                critical_vulns = 0
-                
-                for dep in dependencies:
-                    vulns = dep.get('vulnerabilities', [])
-                    total_vulns += len(vulns)
-                    critical_vulns += len([v for v in vulns 
-                                         if v.get('severity') in ['CRITICAL', 'HIGH']])
+                # Evidence wird für die Auswertung nicht benötigt und bläht den Cache auf
+                fresh = [{k: v for k, v in dep.items() if k != 'evidenceCollected'}
+                         for dep in scan_data.get('dependencies', [])]
                 
-                return {
-                    'tool': 'dependency_check',
-                    'status': 'success',
-                    'total_dependencies': len(dependencies),
-                    'total_vulnerabilities': total_vulns,
-                    'critical_vulnerabilities': critical_vulns,
-                    'report_file': str(report_file)
-                }
-            else:
-                logger.error("Dependency check report not generated")
-                return {
-                    'tool': 'dependency_check',
-                    'status': 'error',
-                    'error': 'Report file not found'
-                }
+                attributed = attribute_dependencies(fresh, changed, self.source_dir)
+                for manifest in changed:
+                    cache.store(manifest, manifests[manifest], attributed[manifest])
+            
+            cache.save()
+            
+            # Gecachte und frische Ergebnisse zusammenführen; Suppressions
+            # wendet apply_suppressions() anschließend auf alle Tools an
+            dependencies = cache.dependencies()
+            findings = normalize_dependency_check(dependencies, self.source_dir)
+            
+            merged_report = output_dir / "dependency-check-merged-report.json"
+            write_json_atomic(merged_report, {'manifests': sorted(manifests), 'dependencies': dependencies})
+            
+            return {
+                'tool': 'dependency_check',
+                'status': 'success',
+                'total_dependencies': len(dependencies),
+                **count_findings('dependency_check', findings),
+                'manifests_scanned': len(changed),
+                'manifests_cached': len(manifests) - len(changed),
+                'report_file': str(merged_report),
+                'results': self.select_report_findings('dependency_check', findings),
+                'findings': findings
+            }
                 
         except subprocess.TimeoutExpired:
             logger.error("Dependency check timed out")
@@ -199,35 +384,38 @@ class SecurityScanner:
         logger.info("🔑 Starting GitLeaks secret detection...")
         
         try:
+            report_file = self.work_dir / "gitleaks-report.json"
             cmd = [
                 'gitleaks',
                 'detect',
                 '--source', str(self.source_dir),
                 '--report-format', 'json',
-                '--report-path', str(self.reports_dir / "gitleaks-report.json"),
+                '--report-path', str(report_file),
                 '--verbose'
             ]
             
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            with run_command(cmd, timeout=120) as result:
+                returncode = result.returncode
             
             # GitLeaks returniert 1 wenn Secrets gefunden werden
-            report_file = self.reports_dir / "gitleaks-report.json"
-            secrets_found = 0
+            findings = []
             
             if report_file.exists():
                 try:
                     with open(report_file, 'r') as f:
                         scan_data = json.load(f)
-                        secrets_found = len(scan_data) if isinstance(scan_data, list) else 0
+                        findings = normalize_gitleaks(scan_data, self.source_dir)
                 except json.JSONDecodeError:
-                    secrets_found = 0
+                    findings = []
             
             return {
                 'tool': 'gitleaks',
                 'status': 'success',
-                'secrets_found': secrets_found,
-                'return_code': result.returncode,
-                'report_file': str(report_file) if report_file.exists() else None
+                **count_findings('gitleaks', findings),
+                'return_code': returncode,
+                'report_file': str(report_file) if report_file.exists() else None,
+                'results': self.select_report_findings('gitleaks', findings),
+                'findings': findings
             }
             
         except subprocess.TimeoutExpired:
@@ -237,8 +425,8 @@ class SecurityScanner:
             logger.error(f"GitLeaks scan exception: {str(e)}")
             return {'tool': 'gitleaks', 'status': 'error', 'error': str(e)}
 
-    def run_eslint_security_scan(self) -> Dict[str, Any]:
-        """Führt ESLint Security Plugin Scan durch"""
+    def run_eslint_security_scan(self, targets: Optional[List[Path]] = None) -> Dict[str, Any]:
+        """Führt ESLint Security Plugin Scan durch (optional nur für einzelne Pfade)"""
         logger.info("🔍 Starting ESLint security scan...")
         
         frontend_dir = self.source_dir / "frontend"
@@ -276,50 +464,49 @@ class SecurityScanner:
                 }
             }
             
-            config_file = frontend_dir / ".eslintrc.security.json"
-            with open(config_file, 'w') as f:
-                json.dump(eslint_config, f, indent=2)
+            # Nicht im Quellbaum: parallele Scans und der Watch-Modus würden sich sonst stören
+            config_file = self.work_dir / "eslintrc.security.json"
+            write_json_atomic(config_file, eslint_config, indent=2)
             
             cmd = [
                 'npx', 'eslint',
                 '--config', str(config_file),
-                '--format', 'json',
-                str(frontend_dir / "**/*.{js,jsx,ts,tsx}")
+                '--resolve-plugins-relative-to', str(frontend_dir),
+                '--format', 'json'
             ]
-            
-            result = subprocess.run(cmd, capture_output=True, text=True, 
-                                  timeout=180, cwd=str(frontend_dir))
+            for target in targets or [frontend_dir]:
+                cmd.append(str(target / "**/*.{js,jsx,ts,tsx}") if target.is_dir() else str(target))
             
             # ESLint returniert 1 bei Lint-Fehlern
-            if result.stdout:
+            with run_command(cmd, timeout=180, cwd=str(frontend_dir)) as result:
                 try:
-                    scan_data = json.loads(result.stdout)
-                    total_issues = sum(len(file.get('messages', [])) for file in scan_data)
-                    security_issues = sum(1 for file in scan_data 
-                                        for msg in file.get('messages', []) 
-                                        if 'security/' in msg.get('ruleId', ''))
-                    
-                    return {
-                        'tool': 'eslint_security',
-                        'status': 'success',
-                        'total_issues': total_issues,
-                        'security_issues': security_issues,
-                        'files_scanned': len(scan_data),
-                        'results': scan_data[:5]  # Top 5 für Report
-                    }
+                    scan_data = result.load_json()
                 except json.JSONDecodeError:
                     return {
                         'tool': 'eslint_security',
                         'status': 'error',
                         'error': 'Failed to parse ESLint output'
                     }
+            
+            if scan_data is not None:
+                findings = normalize_eslint(scan_data, self.source_dir)
+                
+                return {
+                    'tool': 'eslint_security',
+                    'status': 'success',
+                    **count_findings('eslint_security', findings),
+                    'files_scanned': len(scan_data),
+                    'results': self.select_report_findings('eslint_security', findings),
+                    'findings': findings
+                }
             else:
                 return {
                     'tool': 'eslint_security',
                     'status': 'success',
                     'total_issues': 0,
                     'security_issues': 0,
-                    'files_scanned': 0
+                    'files_scanned': 0,
+                    'findings': []
                 }
                 
         except subprocess.TimeoutExpired:
@@ -329,6 +516,46 @@ class SecurityScanner:
             logger.error(f"ESLint security scan exception: {str(e)}")
             return {'tool': 'eslint_security', 'status': 'error', 'error': str(e)}
 
+    def tool_runners(self) -> Dict[str, Callable[..., Dict[str, Any]]]:
+        """Scan-Methoden pro Tool in Ausführungsreihenfolge"""
+        return {
+            'semgrep': self.run_semgrep_scan,
+            'trivy': self.run_trivy_scan,
+            'dependency_check': self.run_dependency_check,
+            'gitleaks': self.run_gitleaks_scan,
+            'eslint_security': self.run_eslint_security_scan
+        }
+
+    def run_tool(self, tool: str, targets: Optional[List[Path]] = None) -> Dict[str, Any]:
+        """Führt ein Tool aus und erfasst Dauer und Ergebnis-Status als Metrik"""
+        runner = self.tool_runners()[tool]
+        with self.phase(f"tool:{tool}"), timed(TOOL_DURATION, tool=tool):
+            result = runner(targets) if targets else runner()
+        TOOL_RUNS.inc(tool=tool, status=result.get('status', 'unknown'))
+        return result
+
+    def run_shard(self, shard: Dict[str, Any]) -> Dict[str, Any]:
+        """Führt einen Shard (ein Tool, optional auf Teilpfaden) für den verteilten Scan aus"""
+        targets = [self.source_dir / target for target in shard.get('targets') or []]
+        return self.run_tool(shard['tool'], targets or None)
+
+    def select_report_findings(self, tool: str, findings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Schwerste Findings eines Tools für den Report (Severity, CVSS, Ausnutzbarkeit)"""
+        limit = self.tools.get(tool, {}).get('report_limit', DEFAULT_REPORT_LIMIT)
+        return select_top(findings, limit)
+
+    def apply_suppressions(self) -> None:
+        """Wendet Suppressions und Allowlist auf die Findings aller Tools an"""
+        engine = SuppressionEngine.load(self.config_dir)
+        
+        for tool, results in self.scan_results.items():
+            if results.get('status') == 'success' and 'findings' in results:
+                engine.apply(tool, results)
+                # Top-Findings ohne unterdrückte Einträge neu bestimmen
+                results['results'] = self.select_report_findings(tool, results['findings'])
+                if results['suppressed_count']:
+                    logger.info(f"🔕 {tool}: {results['suppressed_count']} findings suppressed")
+
     def generate_security_report(self) -> Dict[str, Any]:
         """Generiert einen zusammenfassenden Security-Report"""
         logger.info("📊 Generating comprehensive security report...")
@@ -375,7 +602,8 @@ class SecurityScanner:
                 'agent_id': 'S7',
                 'agent_role': 'security-expert',
                 'scan_duration': '300s',  # Würde tatsächlich gemessen
-                'source_directory': str(self.source_dir)
+                'source_directory': str(self.source_dir),
+                'run_id': self.run_id
             },
             'security_summary': {
                 'security_score': security_score,
@@ -387,17 +615,19 @@ class SecurityScanner:
             },
             'tool_results': self.scan_results,
             'recommendations': self.generate_recommendations(),
-            'compliance_status': {
-                'owasp_top_10': self.check_owasp_compliance(),
-                'sans_top_25': self.check_sans_compliance(),
-                'gdpr_privacy': self.check_privacy_compliance()
-            }
+            'compliance_status': self.evaluate_compliance()
         }
         
-        # Report in Datei speichern
-        report_file = self.reports_dir / f"security-report-{datetime.now().strftime('%Y%m%d-%H%M%S')}.json"
-        with open(report_file, 'w') as f:
+        if self.results_source is not None:
+            # Neu gerendert aus gespeicherten Ergebnissen
+            report['scan_metadata']['rendered_from'] = str(self.results_source)
+            report['scan_metadata']['original_timestamp'] = self.source_metadata.get('timestamp')
+        
+        # Report in Datei speichern; run_id trennt Läufe innerhalb derselben Sekunde
+        report_file = self.reports_dir / f"security-report-{datetime.now().strftime('%Y%m%d-%H%M%S')}-{self.run_id}.json"
+        with self.phase('write'), atomic_write(report_file) as f:
             json.dump(report, f, indent=2)
+        self.report_file = report_file
         
         logger.info(f"📄 Security report saved: {report_file}")
         
@@ -439,117 +669,335 @@ class SecurityScanner:
         
         return recommendations
 
+    def evaluate_compliance(self) -> Dict[str, Dict[str, str]]:
+        """Bewertet alle Compliance-Frameworks in einem Durchlauf über die Findings"""
+        return ComplianceEngine().evaluate(self.scan_results)
+
     def check_owasp_compliance(self) -> Dict[str, str]:
         """Überprüft OWASP Top 10 Compliance"""
-        # Vereinfachte OWASP-Compliance-Prüfung
-        compliance = {}
-        
-        # A01:2021 – Broken Access Control
-        compliance['A01_broken_access_control'] = 'PASS'  # Würde aus SAST-Ergebnissen abgeleitet
-        
-        # A02:2021 – Cryptographic Failures
-        compliance['A02_cryptographic_failures'] = 'PASS'
-        
-        # A03:2021 – Injection
-        semgrep_results = self.scan_results.get('semgrep', {})
-        if semgrep_results.get('critical_issues', 0) > 0:
-            compliance['A03_injection'] = 'REVIEW_REQUIRED'
-        else:
-            compliance['A03_injection'] = 'PASS'
-        
-        return compliance
+        return self.evaluate_compliance()['owasp_top_10']
 
     def check_sans_compliance(self) -> Dict[str, str]:
         """Überprüft SANS Top 25 CWE Compliance"""
-        return {
-            'cwe_79_xss': 'PASS',  # Würde aus ESLint-Security-Ergebnissen abgeleitet
-            'cwe_89_sql_injection': 'PASS',
-            'cwe_22_path_traversal': 'PASS'
-        }
+        return self.evaluate_compliance()['sans_top_25']
 
     def check_privacy_compliance(self) -> Dict[str, str]:
         """Überprüft Privacy/GDPR Compliance"""
-        return {
-            'data_minimization': 'PASS',
-            'purpose_limitation': 'PASS',
-            'storage_limitation': 'REVIEW_REQUIRED'
-        }
+        return self.evaluate_compliance()['gdpr_privacy']
 
     def run_comprehensive_scan(self) -> Dict[str, Any]:
         """Führt alle aktivierten Security-Scans durch"""
         logger.info("🚀 Starting comprehensive security scan...")
         
         scan_start = time.time()
+        self.begin_run()
+        with self.phase('index'):
+            self.target_index
         
         # Führe alle aktivierten Scans durch
-        if self.tools['semgrep']['enabled']:
-            self.scan_results['semgrep'] = self.run_semgrep_scan()
+        for tool in self.tool_runners():
+            if not self.tools[tool]['enabled']:
+                continue
+            reason = self.skip_reason(tool)
+            if reason:
+                logger.info(f"⏭  Skipping {tool}: {reason}")
+                TOOL_RUNS.inc(tool=tool, status='skipped')
+                self.scan_results[tool] = {'tool': tool, 'status': 'skipped', 'reason': reason}
+                continue
+            self.scan_results[tool] = self.run_tool(tool)
         
-        if self.tools['trivy']['enabled']:
-            self.scan_results['trivy'] = self.run_trivy_scan()
+        return self.finalize_scan(scan_start)
+
+    def run_distributed_scan(self, address: Tuple[str, int], authkey: bytes, local_workers: int = 0,
+                             timeout: Optional[float] = None) -> Dict[str, Any]:
+        """Verteilt den Scan als Coordinator auf Worker-Pods bzw. lokale Worker-Prozesse"""
+        logger.info("🚀 Starting distributed security scan...")
+        
+        scan_start = time.time()
+        self.begin_run()
+        coordinator = ScanCoordinator(self, address, authkey)
+        workers = start_local_workers(local_workers, SecurityScanner, coordinator.address, authkey)
         
-        if self.tools['dependency_check']['enabled']:
-            self.scan_results['dependency_check'] = self.run_dependency_check()
+        self.scan_results = coordinator.serve(timeout)
         
-        if self.tools['gitleaks']['enabled']:
-            self.scan_results['gitleaks'] = self.run_gitleaks_scan()
+        for worker in workers:
+            worker.join(timeout=10)
         
-        if self.tools['eslint_security']['enabled']:
-            self.scan_results['eslint_security'] = self.run_eslint_security_scan()
+        return self.finalize_scan(scan_start, mode='distributed')
+
+    def run_incremental_scan(self, plan: Dict[str, Optional[List[str]]], changes) -> Dict[str, Any]:
+        """Führt nur die von Änderungen betroffenen Tools aus (Watch-Modus)
+
+        plan: Tool -> geänderte Dateien (relativ) oder None für einen vollen Lauf.
+        Findings anderer Dateien und nicht betroffener Tools bleiben erhalten.
+        """
+        logger.info(f"🚀 Starting incremental security scan: {', '.join(plan)} ({changes})")
         
+        scan_start = time.time()
+        self.begin_run()
+        with self.phase('index'):
+            self.target_index
+        
+        for tool, paths in plan.items():
+            reason = self.skip_reason(tool)
+            if reason:
+                logger.info(f"⏭  Skipping {tool}: {reason}")
+                TOOL_RUNS.inc(tool=tool, status='skipped')
+                self.scan_results[tool] = {'tool': tool, 'status': 'skipped', 'reason': reason}
+                continue
+            
+            previous = self.scan_results.get(tool, {})
+            if paths is None or previous.get('status') != 'success':
+                # Ohne vollständiges Vorergebnis gibt es nichts zum Zusammenführen
+                self.scan_results[tool] = self.run_tool(tool)
+                continue
+            
+            targets = [self.source_dir / path for path in paths if (self.source_dir / path).is_file()]
+            fresh = self.run_tool(tool, targets) if targets else None
+            self.scan_results[tool] = merge_incremental(tool, previous, fresh, paths, self)
+        
+        return self.finalize_scan(scan_start, mode='incremental')
+
+    def finalize_scan(self, scan_start: float, mode: str = 'local') -> Dict[str, Any]:
+        """Suppressions anwenden und finalen Report erzeugen"""
         scan_duration = time.time() - scan_start
         
+        # Suppressions gelten einheitlich für alle Tools
+        with self.phase('suppressions'):
+            self.apply_suppressions()
+        self.record_finding_metrics()
+        SCANS.inc(mode=mode)
+        SCAN_DURATION.observe(scan_duration, mode=mode)
+        
+        with self.phase('artifacts'):
+            self.archive_artifacts()
+            self.cleanup_work_dir()
+        
         # Generiere finalen Report
-        final_report = self.generate_security_report()
+        with self.phase('report'):
+            final_report = self.generate_security_report()
         final_report['scan_metadata']['actual_duration'] = f"{scan_duration:.2f}s"
+        with self.phase('retention'):
+            self.enforce_retention()
+        self.write_profile()
         
         logger.info(f"✅ Comprehensive security scan completed in {scan_duration:.2f}s")
         
         return final_report
 
+    def archive_artifacts(self) -> None:
+        """Legt Tool-Artefakte (report_file) dedupliziert per Content-Hash ab
+
+        Die Tool-Ausgaben liegen im Arbeitsverzeichnis des Laufs; der Report
+        verweist danach auf die unveränderliche Kopie im Store.
+        """
+        store = ArtifactStore(self.reports_dir / "artifacts")
+        for results in self.scan_results.values():
+            report_file = results.get('report_file')
+            if not report_file or not Path(report_file).is_file():
+                continue
+            try:
+                results['report_sha256'] = store.put_file(Path(report_file))
+            except OSError as e:
+                logger.warning(f"Could not archive {report_file}: {str(e)}")
+                continue
+            # Das Arbeitsverzeichnis wird nach dem Scan entfernt
+            results['report_file'] = str(store.path(results['report_sha256']))
 
-def main():
+    def enforce_retention(self) -> Dict[str, int]:
+        """Verdichtet alte Reports und hält Alters- und Größenbudget ein"""
+        try:
+            return ReportRetention.from_settings(self.reports_dir, self.config_dir).run()
+        except (OSError, ValueError) as e:
+            # Retention darf einen abgeschlossenen Scan nicht scheitern lassen
+            logger.warning(f"Report retention failed: {str(e)}")
+            return {}
+
+    def record_finding_metrics(self) -> None:
+        """Nicht unterdrückte Findings des letzten Scans pro Tool und Severity"""
+        FINDINGS.clear()
+        for tool, results in self.scan_results.items():
+            counts = dict.fromkeys(SEVERITIES, 0)
+            for finding in results.get('findings', []):
+                counts[finding['severity']] = counts.get(finding['severity'], 0) + 1
+            for severity, count in counts.items():
+                FINDINGS.set(count, tool=tool, severity=severity)
+
+    def render_stored_report(self) -> Dict[str, Any]:
+        """Rendert Summary, Empfehlungen und Compliance aus gespeicherten Ergebnissen neu"""
+        logger.info("🔁 Re-rendering security report from stored results...")
+        
+        with self.phase('load'):
+            self.scan_results
+        
+        # Aktuelle Suppressions gelten auch für alte Ergebnisse
+        with self.phase('suppressions'):
+            self.apply_suppressions()
+        
+        with self.phase('report'):
+            report = self.generate_security_report()
+        self.write_profile()
+        return report
+
+
+def log_report_summary(report: Dict[str, Any]) -> int:
+    """Gibt die Zusammenfassung aus und liefert den Exit Code"""
+    summary = report['security_summary']
+    logger.info("=" * 50)
+    logger.info("🔐 SECURITY SCAN SUMMARY")
+    logger.info("=" * 50)
+    logger.info(f"Security Score: {summary['security_score']}/100")
+    logger.info(f"Risk Level: {summary['risk_level']}")
+    logger.info(f"Total Issues: {summary['total_issues']}")
+    logger.info(f"Critical Issues: {summary['critical_issues']}")
+    logger.info(f"Tools Successful: {summary['tools_successful']}/{summary['tools_executed']}")
+    logger.info("=" * 50)
+    
+    # Recommendations
+    if report['recommendations']:
+        logger.info("📋 RECOMMENDATIONS:")
+        for rec in report['recommendations']:
+            logger.info(f"  • {rec}")
+    
+    # Exit Code basierend auf Ergebnissen
+    if summary['critical_issues'] > 0:
+        logger.error("🚨 CRITICAL SECURITY ISSUES FOUND!")
+        return 1
+    elif summary['risk_level'] == 'HIGH':
+        logger.warning("⚠️  High risk security issues found")
+        return 2
+    else:
+        logger.info("✅ Security scan completed successfully")
+        return 0
+
+
+def scanner_authkey(generate: bool = False) -> bytes:
+    """Gemeinsamer Schlüssel für Coordinator und Worker (SCANNER_AUTHKEY)"""
+    authkey = os.environ.get('SCANNER_AUTHKEY')
+    if authkey:
+        return authkey.encode('utf-8')
+    if generate:
+        # Nur lokale Worker: Schlüssel wird per fork vererbt
+        return os.urandom(32)
+    raise RuntimeError("SCANNER_AUTHKEY must be set for distributed scans")
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(prog='security-scanner', description='Security Expert Agent S7 Scanner')
+    parser.add_argument('--metrics-port', type=int, default=os.environ.get('SCANNER_METRICS_PORT'),
+                        help='Serve Prometheus/OpenMetrics on this port (/metrics)')
+    parser.add_argument('--profile', action='store_true',
+                        help='Profile the scanner per phase (written next to the report)')
+    parser.add_argument('--profile-mode', choices=PROFILE_MODES, default='sampling',
+                        help='Profiler for --profile (sampling: collapsed stacks, cprofile: pstats)')
+    parser.add_argument('--metrics-textfile', default=os.environ.get('SCANNER_METRICS_TEXTFILE'),
+                        help='Write metrics to this file for the node_exporter textfile collector')
+    subparsers = parser.add_subparsers(dest='command')
+    
+    subparsers.add_parser('scan', help='Run all enabled security tools (default)')
+    
+    report_parser = subparsers.add_parser('report', help='Re-render a report from stored results')
+    report_parser.add_argument('results', nargs='?', default='/security/reports',
+                               help='Stored security report or reports directory (latest report)')
+    report_parser.add_argument('--top', type=int, default=None,
+                               help='Number of top findings per tool in the report')
+    
+    coordinator_parser = subparsers.add_parser('coordinator', help='Distribute a scan across workers')
+    coordinator_parser.add_argument('--listen', default='0.0.0.0:7700', help='host:port for worker connections')
+    coordinator_parser.add_argument('--local-workers', type=int, default=0,
+                                    help='Number of local worker processes to start')
+    coordinator_parser.add_argument('--timeout', type=float, default=None, help='Overall scan timeout in seconds')
+    
+    worker_parser = subparsers.add_parser('worker', help='Run scan shards for a coordinator')
+    worker_parser.add_argument('--connect', required=True, help='host:port of the coordinator')
+    
+    watch_parser = subparsers.add_parser('watch', help='Rescan affected tools when files or git HEAD change')
+    watch_parser.add_argument('--poll-interval', type=float, default=POLL_INTERVAL,
+                              help='Seconds between change checks')
+    watch_parser.add_argument('--debounce', type=float, default=DEBOUNCE,
+                              help='Quiet period in seconds before an incremental scan starts')
+    watch_parser.add_argument('--max-delay', type=float, default=MAX_DELAY,
+                              help='Maximum seconds between the first change and its scan')
+    watch_parser.add_argument('--full-interval', type=float, default=FULL_INTERVAL,
+                              help='Seconds between periodic full rescans')
+    
+    retention_parser = subparsers.add_parser('retention', help='Compact old reports and enforce size/age budgets')
+    retention_parser.add_argument('reports', nargs='?', default='/security/reports', help='Reports directory')
+    
+    rules_parser = subparsers.add_parser('rules', help='Download and pin Semgrep rule packs (image build)')
+    rules_parser.add_argument('packs', nargs='*', help='Rule packs to fetch (default: all configured packs)')
+    
+    args = parser.parse_args(argv)
+    args.command = args.command or 'scan'
+    return args
+
+
+def main(argv: Optional[List[str]] = None):
     """Hauptfunktion für Security Scanner"""
     logger.info("🔐 Security Expert Agent S7 - Scanner Service Starting...")
     
+    args = parse_args(argv)
+    
+    if args.metrics_port:
+        REGISTRY.serve(int(args.metrics_port))
+    
     try:
-        scanner = SecurityScanner()
-        
-        # Führe Comprehensive Scan durch
-        report = scanner.run_comprehensive_scan()
-        
-        # Output Summary
-        summary = report['security_summary']
-        logger.info("=" * 50)
-        logger.info("🔐 SECURITY SCAN SUMMARY")
-        logger.info("=" * 50)
-        logger.info(f"Security Score: {summary['security_score']}/100")
-        logger.info(f"Risk Level: {summary['risk_level']}")
-        logger.info(f"Total Issues: {summary['total_issues']}")
-        logger.info(f"Critical Issues: {summary['critical_issues']}")
-        logger.info(f"Tools Successful: {summary['tools_successful']}/{summary['tools_executed']}")
-        logger.info("=" * 50)
-        
-        # Recommendations
-        if report['recommendations']:
-            logger.info("📋 RECOMMENDATIONS:")
-            for rec in report['recommendations']:
-                logger.info(f"  • {rec}")
-        
-        # Exit Code basierend auf Ergebnissen
-        if summary['critical_issues'] > 0:
-            logger.error("🚨 CRITICAL SECURITY ISSUES FOUND!")
-            sys.exit(1)
-        elif summary['risk_level'] == 'HIGH':
-            logger.warning("⚠️  High risk security issues found")
-            sys.exit(2)
-        else:
-            logger.info("✅ Security scan completed successfully")
+        if args.command == 'worker':
+            run_worker(SecurityScanner(), parse_address(args.connect), scanner_authkey())
+            sys.exit(0)
+        elif args.command == 'rules':
+            scanner = SecurityScanner()
+            settings = load_semgrep_settings(scanner.config_dir)
+            lock = RulePackStore(scanner.rules_dir, scanner.cache_dir / "semgrep-rules",
+                                 settings.get('rule_packs')).load().fetch(args.packs or None)
+            logger.info(f"📚 {len(lock)} Semgrep rule packs pinned in {scanner.rules_dir}")
             sys.exit(0)
+        elif args.command == 'retention':
+            scanner = SecurityScanner()
+            summary = ReportRetention.from_settings(Path(args.reports), scanner.config_dir).run()
+            if 'total_bytes' in summary:
+                logger.info(f"🗄  Reports directory: {summary['total_bytes'] / 1024 / 1024:.1f} MB")
+            sys.exit(0)
+        elif args.command == 'coordinator':
+            authkey = scanner_authkey(generate=args.local_workers > 0)
+            scanner = SecurityScanner()
+            if args.profile:
+                scanner.enable_profiling(args.profile_mode)
+            report = scanner.run_distributed_scan(parse_address(args.listen), authkey,
+                                                  args.local_workers, args.timeout)
+        elif args.command == 'watch':
+            scanner = SecurityScanner()
+            if args.profile:
+                scanner.enable_profiling(args.profile_mode)
+            watcher = ScanWatcher(scanner, args.poll_interval, args.debounce, args.max_delay, args.full_interval)
+            # Pod-Shutdown beendet den Watch-Modus nach dem laufenden Scan
+            signal.signal(signal.SIGTERM, lambda signum, frame: watcher.stop())
+            report = watcher.run()
+        elif args.command == 'report':
+            # Report aus gespeicherten Ergebnissen, ohne Tools erneut auszuführen
+            scanner = SecurityScanner.from_results(Path(args.results))
+            if args.top is not None:
+                for config in scanner.tools.values():
+                    config['report_limit'] = args.top
+            if args.profile:
+                scanner.enable_profiling(args.profile_mode)
+            report = scanner.render_stored_report()
+        else:
+            scanner = SecurityScanner()
+            if args.profile:
+                scanner.enable_profiling(args.profile_mode)
+            
+            # Führe Comprehensive Scan durch
+            report = scanner.run_comprehensive_scan()
+        
+        sys.exit(log_report_summary(report))
             
     except Exception as e:
         logger.error(f"❌ Security scan failed: {str(e)}")
         sys.exit(3)
+    finally:
+        if args.metrics_textfile:
+            REGISTRY.write_textfile(Path(args.metrics_textfile))
 
 
 if __name__ == "__main__":
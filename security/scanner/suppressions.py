@@ -0,0 +1,300 @@
+#!/usr/bin/env python3
+"""
+Suppression-Engine für Security Expert Agent S7
+Kompiliert Dependency-Check Suppressions und die Allowlist aller Tools
+zu indizierten Matchern und wendet sie nach dem Scan auf die Findings an
+"""
+
+import re
+import json
+import fnmatch
+import logging
+import xml.etree.ElementTree as ET
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable
+
+from findings import count_findings
+
+logger = logging.getLogger('security-scanner')
+
+DEPENDENCY_CHECK_FILE = "dependency-check-suppressions.xml"
+ALLOWLIST_FILE = "security-allowlist.json"
+
+# Dependency-Check Elemente, die eine Dependency identifizieren
+DEPENDENCY_MATCHERS = ('packageUrl', 'gav', 'cpe')
+
+
+def _local_name(tag: str) -> str:
+    """Entfernt den XML-Namespace aus einem Tag"""
+    return tag.rsplit('}', 1)[-1]
+
+
+def _parse_until(value: Optional[str]) -> Optional[date]:
+    if not value:
+        return None
+    try:
+        return date.fromisoformat(value.rstrip('Z')[:10])
+    except ValueError:
+        logger.warning(f"Ignoring invalid until date in suppression: {value}")
+        return None
+
+
+def _combine(patterns: Iterable[re.Pattern]) -> Optional[re.Pattern]:
+    """Fasst alle Patterns zu einer Alternation zusammen (Vorfilter)
+
+    IGNORECASE wird als lokales Flag übernommen, sonst verwirft der Vorfilter Treffer.
+    """
+    sources = [f"(?i:{p.pattern})" if p.flags & re.IGNORECASE else f"(?:{p.pattern})" for p in patterns]
+    if not sources:
+        return None
+    try:
+        return re.compile('|'.join(sources))
+    except re.error:
+        # z.B. globale Inline-Flags in einzelnen Patterns
+        return None
+
+
+class SuppressionRule:
+    """Eine kompilierte Suppression-Regel
+
+    Orts-Kriterien (Tools, Packages, Pfade, SHA-1) müssen alle zutreffen,
+    von den Identitäts-Kriterien (IDs, CWEs, CVSS) genügt eines.
+    file_path_patterns prüfen den absoluten Pfad (Dependency-Check filePath),
+    path_patterns den Pfad relativ zum Quellverzeichnis.
+    Mit full_match müssen package_patterns wie bei Dependency-Check den ganzen
+    Wert treffen, sonst genügt ein Teiltreffer (Allowlist).
+    """
+
+    def __init__(self, source: str, notes: str = '', until: Optional[date] = None,
+                 tools: Iterable[str] = (), package_patterns: Iterable[re.Pattern] = (),
+                 path_patterns: Iterable[re.Pattern] = (), file_path_patterns: Iterable[re.Pattern] = (),
+                 sha1s: Iterable[str] = (), vulnerability_ids: Iterable[str] = (),
+                 rule_ids: Iterable[str] = (), fingerprints: Iterable[str] = (),
+                 cwes: Iterable[str] = (), cvss_below: Iterable[float] = (), full_match: bool = False):
+        self.source = source
+        self.notes = notes
+        self.until = until
+        self.tools = set(tools)
+        self.package_patterns = list(package_patterns)
+        self.path_patterns = list(path_patterns)
+        self.file_path_patterns = list(file_path_patterns)
+        self.sha1s = {s.lower() for s in sha1s}
+        self.vulnerability_ids = set(vulnerability_ids)
+        self.rule_ids = set(rule_ids)
+        self.fingerprints = set(fingerprints)
+        self.cwes = {c.upper() if c.upper().startswith('CWE-') else f"CWE-{c}" for c in cwes}
+        self.cvss_below = list(cvss_below)
+        self.full_match = full_match
+
+    def is_active(self, today: Optional[date] = None) -> bool:
+        """Abgelaufene Suppressions werden ignoriert"""
+        return self.until is None or (today or date.today()) <= self.until
+
+    @property
+    def is_indexable(self) -> bool:
+        """Regeln, die nur über exakte IDs matchen, landen in den Hash-Indizes"""
+        return bool(self.vulnerability_ids or self.rule_ids or self.fingerprints) \
+            and not (self.cwes or self.cvss_below)
+
+    def matches(self, finding: Dict[str, Any]) -> bool:
+        if self.tools and finding.get('tool') not in self.tools:
+            return False
+
+        package_matcher = re.Pattern.fullmatch if self.full_match else re.Pattern.search
+        if self.package_patterns and not any(
+                package_matcher(pattern, package_id)
+                for pattern in self.package_patterns for package_id in finding.get('package_ids', [])):
+            return False
+
+        if self.path_patterns and not any(pattern.match(finding.get('path', ''))
+                                          for pattern in self.path_patterns):
+            return False
+
+        file_path = finding.get('file_path') or finding.get('path', '')
+        if self.file_path_patterns and not any(pattern.fullmatch(file_path)
+                                               for pattern in self.file_path_patterns):
+            return False
+
+        if self.sha1s and finding.get('sha1', '').lower() not in self.sha1s:
+            return False
+
+        if not (self.vulnerability_ids or self.rule_ids or self.fingerprints or self.cwes or self.cvss_below):
+            return True
+
+        if finding.get('vulnerability_id') in self.vulnerability_ids:
+            return True
+        if finding.get('rule_id') in self.rule_ids:
+            return True
+        if finding.get('fingerprint') in self.fingerprints:
+            return True
+        if self.cwes & set(finding.get('cwes', [])):
+            return True
+
+        score = finding.get('cvss_score')
+        return score is not None and any(float(score) < limit for limit in self.cvss_below)
+
+
+class SuppressionEngine:
+    """Indizierte Suppression-Engine für alle normalisierten Findings"""
+
+    def __init__(self, rules: Optional[List[SuppressionRule]] = None):
+        self.rules = [rule for rule in rules or [] if rule.is_active()]
+
+        # Hash-Indizes für exakte IDs
+        self.by_vulnerability_id: Dict[str, List[SuppressionRule]] = {}
+        self.by_rule_id: Dict[str, List[SuppressionRule]] = {}
+        self.by_fingerprint: Dict[str, List[SuppressionRule]] = {}
+        self.unindexed: List[SuppressionRule] = []
+
+        for rule in self.rules:
+            if not rule.is_indexable:
+                self.unindexed.append(rule)
+                continue
+            for vuln_id in rule.vulnerability_ids:
+                self.by_vulnerability_id.setdefault(vuln_id, []).append(rule)
+            for rule_id in rule.rule_ids:
+                self.by_rule_id.setdefault(rule_id, []).append(rule)
+            for fingerprint in rule.fingerprints:
+                self.by_fingerprint.setdefault(fingerprint, []).append(rule)
+
+        # Eine kombinierte Regex pro Kriterium als schneller Vorfilter
+        self.package_filter = _combine(p for rule in self.rules for p in rule.package_patterns)
+        self.path_filter = _combine(p for rule in self.rules for p in rule.path_patterns)
+
+    @classmethod
+    def load(cls, config_dir: Path) -> 'SuppressionEngine':
+        """Lädt Dependency-Check Suppressions und die Allowlist aus config_dir"""
+        rules = (load_dependency_check_rules(config_dir / DEPENDENCY_CHECK_FILE)
+                 + load_allowlist_rules(config_dir / ALLOWLIST_FILE))
+        return cls(rules)
+
+    def _candidates(self, finding: Dict[str, Any]) -> List[SuppressionRule]:
+        candidates = (self.by_vulnerability_id.get(finding.get('vulnerability_id'), [])
+                      + self.by_rule_id.get(finding.get('rule_id'), [])
+                      + self.by_fingerprint.get(finding.get('fingerprint'), [])
+                      + self.unindexed)
+        # Regeln können über mehrere Indizes gefunden werden
+        seen = set()
+        return [rule for rule in candidates if not (id(rule) in seen or seen.add(id(rule)))]
+
+    def is_suppressed(self, finding: Dict[str, Any]) -> bool:
+        candidates = self._candidates(finding)
+        if not candidates:
+            return False
+
+        # Vorfilter: trifft die kombinierte Regex nicht, kann keine Einzelregel treffen
+        package_possible = self.package_filter is None or any(
+            self.package_filter.search(package_id) for package_id in finding.get('package_ids', []))
+        path_possible = self.path_filter is None or bool(self.path_filter.match(finding.get('path', '')))
+
+        for rule in candidates:
+            if rule.package_patterns and not package_possible:
+                continue
+            if rule.path_patterns and not path_possible:
+                continue
+            if rule.matches(finding):
+                return True
+        return False
+
+    def apply(self, tool: str, results: Dict[str, Any]) -> Dict[str, Any]:
+        """Filtert die Findings eines Tool-Ergebnisses und aktualisiert die Kennzahlen
+
+        Bereits unterdrückte Findings werden neu bewertet, damit eine geänderte
+        Allowlist ohne erneuten Tool-Lauf wirkt.
+        """
+        all_findings = results.get('findings', []) + results.get('suppressed_findings', [])
+        active = []
+        suppressed = []
+
+        for finding in all_findings:
+            (suppressed if self.is_suppressed(finding) else active).append(finding)
+
+        results['findings'] = active
+        results['suppressed_findings'] = suppressed
+        results['suppressed_count'] = len(suppressed)
+        results.update(count_findings(tool, active))
+        return results
+
+
+def load_dependency_check_rules(path: Path) -> List[SuppressionRule]:
+    """Kompiliert dependency-check-suppressions.xml zu Suppression-Regeln"""
+    if not path.exists():
+        return []
+
+    try:
+        root = ET.parse(path).getroot()
+    except ET.ParseError as e:
+        logger.error(f"Invalid suppression file {path}: {str(e)}")
+        return []
+
+    rules = []
+    for element in root:
+        if _local_name(element.tag) != 'suppress':
+            continue
+
+        fields = {'notes': '', 'package_patterns': [], 'file_path_patterns': [], 'sha1s': [],
+                  'vulnerability_ids': [], 'cwes': [], 'cvss_below': []}
+        until = element.get('until')
+
+        for child in element:
+            name = _local_name(child.tag)
+            text = (child.text or '').strip()
+            # Wie Dependency-Check: Regex case-sensitiv, Literale ohne Groß-/Kleinschreibung
+            if child.get('regex') == 'true':
+                pattern = re.compile(text)
+            else:
+                pattern = re.compile(re.escape(text), re.IGNORECASE)
+
+            if name == 'notes':
+                fields['notes'] = text
+            elif name == 'until':
+                until = text
+            elif name in DEPENDENCY_MATCHERS:
+                fields['package_patterns'].append(pattern)
+            elif name == 'filePath':
+                fields['file_path_patterns'].append(pattern)
+            elif name == 'sha1':
+                fields['sha1s'].append(text)
+            elif name in ('cve', 'vulnerabilityName'):
+                fields['vulnerability_ids'].append(text)
+            elif name == 'cwe':
+                fields['cwes'].append(text)
+            elif name == 'cvssBelow':
+                fields['cvss_below'].append(float(text))
+
+        rules.append(SuppressionRule(DEPENDENCY_CHECK_FILE, until=_parse_until(until),
+                                     tools=('dependency_check', 'trivy'), full_match=True, **fields))
+
+    return rules
+
+
+def load_allowlist_rules(path: Path) -> List[SuppressionRule]:
+    """Kompiliert security-allowlist.json zu Suppression-Regeln"""
+    if not path.exists():
+        return []
+
+    try:
+        with open(path, 'r') as f:
+            data = json.load(f)
+    except json.JSONDecodeError as e:
+        logger.error(f"Invalid allowlist {path}: {str(e)}")
+        return []
+
+    rules = []
+    for entry in data.get('rules', []):
+        rules.append(SuppressionRule(
+            ALLOWLIST_FILE,
+            notes=entry.get('notes', ''),
+            until=_parse_until(entry.get('until')),
+            tools=entry.get('tools', []),
+            package_patterns=[re.compile(p) for p in entry.get('package_urls', [])],
+            path_patterns=[re.compile(fnmatch.translate(g)) for g in entry.get('paths', [])],
+            vulnerability_ids=entry.get('vulnerability_ids', []),
+            rule_ids=entry.get('rule_ids', []),
+            fingerprints=entry.get('fingerprints', []),
+            cwes=entry.get('cwes', []),
+            cvss_below=entry.get('cvss_below', [])
+        ))
+
+    return rules
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Target-Index für Security Expert Agent S7
+Ein einziger Durchlauf über source_dir erfasst Sprachen, Manifeste und
+Lockfiles; Tools ohne passende Eingaben werden vor dem Start übersprungen
+"""
+
+import os
+import re
+import time
+import fnmatch
+import logging
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Iterable, Set, Tuple
+
+from dependency_cache import IGNORED_DIRS, MANIFEST_PATTERNS
+
+logger = logging.getLogger('security-scanner')
+
+# Sprache -> Dateiendungen bzw. Dateinamen
+LANGUAGE_EXTENSIONS = {
+    'csharp': ('.cs',),
+    'javascript': ('.js', '.jsx', '.mjs', '.cjs'),
+    'typescript': ('.ts', '.tsx'),
+    'python': ('.py',),
+}
+LANGUAGE_FILENAMES = {
+    'dockerfile': ('Dockerfile',),
+}
+LANGUAGES = sorted(set(LANGUAGE_EXTENSIONS) | set(LANGUAGE_FILENAMES))
+
+# Lockfiles, die Trivy pro Ecosystem auswertet
+LOCKFILE_PATTERNS = {
+    'nuget': ('packages.lock.json', 'packages.config', '*.deps.json'),
+    'npm': ('package-lock.json', 'yarn.lock', 'pnpm-lock.yaml'),
+    'pip': ('requirements.txt', 'Pipfile.lock', 'poetry.lock'),
+}
+
+_EXTENSION_LANGUAGE = {ext: language for language, exts in LANGUAGE_EXTENSIONS.items() for ext in exts}
+
+
+def language_of(filename: str) -> Optional[str]:
+    for language, names in LANGUAGE_FILENAMES.items():
+        if any(filename == name or filename.startswith(f"{name}.") for name in names):
+            return language
+    return _EXTENSION_LANGUAGE.get(os.path.splitext(filename)[1])
+
+
+def _compile_patterns(patterns: Dict[str, Tuple[str, ...]]) -> List[Tuple[re.Pattern, str]]:
+    return [(re.compile(fnmatch.translate(pattern)), ecosystem)
+            for ecosystem, globs in patterns.items() for pattern in globs]
+
+
+_MANIFEST_MATCHERS = _compile_patterns(MANIFEST_PATTERNS)
+_LOCKFILE_MATCHERS = _compile_patterns(LOCKFILE_PATTERNS)
+
+
+def _ecosystem_of(filename: str, matchers: List[Tuple[re.Pattern, str]]) -> Optional[str]:
+    for pattern, ecosystem in matchers:
+        if pattern.match(filename):
+            return ecosystem
+    return None
+
+
+def manifest_ecosystem(filename: str) -> Optional[str]:
+    """Ecosystem eines Dependency-Manifests (Dependency Check) oder None"""
+    return _ecosystem_of(filename, _MANIFEST_MATCHERS)
+
+
+def lockfile_ecosystem(filename: str) -> Optional[str]:
+    """Ecosystem eines Lockfiles (Trivy) oder None"""
+    return _ecosystem_of(filename, _LOCKFILE_MATCHERS)
+
+
+def detect_languages(paths: Iterable[Path]) -> Set[str]:
+    """Erkennt die Sprachen unter Pfaden außerhalb eines Index"""
+    languages = set()
+    for path in paths:
+        if path.is_file():
+            languages.add(language_of(path.name))
+            continue
+        for root, dirs, files in os.walk(path):
+            dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+            languages.update(language_of(filename) for filename in files)
+    languages.discard(None)
+    return languages
+
+
+class TargetIndex:
+    """Sprachen, Manifeste und Lockfiles unter source_dir (relative Pfade)"""
+
+    def __init__(self, source_dir: Path):
+        self.source_dir = source_dir
+        self.file_count = 0
+        self.languages: Dict[str, List[str]] = {}
+        self.manifests: Dict[str, List[str]] = {}
+        self.lockfiles: Dict[str, List[str]] = {}
+
+    @classmethod
+    def build(cls, source_dir: Path) -> 'TargetIndex':
+        index = cls(source_dir)
+        start = time.time()
+
+        for root, dirs, files in os.walk(source_dir):
+            dirs[:] = [d for d in dirs if d not in IGNORED_DIRS]
+            relative_root = os.path.relpath(root, source_dir)
+
+            for filename in files:
+                index.file_count += 1
+                relative = filename if relative_root == '.' else f"{relative_root}/{filename}"
+
+                language = language_of(filename)
+                if language:
+                    index.languages.setdefault(language, []).append(relative)
+                ecosystem = manifest_ecosystem(filename)
+                if ecosystem:
+                    index.manifests.setdefault(ecosystem, []).append(relative)
+                ecosystem = lockfile_ecosystem(filename)
+                if ecosystem:
+                    index.lockfiles.setdefault(ecosystem, []).append(relative)
+
+        logger.info(f"🗂  Indexed {index.file_count} files in {time.time() - start:.2f}s: "
+                    f"languages={sorted(index.languages)}, manifests={sorted(index.manifests)}, "
+                    f"lockfiles={sorted(index.lockfiles)}")
+        return index
+
+    def manifest_paths(self) -> List[str]:
+        return sorted(path for paths in self.manifests.values() for path in paths)
+
+    def _prefixes(self, paths: Iterable[Path]) -> Optional[List[str]]:
+        """Relative Präfixe der Pfade; None, wenn ein Pfad außerhalb von source_dir liegt"""
+        prefixes = []
+        for path in paths:
+            path = Path(path)
+            if path.is_absolute():
+                try:
+                    path = path.relative_to(self.source_dir)
+                except ValueError:
+                    return None
+            prefixes.append(path.as_posix())
+        return prefixes
+
+    def languages_under(self, paths: Iterable[Path]) -> Set[str]:
+        """Sprachen unter den angegebenen Pfaden (z.B. Shard-Targets)"""
+        paths = list(paths)
+        prefixes = self._prefixes(paths)
+        if prefixes is None:
+            return detect_languages(paths)
+        if '.' in prefixes:
+            return set(self.languages)
+
+        return {
+            language for language, files in self.languages.items()
+            if any(f == prefix or f.startswith(prefix + '/') for f in files for prefix in prefixes)
+        }
+
+    def missing(self, requires: Dict[str, Any]) -> Optional[str]:
+        """Grund zum Überspringen eines Tools oder None, wenn alle Anforderungen erfüllt sind
+
+        paths: alle müssen existieren; languages (unter paths), manifests und
+        lockfiles: mindestens einer der Einträge muss vorkommen.
+        """
+        paths = requires.get('paths', [])
+        for path in paths:
+            if not (self.source_dir / path).exists():
+                return f"{path} not found"
+
+        languages = requires.get('languages')
+        if languages is not None:
+            found = self.languages_under(paths) if paths else set(self.languages)
+            if not found & set(languages):
+                return f"no {'/'.join(languages)} files"
+
+        for category in ('manifests', 'lockfiles'):
+            ecosystems = requires.get(category)
+            if ecosystems is not None and not set(getattr(self, category)) & set(ecosystems):
+                return f"no {'/'.join(ecosystems)} {category}"
+
+        return None
@@ -0,0 +1,279 @@
+#!/usr/bin/env python3
+"""
+Watch-Modus für Security Expert Agent S7
+Erkennt Änderungen unter source_dir (Dateien und git HEAD), fasst sie mit
+Debounce zusammen und startet nur die davon betroffenen Tools neu
+"""
+
+import os
+import time
+import logging
+import threading
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Set, Tuple
+
+from dependency_cache import IGNORED_DIRS
+from distributed import SHARDED_TOOLS
+from findings import count_findings
+from target_index import language_of, lockfile_ecosystem, manifest_ecosystem
+
+logger = logging.getLogger('security-scanner')
+
+POLL_INTERVAL = 5.0
+# Ruhezeit nach der letzten Änderung, bevor gescannt wird
+DEBOUNCE = 10.0
+# Spätester Scan nach der ersten Änderung, auch wenn weiter geändert wird
+MAX_DELAY = 120.0
+# Vollständiger Scan als Absicherung gegen verpasste Änderungen und neue CVEs
+FULL_INTERVAL = 24 * 3600.0
+
+# Tools, die die git-Historie prüfen und nur bei neuem HEAD laufen
+HISTORY_TOOLS = {'gitleaks'}
+
+
+def snapshot(source_dir: Path) -> Dict[str, Tuple[int, int]]:
+    """(mtime_ns, size) aller Dateien unter source_dir, relative Pfade"""
+    files = {}
+    pending = [(source_dir, '')]
+    while pending:
+        directory, prefix = pending.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+        for entry in entries:
+            relative = f"{prefix}{entry.name}"
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    if entry.name not in IGNORED_DIRS:
+                        pending.append((Path(entry.path), relative + '/'))
+                elif entry.is_file(follow_symlinks=False):
+                    stat = entry.stat(follow_symlinks=False)
+                    files[relative] = (stat.st_mtime_ns, stat.st_size)
+            except OSError:
+                # Datei zwischen scandir und stat gelöscht
+                continue
+    return files
+
+
+def _git_dir(source_dir: Path) -> Optional[Path]:
+    git_dir = source_dir / ".git"
+    if git_dir.is_file():
+        # Worktree bzw. Submodule: "gitdir: <pfad>"
+        content = git_dir.read_text().strip()
+        if not content.startswith('gitdir:'):
+            return None
+        git_dir = source_dir / content[len('gitdir:'):].strip()
+    return git_dir if git_dir.is_dir() else None
+
+
+def git_head(source_dir: Path) -> Optional[str]:
+    """Commit von HEAD ohne git-Prozess; None außerhalb eines Repositories"""
+    git_dir = _git_dir(source_dir)
+    if git_dir is None:
+        return None
+
+    try:
+        head = (git_dir / "HEAD").read_text().strip()
+        if not head.startswith('ref: '):
+            return head
+
+        ref = head[len('ref: '):]
+        # Refs eines Worktrees liegen im gemeinsamen Repository
+        common_dir = git_dir
+        if (git_dir / "commondir").exists():
+            common_dir = git_dir / (git_dir / "commondir").read_text().strip()
+
+        for base in (git_dir, common_dir):
+            if (base / ref).is_file():
+                return (base / ref).read_text().strip()
+
+        packed = common_dir / "packed-refs"
+        if packed.exists():
+            for line in packed.read_text().splitlines():
+                sha, _, name = line.partition(' ')
+                if name == ref:
+                    return sha
+    except OSError as e:
+        logger.warning(f"Could not read git HEAD: {str(e)}")
+        return None
+
+    # Branch ohne Commit: der Ref-Name zeigt trotzdem einen Branch-Wechsel an
+    return head
+
+
+class ChangeSet:
+    """Gesammelte Änderungen seit dem letzten Scan"""
+
+    def __init__(self, changed: Optional[Set[str]] = None, deleted: Optional[Set[str]] = None,
+                 head_changed: bool = False):
+        self.changed = set(changed or ())
+        self.deleted = set(deleted or ())
+        self.head_changed = head_changed
+
+    @property
+    def paths(self) -> Set[str]:
+        return self.changed | self.deleted
+
+    def merge(self, other: 'ChangeSet') -> None:
+        # Wieder angelegte Dateien gelten als geändert, nicht als gelöscht
+        self.deleted = (self.deleted - other.changed) | other.deleted
+        self.changed = (self.changed - other.deleted) | other.changed
+        self.head_changed = self.head_changed or other.head_changed
+
+    def __bool__(self) -> bool:
+        return bool(self.changed or self.deleted or self.head_changed)
+
+    def __repr__(self) -> str:
+        return (f"ChangeSet(changed={len(self.changed)}, deleted={len(self.deleted)}, "
+                f"head_changed={self.head_changed})")
+
+
+class ChangeDetector:
+    """Vergleicht Snapshots von source_dir und git HEAD zwischen zwei Polls
+
+    Polling statt inotify: funktioniert auf Volumes und Netzwerk-Dateisystemen
+    im Pod und kommt ohne zusätzliche Abhängigkeiten aus.
+    """
+
+    def __init__(self, source_dir: Path):
+        self.source_dir = source_dir
+        self.files = snapshot(source_dir)
+        self.head = git_head(source_dir)
+
+    def poll(self) -> ChangeSet:
+        files = snapshot(self.source_dir)
+        head = git_head(self.source_dir)
+
+        changed = {path for path, signature in files.items() if self.files.get(path) != signature}
+        deleted = set(self.files) - set(files)
+        changes = ChangeSet(changed, deleted, head != self.head)
+
+        self.files = files
+        self.head = head
+        return changes
+
+
+def affects(requires: Dict[str, Any], path: str) -> bool:
+    """Ob eine geänderte Datei zu den Eingaben eines Tools gehört (requires wie im Target-Index)"""
+    paths = requires.get('paths', [])
+    if paths and not any(path == prefix or path.startswith(prefix + '/') for prefix in paths):
+        return False
+
+    filename = path.rsplit('/', 1)[-1]
+    if language_of(filename) in requires.get('languages', ()):
+        return True
+    if manifest_ecosystem(filename) in requires.get('manifests', ()):
+        return True
+    return lockfile_ecosystem(filename) in requires.get('lockfiles', ())
+
+
+def plan_incremental(scanner, changes: ChangeSet) -> Dict[str, Optional[List[str]]]:
+    """Betroffene Tools -> geänderte Dateien (Semgrep/ESLint) bzw. None für einen vollen Lauf"""
+    plan = {}
+    for tool in scanner.tool_runners():
+        config = scanner.tools[tool]
+        if not config['enabled']:
+            continue
+        if tool in HISTORY_TOOLS:
+            if changes.head_changed:
+                plan[tool] = None
+            continue
+
+        requires = config.get('requires')
+        if not requires:
+            continue
+        relevant = sorted(path for path in changes.paths if affects(requires, path))
+        if relevant:
+            plan[tool] = relevant if tool in SHARDED_TOOLS else None
+    return plan
+
+
+def merge_incremental(tool: str, previous: Dict[str, Any], fresh: Optional[Dict[str, Any]],
+                      paths: List[str], scanner) -> Dict[str, Any]:
+    """Ersetzt die Findings der geänderten Dateien im vorherigen Ergebnis
+
+    fresh ist None, wenn alle Dateien gelöscht wurden. Schlägt der Lauf fehl,
+    bleibt das vorherige Ergebnis mit Fehlerhinweis erhalten.
+    """
+    if fresh is not None and fresh.get('status') != 'success':
+        kept = dict(previous)
+        kept['incremental_error'] = fresh.get('error', fresh.get('status'))
+        return kept
+
+    replaced = set(paths)
+    # Unterdrückte Findings zurückholen, finalize_scan bewertet sie neu
+    findings = [
+        finding for finding in previous.get('findings', []) + previous.get('suppressed_findings', [])
+        if finding.get('path') not in replaced
+    ]
+    if fresh is not None:
+        findings.extend(fresh.get('findings', []))
+
+    merged = {key: value for key, value in previous.items()
+              if key not in ('raw_output', 'suppressed_findings', 'suppressed_count', 'incremental_error')}
+    merged.update(count_findings(tool, findings))
+    merged['findings'] = findings
+    merged['results'] = scanner.select_report_findings(tool, findings)
+    merged['incremental_paths'] = len(replaced)
+    return merged
+
+
+class ScanWatcher:
+    """Vollständiger Scan beim Start, danach inkrementelle Scans bei Änderungen"""
+
+    def __init__(self, scanner, poll_interval: float = POLL_INTERVAL, debounce: float = DEBOUNCE,
+                 max_delay: float = MAX_DELAY, full_interval: float = FULL_INTERVAL):
+        self.scanner = scanner
+        self.poll_interval = poll_interval
+        self.debounce = debounce
+        self.max_delay = max_delay
+        self.full_interval = full_interval
+        self.stopped = threading.Event()
+        self.last_report: Optional[Dict[str, Any]] = None
+
+    def stop(self):
+        self.stopped.set()
+
+    def run(self, max_scans: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """Beobachtet source_dir bis stop() bzw. bis max_scans Scans gelaufen sind"""
+        # Vor dem ersten Scan: Änderungen währenddessen werden danach erkannt
+        detector = ChangeDetector(self.scanner.source_dir)
+        logger.info(f"👀 Watching {self.scanner.source_dir} ({len(detector.files)} files, "
+                    f"HEAD {(detector.head or 'none')[:12]})")
+
+        self.last_report = self.scanner.run_comprehensive_scan()
+        last_full = time.monotonic()
+        scans = 1
+
+        pending = ChangeSet()
+        first_change = last_change = 0.0
+
+        while (max_scans is None or scans < max_scans) and not self.stopped.wait(self.poll_interval):
+            changes = detector.poll()
+            now = time.monotonic()
+            if changes:
+                if not pending:
+                    first_change = now
+                pending.merge(changes)
+                last_change = now
+                logger.info(f"📝 Detected {changes}")
+
+            if now - last_full >= self.full_interval:
+                logger.info("🔄 Periodic full rescan")
+                self.last_report = self.scanner.run_comprehensive_scan()
+                last_full = now
+                pending = ChangeSet()
+                scans += 1
+                continue
+
+            if pending and (now - last_change >= self.debounce or now - first_change >= self.max_delay):
+                plan = plan_incremental(self.scanner, pending)
+                if plan:
+                    self.last_report = self.scanner.run_incremental_scan(plan, pending)
+                    scans += 1
+                else:
+                    logger.info(f"⏭  No tool affected by {pending}")
+                pending = ChangeSet()
+
+        return self.last_report
@@ -0,0 +1,424 @@
+#!/usr/bin/env python3
+"""
+Lasttest für den Security Scanner von Agent S7
+Startet viele Scans parallel gegen Stub-Tools mit einstellbarer Latenz und
+Ausgabegröße und misst Durchsatz, Latenz-Perzentile, Queue-Wartezeit,
+Cache-Hit-Rate und Speicherwachstum über die Zeit (Pod-Sizing, Leak-Suche)
+
+    python3 security/tests/load_harness.py --jobs 200 --concurrency 8 --latency 0.2 --output-kb 64
+"""
+
+import os
+import gc
+import sys
+import json
+import time
+import queue
+import shutil
+import logging
+import argparse
+import tempfile
+import threading
+import importlib.util
+from pathlib import Path
+from typing import Dict, List, Any, Optional, Tuple
+
+SCANNER_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'scanner')
+sys.path.insert(0, SCANNER_DIR)
+
+import metrics
+
+# Namen der Tool-Binaries, die der Scanner aufruft (ESLint läuft über npx)
+STUB_TOOLS = ('semgrep', 'trivy', 'gitleaks', 'dependency-check', 'npx')
+# Namen für --tool-latency, wie sie der Stub in STUB_LATENCY_<TOOL> liest
+LATENCY_TOOLS = ('semgrep', 'trivy', 'gitleaks', 'dependency-check', 'eslint')
+CACHES = ('dependency_check', 'semgrep_rules')
+PERCENTILES = (50, 90, 95, 99)
+# Ungefähre Größe eines Findings in der Stub-Ausgabe
+FINDING_BYTES = 256
+
+STUB_SCRIPT = '''#!{python}
+"""Stub für {{tool}}: wartet STUB_LATENCY[_<TOOL>] Sekunden und liefert STUB_FINDINGS Findings"""
+import os, sys, json, time, random
+
+tool = os.path.basename(sys.argv[0])
+args = sys.argv[1:]
+name = 'ESLINT' if tool == 'npx' else tool.upper().replace('-', '_')
+latency = float(os.environ.get('STUB_LATENCY_' + name, os.environ.get('STUB_LATENCY', '0')))
+jitter = float(os.environ.get('STUB_JITTER', '0'))
+time.sleep(max(0.0, latency * (1 + random.uniform(-jitter, jitter))))
+
+count = int(os.environ.get('STUB_FINDINGS', '1'))
+message = 'x' * int(os.environ.get('STUB_MESSAGE_BYTES', '200'))
+
+def arg(flag):
+    return args[args.index(flag) + 1]
+
+def target_file(suffix):
+    target = args[-1]
+    return target if os.path.isfile(target) else os.path.join(target, 'stub' + suffix)
+
+if tool == 'semgrep':
+    print(json.dumps({{'results': [
+        {{'check_id': 'stub.rule-%d' % (i % 10), 'path': target_file('.cs'), 'start': {{'line': i + 1}},
+          'extra': {{'severity': 'WARNING', 'message': message, 'metadata': {{}}}}}}
+        for i in range(count)]}}))
+elif tool == 'trivy':
+    print(json.dumps({{'Results': [{{'Target': 'package-lock.json', 'Vulnerabilities': [
+        {{'VulnerabilityID': 'CVE-2024-%04d' % i, 'PkgName': 'stub', 'InstalledVersion': '1.0.%d' % i,
+          'Severity': 'HIGH', 'Title': message}}
+        for i in range(count)]}}]}}))
+elif tool == 'gitleaks':
+    with open(arg('--report-path'), 'w') as f:
+        json.dump([{{'RuleID': 'stub-key', 'File': 'config.js', 'StartLine': i + 1, 'Fingerprint': 'stub:%d' % i,
+                    'Description': message}} for i in range(count)], f)
+    sys.exit(1 if count else 0)
+elif tool == 'dependency-check':
+    scanned = [args[i + 1] for i, value in enumerate(args) if value == '--scan']
+    with open(os.path.join(arg('--out'), 'dependency-check-report.json'), 'w') as f:
+        json.dump({{'dependencies': [
+            {{'fileName': 'stub:%d' % i, 'filePath': path, 'packages': [{{'id': 'pkg:npm/stub@%d' % i}}],
+              'vulnerabilities': [{{'name': 'CVE-2023-%04d' % i, 'severity': 'MEDIUM', 'description': message}}]}}
+            for path in scanned for i in range(count)]}}, f)
+elif tool == 'npx':
+    print(json.dumps([{{'filePath': target_file('.ts'), 'messages': [
+        {{'ruleId': 'security/detect-object-injection', 'severity': 2, 'line': i + 1, 'message': message}}
+        for i in range(count)]}}]))
+    sys.exit(1 if count else 0)
+'''
+
+
+def load_scanner_module():
+    """security-scanner.py als Modul (bereits geladen, wenn die Tests laufen)"""
+    if 'security_scanner' in sys.modules:
+        return sys.modules['security_scanner']
+    spec = importlib.util.spec_from_file_location('security_scanner', os.path.join(SCANNER_DIR, 'security-scanner.py'))
+    module = importlib.util.module_from_spec(spec)
+    sys.modules['security_scanner'] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+def install_stub_tools(bin_dir: Path) -> None:
+    bin_dir.mkdir(parents=True, exist_ok=True)
+    script = bin_dir / "stub-tool"
+    script.write_text(STUB_SCRIPT.format(python=sys.executable))
+    script.chmod(0o755)
+    for tool in STUB_TOOLS:
+        link = bin_dir / tool
+        if not link.exists():
+            link.symlink_to(script.name)
+
+
+def create_target(path: Path, files: int = 20) -> Path:
+    """Synthetisches Projekt mit Backend, Frontend, Manifesten und Lockfiles"""
+    (path / "backend").mkdir(parents=True, exist_ok=True)
+    (path / "frontend" / "src").mkdir(parents=True, exist_ok=True)
+    (path / "backend" / "Booking.Api.csproj").write_text("<Project />")
+    (path / "backend" / "packages.lock.json").write_text("{}")
+    (path / "frontend" / "package-lock.json").write_text("{}")
+    (path / "backend" / "Dockerfile").write_text("FROM mcr.microsoft.com/dotnet/aspnet:8.0")
+    for i in range(files):
+        (path / "backend" / f"Service{i}.cs").write_text(f"class Service{i} {{}}")
+        (path / "frontend" / "src" / f"page{i}.tsx").write_text(f"export const page{i} = {i};")
+    return path
+
+
+def rss_bytes() -> int:
+    """Aktueller Resident Set Size des Prozesses (Linux), sonst Peak über resource"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def percentiles(values: List[float], points: Tuple[int, ...] = PERCENTILES) -> Dict[str, float]:
+    """Nearest-Rank-Perzentile plus Mittelwert und Maximum"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+    result = {f"p{point}": round(ordered[max(0, -(-point * len(ordered) // 100) - 1)], 4) for point in points}
+    result['mean'] = round(sum(ordered) / len(ordered), 4)
+    result['max'] = round(ordered[-1], 4)
+    return result
+
+
+def memory_slope(samples: List[Dict[str, Any]]) -> float:
+    """Speicherwachstum in Bytes pro abgeschlossenem Job (lineare Regression)"""
+    points = [(s['completed'], s['rss_bytes']) for s in samples]
+    if len({x for x, _ in points}) < 2:
+        return 0.0
+    mean_x = sum(x for x, _ in points) / len(points)
+    mean_y = sum(y for _, y in points) / len(points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / variance
+
+
+class MemorySampler(threading.Thread):
+    """Nimmt RSS und Anzahl abgeschlossener Jobs in festen Abständen auf"""
+
+    def __init__(self, harness: 'LoadHarness', interval: float):
+        super().__init__(name='load-memory-sampler', daemon=True)
+        self.harness = harness
+        self.interval = interval
+        self.samples: List[Dict[str, Any]] = []
+        self.stopped = threading.Event()
+
+    def sample(self):
+        self.samples.append({
+            'elapsed': round(time.monotonic() - self.harness.started, 3),
+            'completed': self.harness.completed,
+            'rss_bytes': rss_bytes(),
+        })
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            self.sample()
+
+    def stop(self):
+        self.stopped.set()
+        self.join(timeout=5)
+        self.sample()
+
+
+class LoadHarness:
+    """Feuert Scan-Jobs mit begrenzter Parallelität auf den Scanner
+
+    Jobs kommen mit arrival_rate pro Sekunde (None: alle sofort) in eine
+    Queue; concurrency Worker-Threads arbeiten sie mit je einem eigenen
+    SecurityScanner ab, alle auf demselben Reports-Verzeichnis.
+    """
+
+    def __init__(self, targets: List[Path], work_dir: Path, jobs: int = 50, concurrency: int = 4,
+                 arrival_rate: Optional[float] = None, latency: float = 0.05, tool_latency: Dict[str, float] = None,
+                 jitter: float = 0.0, output_kb: float = 4, sample_interval: float = 0.5, warmup: float = 0.1):
+        self.targets = targets
+        self.work_dir = work_dir
+        self.jobs = jobs
+        self.concurrency = concurrency
+        self.arrival_rate = arrival_rate
+        self.latency = latency
+        self.tool_latency = tool_latency or {}
+        self.jitter = jitter
+        self.output_kb = output_kb
+        self.sample_interval = sample_interval
+        self.warmup = warmup
+        self.scanner_module = load_scanner_module()
+        self.queue: queue.Queue = queue.Queue()
+        self.records: List[Dict[str, Any]] = []
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.started = 0.0
+
+    def _stub_environment(self) -> Dict[str, str]:
+        env = {
+            'PATH': f"{self.work_dir / 'bin'}{os.pathsep}{os.environ.get('PATH', '')}",
+            'STUB_LATENCY': str(self.latency),
+            'STUB_JITTER': str(self.jitter),
+            'STUB_FINDINGS': str(max(1, int(self.output_kb * 1024 // FINDING_BYTES))),
+        }
+        for tool, seconds in self.tool_latency.items():
+            env[f"STUB_LATENCY_{tool.upper().replace('-', '_')}"] = str(seconds)
+        return env
+
+    def _prepare(self):
+        install_stub_tools(self.work_dir / "bin")
+        config_dir = self.work_dir / "config"
+        config_dir.mkdir(parents=True, exist_ok=True)
+        rules = config_dir / "semgrep-rules.yml"
+        rules.write_text("rules: []\n")
+        (config_dir / "security-settings.json").write_text(json.dumps(
+            {'security_tools': {'sast': {'semgrep': {'custom_rules': str(rules)}}}}))
+        (self.work_dir / "reports").mkdir(parents=True, exist_ok=True)
+
+    def _scanner(self, target: Path):
+        scanner = self.scanner_module.SecurityScanner()
+        scanner.source_dir = target
+        scanner.reports_dir = self.work_dir / "reports"
+        scanner.config_dir = self.work_dir / "config"
+        scanner.rules_dir = self.work_dir / "rules"
+        return scanner
+
+    def _produce(self):
+        for job in range(self.jobs):
+            self.queue.put({'job': job, 'target': self.targets[job % len(self.targets)],
+                            'submitted': time.monotonic()})
+            if self.arrival_rate:
+                time.sleep(1.0 / self.arrival_rate)
+        for _ in range(self.concurrency):
+            self.queue.put(None)
+
+    def _work(self):
+        while True:
+            job = self.queue.get()
+            if job is None:
+                return
+            start = time.monotonic()
+            record = {'job': job['job'], 'target': str(job['target']), 'queue_wait': start - job['submitted']}
+            try:
+                report = self._scanner(job['target']).run_comprehensive_scan()
+                statuses = {tool: result.get('status') for tool, result in report['tool_results'].items()}
+                record['failed_tools'] = sorted(t for t, s in statuses.items() if s not in ('success', 'skipped'))
+            except Exception as e:
+                record['failed_tools'] = ['scan']
+                record['error'] = str(e)
+            end = time.monotonic()
+            record.update(latency=end - start, total=end - job['submitted'], finished=end - self.started)
+            with self.lock:
+                self.records.append(record)
+                self.completed += 1
+
+    def _cache_counts(self) -> Dict[str, Dict[str, float]]:
+        return {cache: {result: metrics.CACHE_REQUESTS.value(cache=cache, result=result) for result in ('hit', 'miss')}
+                for cache in CACHES}
+
+    def run(self) -> Dict[str, Any]:
+        """Führt den Lasttest aus und liefert die Auswertung"""
+        self._prepare()
+        saved_env = {key: os.environ.get(key) for key in self._stub_environment()}
+        os.environ.update(self._stub_environment())
+        caches_before = self._cache_counts()
+
+        gc.collect()
+        self.started = time.monotonic()
+        sampler = MemorySampler(self, self.sample_interval)
+        sampler.sample()
+        sampler.start()
+        threads = [threading.Thread(target=self._produce, name='load-producer')]
+        threads += [threading.Thread(target=self._work, name=f'load-worker-{i}') for i in range(self.concurrency)]
+        try:
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            wall = time.monotonic() - self.started
+            gc.collect()
+            sampler.stop()
+            for key, value in saved_env.items():
+                if value is None:
+                    os.environ.pop(key, None)
+                else:
+                    os.environ[key] = value
+
+        return self.summarize(wall, sampler.samples, caches_before, self._cache_counts())
+
+    def summarize(self, wall: float, samples: List[Dict[str, Any]], caches_before: Dict[str, Dict[str, float]],
+                  caches_after: Dict[str, Dict[str, float]]) -> Dict[str, Any]:
+        failed = [r for r in self.records if r['failed_tools']]
+        caches = {}
+        for cache in CACHES:
+            hits = caches_after[cache]['hit'] - caches_before[cache]['hit']
+            misses = caches_after[cache]['miss'] - caches_before[cache]['miss']
+            caches[cache] = {'hits': int(hits), 'misses': int(misses),
+                             'hit_rate': round(hits / (hits + misses), 4) if hits + misses else None}
+
+        # Aufwärmphase (Imports, erste Cache-Einträge) nicht als Wachstum werten
+        warm = [s for s in samples if s['completed'] >= self.warmup * self.jobs] or samples
+        return {
+            'config': {'jobs': self.jobs, 'concurrency': self.concurrency, 'arrival_rate': self.arrival_rate,
+                       'latency': self.latency, 'tool_latency': self.tool_latency, 'jitter': self.jitter,
+                       'output_kb': self.output_kb, 'targets': [str(t) for t in self.targets]},
+            'jobs': {'completed': len(self.records), 'failed': len(failed),
+                     'failed_tools': sorted({tool for r in failed for tool in r['failed_tools']})},
+            'wall_seconds': round(wall, 3),
+            'throughput_per_second': round(len(self.records) / wall, 4) if wall else None,
+            'latency_seconds': percentiles([r['latency'] for r in self.records]),
+            'queue_wait_seconds': percentiles([r['queue_wait'] for r in self.records]),
+            'end_to_end_seconds': percentiles([r['total'] for r in self.records]),
+            'cache': caches,
+            'memory': {
+                'start_bytes': samples[0]['rss_bytes'],
+                'end_bytes': samples[-1]['rss_bytes'],
+                'peak_bytes': max(s['rss_bytes'] for s in samples),
+                'growth_after_warmup_bytes': warm[-1]['rss_bytes'] - warm[0]['rss_bytes'],
+                'growth_per_job_bytes': round(memory_slope(warm), 1),
+                'timeline': samples,
+            },
+        }
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    mb = 1024 * 1024
+    memory = summary['memory']
+    lines = [
+        f"Jobs:        {summary['jobs']['completed']} completed, {summary['jobs']['failed']} failed "
+        f"in {summary['wall_seconds']}s ({summary['config']['concurrency']} concurrent)",
+        f"Throughput:  {summary['throughput_per_second']} scans/s",
+    ]
+    for label, key in (('Latency', 'latency_seconds'), ('Queue wait', 'queue_wait_seconds'),
+                       ('End-to-end', 'end_to_end_seconds')):
+        stats = summary[key]
+        lines.append(f"{label + ':':<13}" + ' '.join(f"{name}={value:.3f}s" for name, value in stats.items()))
+    for cache, stats in summary['cache'].items():
+        rate = f"{stats['hit_rate']:.1%}" if stats['hit_rate'] is not None else 'n/a'
+        lines.append(f"Cache:       {cache} {rate} ({stats['hits']} hits, {stats['misses']} misses)")
+    lines.append(f"Memory:      {memory['start_bytes'] / mb:.1f} MB -> {memory['end_bytes'] / mb:.1f} MB "
+                 f"(peak {memory['peak_bytes'] / mb:.1f} MB, {memory['growth_per_job_bytes'] / 1024:.1f} KB/job "
+                 f"after warmup)")
+    return '\n'.join(lines)
+
+
+def parse_tool_latency(values: List[str]) -> Dict[str, float]:
+    latencies = {}
+    for value in values:
+        tool, _, seconds = value.partition('=')
+        # Der npx-Stub steht für ESLint und liest STUB_LATENCY_ESLINT
+        tool = 'eslint' if tool == 'npx' else tool
+        if tool not in LATENCY_TOOLS:
+            raise argparse.ArgumentTypeError(f"Unknown tool {tool}, expected one of {', '.join(LATENCY_TOOLS)}")
+        latencies[tool] = float(seconds)
+    return latencies
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Concurrent load test for the S7 security scanner')
+    parser.add_argument('--jobs', type=int, default=50, help='Number of scan jobs')
+    parser.add_argument('--concurrency', type=int, default=4, help='Scans running at the same time')
+    parser.add_argument('--arrival-rate', type=float, default=None,
+                        help='Jobs submitted per second (default: all at once)')
+    parser.add_argument('--targets', nargs='*', default=[],
+                        help='Source directories to scan (default: generated projects)')
+    parser.add_argument('--generated-targets', type=int, default=2, help='Generated projects if no --targets')
+    parser.add_argument('--files', type=int, default=20, help='Source files per generated project and language')
+    parser.add_argument('--latency', type=float, default=0.05, help='Stub tool latency in seconds')
+    parser.add_argument('--tool-latency', action='append', default=[], metavar='TOOL=SECONDS',
+                        help=f"Per-tool latency ({', '.join(LATENCY_TOOLS)}), e.g. dependency-check=2.0")
+    parser.add_argument('--jitter', type=float, default=0.0, help='Relative latency jitter (0.2 = +/-20%%)')
+    parser.add_argument('--output-kb', type=float, default=4, help='Approximate output size per tool run')
+    parser.add_argument('--sample-interval', type=float, default=0.5, help='Seconds between memory samples')
+    parser.add_argument('--work-dir', default=None, help='Keep stubs, config and reports here')
+    parser.add_argument('--json', dest='json_file', default=None, help='Write the full summary to this file')
+    parser.add_argument('--verbose', action='store_true', help='Keep scanner INFO logging')
+    return parser.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    args = parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    if not args.verbose:
+        logging.getLogger('security-scanner').setLevel(logging.WARNING)
+
+    work_dir = Path(args.work_dir) if args.work_dir else Path(tempfile.mkdtemp(prefix='scanner-load-'))
+    try:
+        targets = [Path(t).resolve() for t in args.targets] or [
+            create_target(work_dir / "targets" / f"project-{i}", args.files) for i in range(args.generated_targets)]
+        harness = LoadHarness(targets, work_dir, args.jobs, args.concurrency, args.arrival_rate, args.latency,
+                              parse_tool_latency(args.tool_latency), args.jitter, args.output_kb,
+                              args.sample_interval)
+        summary = harness.run()
+    finally:
+        if not args.work_dir:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    print(format_summary(summary))
+    if args.json_file:
+        with open(args.json_file, 'w') as f:
+            json.dump(summary, f, indent=2)
+    return 1 if summary['jobs']['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
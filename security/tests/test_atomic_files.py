@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Test Suite für atomare Dateien und Locks von Agent S7
+Testet parallele Schreiber auf demselben Reports-Volume
+"""
+
+import unittest
+import os
+import json
+import tempfile
+import shutil
+import threading
+from pathlib import Path
+import sys
+
+# Füge Security Scanner zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+from atomic_files import atomic_write, file_lock, new_run_id, write_json_atomic
+from dependency_cache import DependencyCheckCache
+
+
+class TestAtomicFiles(unittest.TestCase):
+    """Test Suite für atomic_write und file_lock"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        shutil.rmtree(self.test_dir)
+
+    def test_readers_never_see_partial_files(self):
+        """Test: Parallele Schreiber und Leser sehen immer vollständiges JSON"""
+        target = self.test_dir / "gitleaks-report.json"
+        write_json_atomic(target, {'writer': -1})
+        errors = []
+
+        def write(writer):
+            for _ in range(50):
+                write_json_atomic(target, {'writer': writer, 'payload': 'x' * 20000})
+
+        def read():
+            for _ in range(200):
+                try:
+                    json.loads(target.read_text())
+                except json.JSONDecodeError as e:
+                    errors.append(e)
+
+        threads = [threading.Thread(target=write, args=(i,)) for i in range(4)] + [threading.Thread(target=read)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        self.assertEqual([p.name for p in self.test_dir.iterdir()], ["gitleaks-report.json"])
+
+    def test_failed_write_keeps_previous_file(self):
+        """Test: Ein abgebrochener Schreibvorgang hinterlässt weder Teil- noch Temp-Dateien"""
+        target = self.test_dir / "report.json"
+        target.write_text('{"ok": true}')
+
+        with self.assertRaises(RuntimeError):
+            with atomic_write(target) as f:
+                f.write('{"ok": ')
+                raise RuntimeError("tool crashed")
+
+        self.assertEqual(json.loads(target.read_text()), {'ok': True})
+        self.assertEqual(len(list(self.test_dir.iterdir())), 1)
+
+    def test_non_blocking_lock_reports_contention(self):
+        """Test: Ein belegter Lock wird ohne Warten gemeldet, Shared-Locks teilen sich"""
+        lock = self.test_dir / ".lock"
+
+        with file_lock(lock) as acquired:
+            self.assertTrue(acquired)
+            with file_lock(lock, blocking=False) as second:
+                self.assertFalse(second)
+
+        with file_lock(lock, shared=True), file_lock(lock, shared=True, blocking=False) as second:
+            self.assertTrue(second)
+
+    def test_run_ids_are_unique(self):
+        """Test: Run-IDs unterscheiden Läufe innerhalb derselben Sekunde"""
+        self.assertEqual(len({new_run_id() for _ in range(100)}), 100)
+
+    def test_concurrent_cache_saves_keep_both_entries(self):
+        """Test: Zwei Läufe mit verschiedenen Manifesten verlieren keine Cache-Einträge"""
+        cache_file = self.test_dir / "dependency-check-cache.json"
+        first = DependencyCheckCache(cache_file, self.test_dir).load()
+        second = DependencyCheckCache(cache_file, self.test_dir).load()
+
+        first.store('backend/Booking.Api.csproj', {'ecosystem': 'nuget', 'hash': 'a'}, [])
+        second.store('frontend/package-lock.json', {'ecosystem': 'npm', 'hash': 'b'}, [])
+        first.save()
+        second.save()
+
+        self.assertEqual(set(DependencyCheckCache(cache_file, self.test_dir).load().entries),
+                         {'backend/Booking.Api.csproj', 'frontend/package-lock.json'})
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test Suite für den verteilten Scan von Agent S7
+Lokale Worker-Prozesse stehen stellvertretend für Worker-Pods
+"""
+
+import unittest
+import os
+import time
+import threading
+import tempfile
+import shutil
+from pathlib import Path
+import sys
+
+# Füge Security Scanner zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+from distributed import ScanCoordinator, merge_shard_results, plan_shards, start_local_workers
+from findings import make_finding, select_top
+
+AUTHKEY = b'test-authkey'
+
+
+class StubScanner:
+    """Scanner-Ersatz ohne externe Tools"""
+
+    def __init__(self, source_dir: Path, crash_on_shard: bool = False, skipped: dict = None,
+                 reports_dir: Path = None):
+        self.source_dir = source_dir
+        self.reports_dir = reports_dir
+        self._work_dir = None
+        self.crash_on_shard = crash_on_shard
+        self.skipped = skipped or {}
+        self.tools = {tool: {'enabled': True} for tool in self.tool_runners()}
+
+    @property
+    def work_dir(self):
+        if self._work_dir is None:
+            self._work_dir = self.reports_dir / "runs" / str(os.getpid())
+            self._work_dir.mkdir(parents=True)
+        return self._work_dir
+
+    def cleanup_work_dir(self):
+        if self._work_dir is not None:
+            shutil.rmtree(self._work_dir, ignore_errors=True)
+            self._work_dir = None
+
+    def skip_reason(self, tool):
+        return self.skipped.get(tool)
+
+    def tool_runners(self):
+        return {'semgrep': self._semgrep, 'trivy': self._trivy, 'eslint_security': self._eslint}
+
+    def run_shard(self, shard):
+        if self.crash_on_shard:
+            os._exit(1)
+        time.sleep(0.05)
+        runner = self.tool_runners()[shard['tool']]
+        return runner([self.source_dir / target for target in shard.get('targets') or []])
+
+    def select_report_findings(self, tool, findings):
+        return select_top(findings, 10)
+
+    def _semgrep(self, targets):
+        findings = [make_finding('semgrep', rule_id='sqli', severity='HIGH',
+                                 path=str(target.relative_to(self.source_dir))) for target in targets]
+        return {'tool': 'semgrep', 'status': 'success', 'findings': findings}
+
+    def _trivy(self, targets):
+        result = {'tool': 'trivy', 'status': 'success', 'total_vulnerabilities': 0,
+                  'critical_vulnerabilities': 0, 'findings': []}
+        if self.reports_dir is not None:
+            report_file = self.work_dir / "trivy-report.json"
+            report_file.write_text('{"Results": []}')
+            result['report_file'] = str(report_file)
+        return result
+
+    def _eslint(self, targets):
+        return {'tool': 'eslint_security', 'status': 'success', 'files_scanned': len(targets),
+                'findings': [make_finding('eslint_security', rule_id='security/detect-eval-with-expression',
+                                          severity='HIGH')]}
+
+
+class TestDistributedScan(unittest.TestCase):
+    """Test Suite für Coordinator und Worker"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.source_dir = Path(tempfile.mkdtemp())
+        for directory in ['backend', 'docs', 'frontend/src', 'frontend/pages', 'frontend/node_modules']:
+            (self.source_dir / directory).mkdir(parents=True)
+        (self.source_dir / 'README.md').write_text('# Booking')
+        (self.source_dir / 'frontend' / 'next.config.js').write_text('module.exports = {}')
+        (self.source_dir / 'frontend' / 'package.json').write_text('{}')
+
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        shutil.rmtree(self.source_dir)
+
+    def test_plan_shards_per_tool_and_directory(self):
+        """Test: Semgrep und ESLint werden pro Verzeichnis geshardet"""
+        shards = {shard['id']: shard for shard in plan_shards(StubScanner(self.source_dir))}
+
+        self.assertIn('semgrep:backend', shards)
+        self.assertIn('semgrep:frontend', shards)
+        self.assertEqual(shards['semgrep:./*']['targets'], ['README.md'])
+        self.assertIn('eslint_security:frontend/src', shards)
+        self.assertNotIn('eslint_security:frontend/node_modules', shards)
+        self.assertEqual(shards['eslint_security:frontend/*']['targets'], ['frontend/next.config.js'])
+        self.assertNotIn('targets', shards['trivy'])
+
+    def test_local_workers_process_all_shards(self):
+        """Test: Mehrere lokale Worker bearbeiten alle Shards, Ergebnisse werden zusammengeführt"""
+        scanner = StubScanner(self.source_dir)
+        coordinator = ScanCoordinator(scanner, ('127.0.0.1', 0), AUTHKEY)
+        workers = start_local_workers(3, lambda: StubScanner(self.source_dir), coordinator.address, AUTHKEY)
+
+        results = coordinator.serve(timeout=30)
+        for worker in workers:
+            worker.join(timeout=10)
+
+        self.assertEqual(results['semgrep']['status'], 'success')
+        self.assertEqual(results['semgrep']['shards'], 4)
+        self.assertEqual(results['semgrep']['total_issues'], 4)
+        self.assertEqual(results['eslint_security']['files_scanned'], 3)
+        self.assertEqual(results['eslint_security']['security_issues'], 3)
+        self.assertEqual(results['trivy']['status'], 'success')
+        self.assertGreater(len(coordinator.workers), 1)
+        self.assertTrue(all(worker.exitcode == 0 for worker in workers))
+
+    def test_worker_cleans_up_work_dir_per_shard(self):
+        """Test: Worker räumen runs/<run_id> nach jedem Shard auf und senden keine Worker-Pfade"""
+        reports_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, reports_dir)
+        coordinator = ScanCoordinator(StubScanner(self.source_dir), ('127.0.0.1', 0), AUTHKEY)
+        workers = start_local_workers(1, lambda: StubScanner(self.source_dir, reports_dir=reports_dir),
+                                      coordinator.address, AUTHKEY)
+
+        results = coordinator.serve(timeout=30)
+        workers[0].join(timeout=10)
+
+        self.assertEqual(results['trivy']['status'], 'success')
+        self.assertNotIn('report_file', results['trivy'])
+        self.assertEqual(list((reports_dir / "runs").iterdir()), [])
+
+    def test_shard_of_lost_worker_is_requeued(self):
+        """Test: Shards eines abgestürzten Workers werden neu verteilt"""
+        scanner = StubScanner(self.source_dir)
+        coordinator = ScanCoordinator(scanner, ('127.0.0.1', 0), AUTHKEY)
+        served = {}
+        server = threading.Thread(target=lambda: served.update(coordinator.serve(timeout=30)))
+        server.start()
+
+        crashing = start_local_workers(1, lambda: StubScanner(self.source_dir, crash_on_shard=True),
+                                       coordinator.address, AUTHKEY)
+        crashing[0].join(timeout=10)
+        healthy = start_local_workers(1, lambda: StubScanner(self.source_dir), coordinator.address, AUTHKEY)
+
+        server.join(timeout=30)
+        healthy[0].join(timeout=10)
+        results = served
+
+        self.assertNotEqual(crashing[0].exitcode, 0)
+        self.assertEqual(len(coordinator.results), len(coordinator.shards))
+        self.assertEqual(results['semgrep']['total_issues'], 4)
+
+    def test_serve_times_out_without_workers(self):
+        """Test: Ohne Worker laufen die Shards in den Timeout"""
+        coordinator = ScanCoordinator(StubScanner(self.source_dir), ('127.0.0.1', 0), AUTHKEY)
+
+        results = coordinator.serve(timeout=0.2)
+
+        self.assertEqual(results['trivy']['status'], 'timeout')
+        self.assertEqual(results['semgrep']['status'], 'timeout')
+
+    def test_skipped_tool_is_not_distributed(self):
+        """Test: Tools ohne Eingaben werden nicht an Worker verteilt"""
+        scanner = StubScanner(self.source_dir, skipped={'trivy': 'no nuget/npm/pip lockfiles'})
+        coordinator = ScanCoordinator(scanner, ('127.0.0.1', 0), AUTHKEY)
+
+        self.assertNotIn('trivy', [shard['id'] for shard in coordinator.pending])
+
+        results = coordinator.serve(timeout=0.2)
+
+        self.assertEqual(results['trivy']['status'], 'skipped')
+        self.assertEqual(results['trivy']['reason'], 'no nuget/npm/pip lockfiles')
+
+    def test_merge_reports_failed_shards(self):
+        """Test: Fehlgeschlagene Shards bleiben im Ergebnis sichtbar"""
+        shard_results = [
+            {'tool': 'semgrep', 'status': 'success', 'shard_id': 'semgrep:backend', 'shard_targets': ['backend'],
+             'findings': [make_finding('semgrep', severity='HIGH')]},
+            {'tool': 'semgrep', 'status': 'timeout', 'shard_id': 'semgrep:frontend', 'shard_targets': ['frontend']},
+        ]
+
+        merged = merge_shard_results('semgrep', shard_results, StubScanner(self.source_dir))
+
+        self.assertEqual(merged['status'], 'success')
+        self.assertEqual(merged['critical_issues'], 1)
+        self.assertEqual(merged['failed_shards'][0]['shard'], 'semgrep:frontend')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
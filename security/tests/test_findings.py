@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Test Suite für normalisierte Findings von Agent S7
+Testet Normalisierung und die Top-N-Auswahl für Reports
+"""
+
+import unittest
+import os
+import sys
+
+# Füge Security Scanner zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+from findings import TopFindings, make_finding, normalize_dependency_check, normalize_trivy, select_top
+
+
+class TestTopFindings(unittest.TestCase):
+    """Test Suite für die begrenzte Top-N-Auswahl"""
+
+    def test_ranks_by_severity_before_arrival_order(self):
+        """Test: Severity schlägt Reihenfolge"""
+        findings = [make_finding('semgrep', rule_id=f"low-{i}", severity='LOW') for i in range(50)]
+        findings.append(make_finding('semgrep', rule_id='critical', severity='CRITICAL'))
+        findings.append(make_finding('semgrep', rule_id='high', severity='HIGH'))
+
+        top = select_top(findings, 3)
+
+        self.assertEqual([f['rule_id'] for f in top], ['critical', 'high', 'low-0'])
+
+    def test_cvss_and_exploitability_break_ties(self):
+        """Test: CVSS und Ausnutzbarkeit entscheiden bei gleicher Severity"""
+        findings = [
+            make_finding('trivy', vulnerability_id='CVE-A', severity='HIGH', cvss_score=7.0),
+            make_finding('trivy', vulnerability_id='CVE-B', severity='HIGH', cvss_score=8.8),
+            make_finding('trivy', vulnerability_id='CVE-C', severity='HIGH', cvss_score=7.0, exploitability=3),
+        ]
+
+        top = select_top(findings, 3)
+
+        self.assertEqual([f['vulnerability_id'] for f in top], ['CVE-B', 'CVE-C', 'CVE-A'])
+
+    def test_heap_never_exceeds_limit(self):
+        """Test: Der Heap bleibt beim Streaming auf limit Einträge begrenzt"""
+        top = TopFindings(5)
+
+        for i in range(1000):
+            top.push(make_finding('eslint_security', rule_id=f"rule-{i}", severity='MEDIUM', cvss_score=i % 10))
+            self.assertLessEqual(len(top._heap), 5)
+
+        self.assertEqual(top.seen, 1000)
+        self.assertTrue(all(f['cvss_score'] == 9 for f in top.items()))
+
+    def test_zero_limit_selects_nothing(self):
+        """Test: limit 0 liefert keine Findings"""
+        self.assertEqual(select_top([make_finding('gitleaks', severity='CRITICAL')], 0), [])
+
+
+class TestNormalization(unittest.TestCase):
+    """Test Suite für die Normalisierung der Tool-Ausgaben"""
+
+    def test_trivy_vulnerabilities_are_flattened(self):
+        """Test: Trivy-Vulnerabilities aller Targets werden zu Findings"""
+        scan_data = {'Results': [
+            {'Target': 'frontend/package-lock.json', 'Vulnerabilities': [
+                {'VulnerabilityID': 'CVE-2021-44906', 'PkgName': 'minimist', 'Severity': 'CRITICAL',
+                 'CweIDs': ['CWE-1321'], 'CVSS': {'nvd': {'V3Score': 9.8, 'V3Vector': 'CVSS:3.1/AV:N/AC:L'}}}
+            ]},
+            {'Target': 'backend/Booking.Api.csproj', 'Vulnerabilities': None},
+        ]}
+
+        findings = normalize_trivy(scan_data)
+
+        self.assertEqual(len(findings), 1)
+        self.assertEqual(findings[0]['severity'], 'CRITICAL')
+        self.assertEqual(findings[0]['cwes'], ['CWE-1321'])
+        self.assertEqual(findings[0]['exploitability'], 1)
+
+    def test_dependency_check_known_exploited(self):
+        """Test: Bekannt ausgenutzte Vulnerabilities werden höher gewichtet"""
+        findings = normalize_dependency_check([{
+            'fileName': 'lodash:4.17.15',
+            'sha1': 'f1a2b3',
+            'filePath': '/app/src/frontend/package-lock.json?lodash',
+            'packages': [{'id': 'pkg:npm/lodash@4.17.15'}],
+            'vulnerabilities': [{'name': 'CVE-2021-23337', 'severity': 'HIGH',
+                                 'knownExploitedVulnerability': {'name': 'Lodash'}}]
+        }])
+
+        self.assertEqual(findings[0]['exploitability'], 3)
+        self.assertEqual(findings[0]['package_ids'], ['pkg:npm/lodash@4.17.15'])
+        self.assertEqual(findings[0]['path'], '/app/src/frontend/package-lock.json')
+        self.assertEqual(findings[0]['file_path'], '/app/src/frontend/package-lock.json?lodash')
+        self.assertEqual(findings[0]['sha1'], 'f1a2b3')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
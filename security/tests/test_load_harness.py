@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+Test Suite für den Lasttest-Harness von Agent S7
+Testet eine kleine Last gegen Stub-Tools und die Auswertung
+"""
+
+import unittest
+import argparse
+import os
+import tempfile
+import shutil
+from pathlib import Path
+import sys
+
+# Füge Security Scanner und Harness zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+sys.path.insert(0, os.path.dirname(__file__))
+
+from load_harness import LoadHarness, create_target, memory_slope, parse_tool_latency, percentiles
+
+
+class TestLoadHarness(unittest.TestCase):
+    """Test Suite für LoadHarness"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.work_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        shutil.rmtree(self.work_dir)
+
+    def test_small_load_completes_with_cache_hits(self):
+        """Test: Alle Jobs laufen durch, wiederholte Scans treffen die Caches"""
+        target = create_target(self.work_dir / "target", files=2)
+        harness = LoadHarness([target], self.work_dir, jobs=6, concurrency=2, latency=0.01,
+                              output_kb=1, sample_interval=0.05)
+
+        summary = harness.run()
+
+        self.assertEqual(summary['jobs'], {'completed': 6, 'failed': 0, 'failed_tools': []})
+        self.assertEqual(set(summary['latency_seconds']), {'p50', 'p90', 'p95', 'p99', 'mean', 'max'})
+        self.assertGreater(summary['throughput_per_second'], 0)
+        self.assertGreater(summary['cache']['dependency_check']['hit_rate'], 0)
+        self.assertGreater(summary['cache']['semgrep_rules']['hit_rate'], 0)
+        self.assertGreaterEqual(len(summary['memory']['timeline']), 2)
+        self.assertEqual(len(list((self.work_dir / "reports").glob("security-report-*.json"))), 6)
+
+    def test_percentiles_use_nearest_rank(self):
+        """Test: Perzentile nach Nearest-Rank über die sortierten Werte"""
+        stats = percentiles([float(i) for i in range(1, 101)])
+
+        self.assertEqual((stats['p50'], stats['p90'], stats['p99']), (50.0, 90.0, 99.0))
+        self.assertEqual(stats['max'], 100.0)
+        self.assertEqual(percentiles([]), {})
+
+    def test_tool_latency_names_match_stub_variables(self):
+        """Test: npx wird auf ESLint abgebildet, unbekannte Tools werden abgelehnt"""
+        self.assertEqual(parse_tool_latency(['npx=1.5', 'dependency-check=2']),
+                         {'eslint': 1.5, 'dependency-check': 2.0})
+
+        with self.assertRaises(argparse.ArgumentTypeError) as context:
+            parse_tool_latency(['sonarqube=1'])
+        self.assertIn('eslint', str(context.exception))
+        self.assertNotIn('npx', str(context.exception))
+
+    def test_memory_slope_per_job(self):
+        """Test: Speicherwachstum wird pro abgeschlossenem Job geschätzt"""
+        samples = [{'completed': jobs, 'rss_bytes': 1000 + 50 * jobs} for jobs in (0, 2, 4, 8)]
+
+        self.assertAlmostEqual(memory_slope(samples), 50.0)
+        self.assertEqual(memory_slope(samples[:1]), 0.0)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
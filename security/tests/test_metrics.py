@@ -0,0 +1,95 @@
+#!/usr/bin/env python3
+"""
+Test Suite für die Metriken von Agent S7
+Testet das OpenMetrics-Format, den Textfile-Export und den Scrape-Endpoint
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+import urllib.request
+from pathlib import Path
+
+# Füge Security Scanner zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+from metrics import MetricsRegistry
+
+
+class TestMetricsRegistry(unittest.TestCase):
+    """Test Suite für MetricsRegistry"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.registry = MetricsRegistry()
+        self.runs = self.registry.counter('scanner_tool_runs', 'Tool runs', ['tool', 'status'])
+        self.duration = self.registry.histogram('scanner_tool_duration_seconds', 'Tool duration', ['tool'],
+                                                buckets=(1, 10))
+        self.queue = self.registry.gauge('scanner_queue_depth', 'Queue depth')
+
+    def test_openmetrics_exposition(self):
+        """Test: Counter, Histogram und Gauge im OpenMetrics-Format"""
+        self.runs.inc(tool='trivy', status='success')
+        self.runs.inc(tool='trivy', status='success')
+        self.duration.observe(4.5, tool='trivy')
+        self.queue.set_function(lambda: 7)
+
+        text = self.registry.render()
+
+        self.assertIn('# TYPE scanner_tool_runs counter', text)
+        self.assertIn('scanner_tool_runs_total{tool="trivy",status="success"} 2', text)
+        self.assertIn('scanner_tool_duration_seconds_bucket{tool="trivy",le="1"} 0', text)
+        self.assertIn('scanner_tool_duration_seconds_bucket{tool="trivy",le="10"} 1', text)
+        self.assertIn('scanner_tool_duration_seconds_bucket{tool="trivy",le="+Inf"} 1', text)
+        self.assertIn('scanner_tool_duration_seconds_sum{tool="trivy"} 4.5', text)
+        self.assertIn('scanner_queue_depth 7', text)
+        self.assertTrue(text.endswith('# EOF\n'))
+
+    def test_prometheus_text_format_names_counters_with_total(self):
+        """Test: Das klassische Textformat nutzt _total im TYPE und kein EOF"""
+        self.runs.inc(tool='gitleaks', status='timeout')
+
+        text = self.registry.render(openmetrics=False)
+
+        self.assertIn('# TYPE scanner_tool_runs_total counter', text)
+        self.assertNotIn('# EOF', text)
+
+    def test_wrong_labels_are_rejected(self):
+        """Test: Fehlende Labels fallen sofort auf"""
+        with self.assertRaises(ValueError):
+            self.runs.inc(tool='trivy')
+
+    def test_textfile_is_written_atomically(self):
+        """Test: Textfile für den node_exporter wird vollständig ersetzt"""
+        test_dir = Path(tempfile.mkdtemp())
+        try:
+            path = test_dir / "textfile" / "security-scanner.prom"
+            self.runs.inc(tool='semgrep', status='error')
+
+            self.registry.write_textfile(path)
+
+            self.assertIn('scanner_tool_runs_total{tool="semgrep",status="error"} 1', path.read_text())
+            self.assertEqual([p.name for p in path.parent.iterdir()], ['security-scanner.prom'])
+        finally:
+            shutil.rmtree(test_dir)
+
+    def test_scrape_endpoint(self):
+        """Test: /metrics liefert je nach Accept-Header OpenMetrics oder Prometheus-Text"""
+        self.queue.set(3)
+        server = self.registry.serve(0, host='127.0.0.1')
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/metrics"
+            request = urllib.request.Request(url, headers={'Accept': 'application/openmetrics-text'})
+            with urllib.request.urlopen(request, timeout=5) as response:
+                self.assertTrue(response.headers['Content-Type'].startswith('application/openmetrics-text'))
+                self.assertIn('scanner_queue_depth 3', response.read().decode('utf-8'))
+            with urllib.request.urlopen(url, timeout=5) as response:
+                self.assertTrue(response.headers['Content-Type'].startswith('text/plain'))
+        finally:
+            self.registry.shutdown()
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
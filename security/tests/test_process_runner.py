@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+Test Suite für den Prozess-Runner von Agent S7
+Testet Timeouts, Prozessgruppen und begrenzte Ausgabe-Puffer mit echten Prozessen
+"""
+
+import unittest
+import asyncio
+import os
+import sys
+import time
+import tempfile
+import shutil
+import subprocess
+from pathlib import Path
+
+# Füge Security Scanner zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+from process_runner import BoundedTail, run_command, run_command_async
+
+
+def _alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # Zombies zählen nicht als laufend
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split()[2] != 'Z'
+    except FileNotFoundError:
+        return False
+
+
+class TestProcessRunner(unittest.TestCase):
+    """Test Suite für run_command"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.test_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        shutil.rmtree(self.test_dir)
+
+    def _wait_for_dead(self, pid: int, seconds: float = 5.0) -> bool:
+        deadline = time.time() + seconds
+        while time.time() < deadline:
+            if not _alive(pid):
+                return True
+            time.sleep(0.05)
+        return False
+
+    def test_captures_output_and_returncode(self):
+        """Test: stdout, stderr und Return Code wie bei subprocess.run"""
+        result = run_command([sys.executable, '-c',
+                              'import sys; print("out"); print("err", file=sys.stderr); sys.exit(3)'], timeout=10)
+
+        self.assertEqual(result.returncode, 3)
+        self.assertEqual(result.stdout.strip(), 'out')
+        self.assertEqual(result.stderr.strip(), 'err')
+        self.assertFalse(result.spilled)
+
+    def test_large_output_spills_to_disk(self):
+        """Test: Große Ausgaben werden ausgelagert und bleiben vollständig"""
+        result = asyncio.run(run_command_async(
+            [sys.executable, '-c', 'import sys; sys.stdout.write("x" * 3_000_000)'],
+            timeout=30, spool_limit=1024 * 1024))
+
+        self.assertTrue(result.spilled)
+        self.assertEqual(len(result.stdout), 3_000_000)
+        result.close()
+
+    def test_json_is_parsed_from_spilled_output(self):
+        """Test: JSON wird direkt aus der ausgelagerten Datei geparst, close() löscht sie"""
+        script = 'import json, sys; json.dump({"results": ["x" * 100] * 20000}, sys.stdout)'
+        with asyncio.run(run_command_async([sys.executable, '-c', script], timeout=30,
+                                           spool_limit=1024 * 1024)) as result:
+            self.assertTrue(result.spilled)
+            self.assertEqual(len(result.load_json()['results']), 20000)
+
+        self.assertTrue(result.stdout_file.closed)
+
+    def test_empty_output_yields_default(self):
+        """Test: Leeres stdout liefert den Default statt eines Parse-Fehlers"""
+        with run_command([sys.executable, '-c', 'pass'], timeout=10) as result:
+            self.assertEqual(result.load_json({'Results': []}), {'Results': []})
+
+    def test_stderr_is_bounded_while_stdout_is_drained(self):
+        """Test: Viel stderr blockiert den Prozess nicht und wird gekürzt"""
+        result = asyncio.run(run_command_async(
+            [sys.executable, '-c',
+             'import sys; sys.stderr.write("e" * 2_000_000 + "END"); print("done")'],
+            timeout=30, stderr_limit=1024))
+
+        self.assertEqual(result.stdout.strip(), 'done')
+        self.assertEqual(len(result.stderr), 1024)
+        self.assertTrue(result.stderr.endswith('END'))
+
+    def test_timeout_kills_grandchildren(self):
+        """Test: Beim Timeout wird die ganze Prozessgruppe beendet"""
+        pid_file = self.test_dir / "grandchild.pid"
+        script = f"sleep 60 & echo $! > {pid_file}; wait"
+
+        with self.assertRaises(subprocess.TimeoutExpired):
+            run_command(['sh', '-c', script], timeout=1)
+
+        grandchild = int(pid_file.read_text())
+        self.assertTrue(self._wait_for_dead(grandchild))
+
+    def test_finished_tool_leaves_no_orphans(self):
+        """Test: Hintergrundprozesse eines beendeten Tools werden aufgeräumt"""
+        pid_file = self.test_dir / "orphan.pid"
+        script = f"sleep 60 & echo $! > {pid_file}; echo finished"
+
+        result = run_command(['sh', '-c', script], timeout=10)
+
+        self.assertEqual(result.stdout.strip(), 'finished')
+        self.assertTrue(self._wait_for_dead(int(pid_file.read_text())))
+
+    def test_cancellation_kills_process_group(self):
+        """Test: Ein abgebrochener Task beendet den Prozess"""
+        pid_file = self.test_dir / "cancel.pid"
+
+        async def cancel_soon():
+            task = asyncio.ensure_future(run_command_async(
+                ['sh', '-c', f"echo $$ > {pid_file}; sleep 60"], timeout=60))
+            while not pid_file.exists() or not pid_file.read_text().strip():
+                await asyncio.sleep(0.05)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(cancel_soon())
+
+        self.assertTrue(self._wait_for_dead(int(pid_file.read_text())))
+
+    def test_missing_binary_raises(self):
+        """Test: Fehlendes Tool wird wie bei subprocess.run gemeldet"""
+        with self.assertRaises(FileNotFoundError):
+            run_command(['definitely-not-a-security-tool'], timeout=5)
+
+
+class TestBoundedTail(unittest.TestCase):
+    """Test Suite für den stderr-Puffer"""
+
+    def test_keeps_only_the_tail(self):
+        """Test: Nur die letzten Bytes bleiben erhalten"""
+        tail = BoundedTail(10)
+        for _ in range(100):
+            tail.write(b'abcdefgh')
+
+        self.assertTrue(tail.truncated)
+        self.assertLessEqual(tail.size, 10 + 8)
+        self.assertEqual(tail.getvalue(), 'ghabcdefgh')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Test Suite für das Profiling von Agent S7
+Testet Sampling (Collapsed Stacks) und cProfile-Ausgabe pro Phase
+"""
+
+import unittest
+import json
+import os
+import sys
+import time
+import pstats
+import tempfile
+import shutil
+from pathlib import Path
+
+# Füge Security Scanner zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+from profiling import ScanProfiler
+
+
+def parse_results(seconds: float = 0.3):
+    """CPU-lastige Python-Arbeit wie beim Auswerten großer Tool-Ausgaben"""
+    deadline = time.monotonic() + seconds
+    payload = json.dumps([{'check_id': f"rule-{i}", 'extra': {'severity': 'ERROR'}} for i in range(2000)])
+    while time.monotonic() < deadline:
+        json.loads(payload)
+
+
+class TestScanProfiler(unittest.TestCase):
+    """Test Suite für ScanProfiler"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.report_file = self.test_dir / "security-report-20250101-120000.json"
+
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        shutil.rmtree(self.test_dir)
+
+    def test_sampling_writes_collapsed_stacks_per_phase(self):
+        """Test: Collapsed Stacks beginnen mit der Phase, Wartezeit wird nicht gezählt"""
+        profiler = ScanProfiler('sampling', interval=0.002).start()
+        with profiler.phase('tool:semgrep'):
+            parse_results()
+            time.sleep(0.2)
+
+        written = profiler.write(self.report_file)
+
+        collapsed = self.test_dir / "security-report-20250101-120000.profile.collapsed"
+        self.assertIn(collapsed, written)
+        lines = collapsed.read_text().splitlines()
+        self.assertTrue(lines)
+        self.assertTrue(any(line.startswith('scan;tool:semgrep;') and 'parse_results' in line for line in lines))
+        self.assertTrue(all(line.rsplit(' ', 1)[1].isdigit() for line in lines))
+
+        summary = json.loads((self.test_dir / "security-report-20250101-120000.profile.json").read_text())
+        self.assertGreater(summary['phases']['tool:semgrep']['cpu_samples'], 0)
+        self.assertGreaterEqual(summary['phases']['tool:semgrep']['wall_seconds'], 0.5)
+
+    def test_cprofile_writes_stats_per_phase(self):
+        """Test: Pro Phase eine pstats-Datei, verschachtelte Phasen getrennt"""
+        profiler = ScanProfiler('cprofile').start()
+        with profiler.phase('report'):
+            with profiler.phase('write'):
+                parse_results(0.05)
+
+        profiler.write(self.report_file)
+
+        stats = pstats.Stats(str(self.test_dir / "security-report-20250101-120000.report.write.pstats"))
+        self.assertTrue(any(function == 'parse_results' for (_, _, function) in stats.stats))
+        summary = json.loads((self.test_dir / "security-report-20250101-120000.profile.json").read_text())
+        self.assertIn('report/write', summary['phases'])
+        self.assertTrue(summary['phases']['report/write']['top_functions'])
+
+    def test_reset_starts_a_fresh_profile_per_scan(self):
+        """Test: Nach write() und reset() misst das zweite Profil nur den zweiten Scan"""
+        profiler = ScanProfiler('sampling', interval=0.002).start()
+        with profiler.phase('tool:semgrep'):
+            parse_results(0.3)
+        profiler.write(self.report_file)
+        first = json.loads((self.test_dir / "security-report-20250101-120000.profile.json").read_text())
+
+        second_report = self.test_dir / "security-report-20250101-130000.json"
+        profiler.reset()
+        with profiler.phase('tool:trivy'):
+            parse_results(0.3)
+        profiler.write(second_report)
+        second = json.loads((self.test_dir / "security-report-20250101-130000.profile.json").read_text())
+
+        self.assertNotIn('tool:semgrep', second['phases'])
+        self.assertGreater(second['phases']['tool:trivy']['cpu_samples'], 0)
+        self.assertLess(second['phases']['tool:trivy']['wall_seconds'], 0.3 + first['phases']['tool:semgrep']['wall_seconds'])
+        collapsed = (self.test_dir / "security-report-20250101-130000.profile.collapsed").read_text()
+        self.assertNotIn('tool:semgrep', collapsed)
+
+    def test_reset_clears_cprofile_data(self):
+        """Test: cProfile-Daten sammeln sich nicht über mehrere Scans an"""
+        profiler = ScanProfiler('cprofile').start()
+        with profiler.phase('report'):
+            parse_results(0.05)
+        profiler.write(self.report_file)
+
+        profiler.reset()
+        with profiler.phase('index'):
+            pass
+
+        self.assertEqual(list(profiler.profiles), ['index'])
+        self.assertEqual(list(profiler.wall_times), ['index'])
+
+    def test_unknown_mode_is_rejected(self):
+        """Test: Unbekannter Modus fällt sofort auf"""
+        with self.assertRaises(ValueError):
+            ScanProfiler('perf')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
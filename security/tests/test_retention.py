@@ -0,0 +1,205 @@
+#!/usr/bin/env python3
+"""
+Test Suite für die Report-Retention von Agent S7
+Testet Rollups, Deduplizierung per Content-Hash und die Alters- und Größenbudgets
+"""
+
+import unittest
+import os
+import json
+import tempfile
+import shutil
+from datetime import datetime, timedelta
+from pathlib import Path
+import sys
+
+# Füge Security Scanner zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+from atomic_files import file_lock
+from findings import make_finding
+from retention import ArtifactStore, ReportRetention, list_reports, load_retention_settings
+
+NOW = datetime(2025, 6, 30, 12, 0, 0)
+
+
+class TestReportRetention(unittest.TestCase):
+    """Test Suite für ReportRetention"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.reports_dir = Path(tempfile.mkdtemp())
+        self.retention = ReportRetention(self.reports_dir, retention_days=90, raw_report_days=7,
+                                         daily_rollup_days=30, max_size_mb=100)
+
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        shutil.rmtree(self.reports_dir)
+
+    def _write_report(self, timestamp: datetime, severity: str = 'HIGH', artifact: str = None) -> Path:
+        path = self.reports_dir / f"security-report-{timestamp.strftime('%Y%m%d-%H%M%S')}.json"
+        semgrep = {'tool': 'semgrep', 'status': 'success', 'raw_output': 'x' * 1000,
+                   'findings': [make_finding('semgrep', rule_id='sqli', severity=severity, path='Api.cs')]}
+        if artifact:
+            semgrep['report_sha256'] = artifact
+        path.write_text(json.dumps({
+            'scan_metadata': {'timestamp': timestamp.isoformat()},
+            'security_summary': {'security_score': 80},
+            'tool_results': {'semgrep': semgrep},
+        }))
+        return path
+
+    def _rollup(self, granularity: str, period: str) -> dict:
+        with open(self.reports_dir / 'rollups' / granularity / f"security-rollup-{period}.json") as f:
+            return json.load(f)
+
+    def test_old_reports_are_compacted_into_daily_rollups(self):
+        """Test: Reports älter als raw_report_days landen im Tages-Rollup, Begleitdateien verschwinden"""
+        old = self._write_report(NOW - timedelta(days=10))
+        self._write_report(NOW - timedelta(days=10, hours=1))
+        old.with_name(old.stem + '.profile.json').write_text('{}')
+        recent = self._write_report(NOW - timedelta(days=1))
+
+        summary = self.retention.run(NOW)
+
+        self.assertEqual(summary['compacted'], 2)
+        self.assertEqual([path for _, path in list_reports(self.reports_dir)], [recent])
+        self.assertEqual(list(self.reports_dir.glob('*.profile.json')), [])
+        rollup = self._rollup('daily', (NOW - timedelta(days=10)).strftime('%Y-%m-%d'))
+        self.assertEqual(len(rollup['reports']), 2)
+        self.assertEqual(rollup['reports'][0]['findings']['semgrep']['HIGH'], 1)
+
+    def test_identical_tool_results_are_stored_once(self):
+        """Test: Gleiche Tool-Ergebnisse verschiedener Läufe teilen sich einen Store-Eintrag"""
+        for days in (10, 11, 12):
+            self._write_report(NOW - timedelta(days=days))
+        self._write_report(NOW - timedelta(days=13), severity='LOW')
+        self._write_report(NOW)
+
+        self.retention.run(NOW)
+
+        blobs = [p for p in (self.reports_dir / 'artifacts').rglob('*') if p.is_file() and p.name != '.lock']
+        self.assertEqual(len(blobs), 2)
+        stored = self.retention.store.load_json(
+            self._rollup('daily', (NOW - timedelta(days=10)).strftime('%Y-%m-%d'))['reports'][0]['tool_results']['semgrep'])
+        self.assertNotIn('raw_output', stored)
+        self.assertEqual(stored['findings'][0]['rule_id'], 'sqli')
+
+    def test_daily_rollups_become_weekly_and_expire(self):
+        """Test: Tages-Rollups werden zu Wochen-Rollups, nach retention_days gelöscht"""
+        self._write_report(NOW - timedelta(days=40, hours=2))
+        self._write_report(NOW - timedelta(days=40), severity='LOW')
+        self._write_report(NOW - timedelta(days=120))
+        self._write_report(NOW)
+
+        summary = self.retention.run(NOW)
+
+        self.assertEqual(summary['rolled_up'], 2)
+        self.assertEqual(summary['expired'], 1)
+        self.assertEqual(list((self.reports_dir / 'rollups' / 'daily').iterdir()), [])
+        iso = (NOW - timedelta(days=40)).isocalendar()
+        weekly = self._rollup('weekly', f"{iso[0]}-W{iso[1]:02d}")
+        self.assertEqual(len(weekly['reports']), 1)
+        self.assertEqual(weekly['reports'][0]['runs'], 2)
+        self.assertEqual(weekly['reports'][0]['findings']['semgrep']['LOW'], 1)
+
+    def test_latest_report_is_always_kept(self):
+        """Test: Der neueste Report bleibt auch nach Ablauf aller Fristen erhalten"""
+        latest = self._write_report(NOW - timedelta(days=200))
+
+        self.retention.run(NOW)
+
+        self.assertTrue(latest.exists())
+
+    def test_unreferenced_artifacts_are_collected(self):
+        """Test: Artefakte ohne Verweis werden nach der Grace-Period entfernt, referenzierte bleiben"""
+        store = ArtifactStore(self.reports_dir / 'artifacts')
+        kept = store.put_bytes(b'gitleaks report')
+        orphan = store.put_bytes(b'old report')
+        stale = (NOW - timedelta(days=30)).timestamp()
+        for digest in (kept, orphan):
+            os.utime(store.path(digest), (stale, stale))
+        self._write_report(NOW - timedelta(days=10), artifact=kept)
+        self._write_report(NOW)
+
+        summary = self.retention.run(NOW)
+
+        self.assertEqual(summary['artifacts_removed'], 1)
+        self.assertTrue(store.path(kept).exists())
+        self.assertFalse(store.path(orphan).exists())
+
+    def test_size_budget_compacts_recent_reports(self):
+        """Test: Über dem Größenbudget werden auch junge Reports verdichtet"""
+        self.retention.max_bytes = 3000
+        for hours in (1, 2, 3, 4):
+            self._write_report(NOW - timedelta(hours=hours))
+        latest = self._write_report(NOW)
+
+        summary = self.retention.run(NOW)
+
+        self.assertLessEqual(summary['total_bytes'], 3000)
+        self.assertGreaterEqual(summary['compacted'], 1)
+        self.assertIn(latest, [path for _, path in list_reports(self.reports_dir)])
+
+    def test_size_budget_keeps_artifacts_of_running_scans(self):
+        """Test: Unter Budgetdruck bleiben frische Artefakte ohne Report (laufender Scan) erhalten"""
+        self.retention.max_bytes = 3000
+        store = ArtifactStore(self.reports_dir / 'artifacts')
+        in_flight = store.put_bytes(b'gitleaks report of a running scan')
+        orphan = store.put_bytes(b'x' * 5000)
+        recent = (NOW - timedelta(hours=1)).timestamp()
+        stale = (NOW - timedelta(days=2)).timestamp()
+        os.utime(store.path(in_flight), (recent, recent))
+        os.utime(store.path(orphan), (stale, stale))
+        self._write_report(NOW - timedelta(days=30, hours=1))
+        self._write_report(NOW - timedelta(days=30))
+        self._write_report(NOW)
+
+        self.retention.run(NOW)
+
+        self.assertTrue(store.path(in_flight).exists())
+        self.assertFalse(store.path(orphan).exists())
+
+    def test_stale_run_directories_are_removed(self):
+        """Test: Arbeitsverzeichnisse abgebrochener Läufe werden entfernt, aktive bleiben"""
+        stale = self.reports_dir / 'runs' / 'stale'
+        active = self.reports_dir / 'runs' / 'active'
+        for run_dir in (stale, active):
+            run_dir.mkdir(parents=True)
+            (run_dir / 'gitleaks-report.json').write_text('[]')
+        old = (NOW - timedelta(days=2)).timestamp()
+        os.utime(stale, (old, old))
+        os.utime(active, (NOW.timestamp(), NOW.timestamp()))
+
+        self.retention.run(NOW)
+
+        self.assertFalse(stale.exists())
+        self.assertTrue(active.exists())
+
+    def test_concurrent_retention_is_skipped(self):
+        """Test: Eine zweite Retention auf demselben Verzeichnis wartet nicht und ändert nichts"""
+        self._write_report(NOW - timedelta(days=10))
+        self._write_report(NOW)
+
+        with file_lock(self.reports_dir / '.retention.lock'):
+            summary = self.retention.run(NOW)
+
+        self.assertEqual(summary, {'skipped': 1})
+        self.assertEqual(len(list_reports(self.reports_dir)), 2)
+
+    def test_settings_from_reporting_section(self):
+        """Test: Budgets kommen aus dem reporting-Abschnitt von security-settings.json"""
+        config_dir = self.reports_dir / 'config'
+        config_dir.mkdir()
+        (config_dir / 'security-settings.json').write_text(
+            json.dumps({'reporting': {'retention_days': 30, 'max_size_mb': 10}}))
+
+        settings = load_retention_settings(config_dir)
+
+        self.assertEqual(settings['retention_days'], 30)
+        self.assertEqual(settings['max_size_mb'], 10)
+        self.assertEqual(settings['raw_report_days'], 7)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Test Suite für die Semgrep Rule-Packs von Agent S7
+Testet Pack-Auswahl, Pinning und den versionierten Rule-Set-Cache
+"""
+
+import unittest
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+
+# Füge Security Scanner zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+from rule_packs import LOCK_FILE, RulePackStore
+
+
+class TestRulePacks(unittest.TestCase):
+    """Test Suite für RulePackStore"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.test_dir = Path(tempfile.mkdtemp())
+        self.rules_dir = self.test_dir / "rules"
+        self.cache_dir = self.test_dir / "cache"
+        self.rules_dir.mkdir()
+        self._pin('p/csharp', "rules: [{id: csharp-sqli}]\n")
+        self._pin('p/javascript', "rules: [{id: js-eval}]\n")
+        self.rule_packs = {'csharp': ['p/csharp'], 'javascript': ['p/javascript'], 'python': ['p/python']}
+
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        shutil.rmtree(self.test_dir)
+
+    def _pin(self, pack: str, content: str):
+        lock_file = self.rules_dir / LOCK_FILE
+        lock = json.loads(lock_file.read_text()) if lock_file.exists() else {'version': 1, 'packs': {}}
+        filename = pack.replace('/', '-') + '.yml'
+        (self.rules_dir / filename).write_text(content)
+        lock['packs'][pack] = {'file': filename, 'sha256': hashlib.sha256(content.encode()).hexdigest()}
+        lock_file.write_text(json.dumps(lock))
+
+    def _store(self) -> RulePackStore:
+        return RulePackStore(self.rules_dir, self.cache_dir, self.rule_packs).load()
+
+    def test_only_packs_of_detected_languages_are_selected(self):
+        """Test: Rule-Set enthält nur die Packs der erkannten Sprachen"""
+        rule_set = self._store().resolve({'csharp'})
+
+        self.assertEqual(sorted(p.name for p in rule_set.iterdir()), ['p-csharp.yml'])
+
+    def test_rule_set_is_reused_until_rules_change(self):
+        """Test: Gleiche Packs und Regeln liefern denselben Cache-Eintrag"""
+        custom = self.test_dir / "semgrep-rules.yml"
+        custom.write_text("rules: [{id: booking-custom}]\n")
+
+        first = self._store().resolve({'csharp', 'javascript'}, custom)
+        second = self._store().resolve({'javascript', 'csharp'}, custom)
+        custom.write_text("rules: [{id: booking-custom-v2}]\n")
+        third = self._store().resolve({'csharp', 'javascript'}, custom)
+
+        self.assertEqual(first, second)
+        self.assertNotEqual(first, third)
+        self.assertTrue((third / "custom-semgrep-rules.yml").read_text().endswith("v2}]\n"))
+
+    def test_tampered_pack_is_rejected(self):
+        """Test: Pack mit abweichendem Hash wird nicht verwendet"""
+        (self.rules_dir / "p-csharp.yml").write_text("rules: [{id: tampered}]\n")
+
+        self.assertIsNone(self._store().resolve({'csharp'}))
+
+    def test_rejected_pack_does_not_poison_the_cache(self):
+        """Test: Ein Rule-Set ohne verworfenes Pack wird nicht unter dem vollständigen Schlüssel abgelegt"""
+        content = (self.rules_dir / "p-csharp.yml").read_text()
+        (self.rules_dir / "p-csharp.yml").write_text("rules: [{id: tampered}]\n")
+        store = self._store()
+
+        partial = store.resolve({'csharp', 'javascript'})
+
+        self.assertEqual(store.rejected, ['p/csharp'])
+        self.assertEqual(sorted(p.name for p in partial.iterdir()), ['p-javascript.yml'])
+
+        (self.rules_dir / "p-csharp.yml").write_text(content)
+        store = self._store()
+        restored = store.resolve({'csharp', 'javascript'})
+
+        self.assertEqual(store.rejected, [])
+        self.assertNotEqual(restored, partial)
+        self.assertEqual(sorted(p.name for p in restored.iterdir()), ['p-csharp.yml', 'p-javascript.yml'])
+
+    def test_unpinned_language_yields_no_rule_set(self):
+        """Test: Ohne gepinnte Packs und eigene Regeln gibt es kein Rule-Set"""
+        self.assertIsNone(self._store().resolve({'python'}))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
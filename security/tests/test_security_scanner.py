@@ -10,18 +10,37 @@ import os
 import tempfile
 import shutil
 from pathlib import Path
-from unittest.mock import Mock, patch, MagicMock
+from unittest.mock import patch, MagicMock
 import sys
 
 # Füge Security Scanner zum Python Path hinzu
-sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+SCANNER_DIR = os.path.join(os.path.dirname(__file__), '..', 'scanner')
+sys.path.insert(0, SCANNER_DIR)
 
 try:
+    # Das Script heißt security-scanner.py und ist daher nicht direkt importierbar
+    import importlib.util
+    _spec = importlib.util.spec_from_file_location(
+        'security_scanner', os.path.join(SCANNER_DIR, 'security-scanner.py'))
+    security_scanner = importlib.util.module_from_spec(_spec)
+    sys.modules['security_scanner'] = security_scanner
+    _spec.loader.exec_module(security_scanner)
     from security_scanner import SecurityScanner
-except ImportError:
+except (ImportError, FileNotFoundError):
     # Fallback für Tests ohne vollständige Scanner-Installation
+    sys.modules.pop('security_scanner', None)
     SecurityScanner = None
 
+from findings import make_finding
+from process_runner import ProcessResult
+
+
+def process_result(returncode: int = 0, stdout: str = "", stderr: str = "") -> ProcessResult:
+    """Tool-Ergebnis wie von run_command, stdout im (Spool-)File"""
+    stdout_file = tempfile.SpooledTemporaryFile()
+    stdout_file.write(stdout.encode('utf-8'))
+    return ProcessResult([], returncode, stdout_file, stderr)
+
 
 class TestSecurityScanner(unittest.TestCase):
     """Test Suite für Security Scanner"""
@@ -43,6 +62,16 @@ class TestSecurityScanner(unittest.TestCase):
         self.scanner = SecurityScanner()
         self.scanner.source_dir = self.source_dir
         self.scanner.reports_dir = self.reports_dir
+        self.scanner.rules_dir = Path(self.test_dir) / "rules"
+        self.scanner.config_dir = Path(self.test_dir) / "config"
+    
+    def _install_custom_semgrep_rules(self):
+        """Eigene Regeln statt gepinnter Registry-Packs (kein Netzwerk im Test)"""
+        self.scanner.config_dir.mkdir(exist_ok=True)
+        rules_file = self.scanner.config_dir / "semgrep-rules.yml"
+        rules_file.write_text("rules: []\n")
+        settings = {'security_tools': {'sast': {'semgrep': {'custom_rules': str(rules_file)}}}}
+        (self.scanner.config_dir / "security-settings.json").write_text(json.dumps(settings))
     
     def tearDown(self):
         """Cleanup nach jedem Test"""
@@ -102,6 +131,7 @@ class TestSecurityScanner(unittest.TestCase):
     
     def test_check_owasp_compliance(self):
         """Test: OWASP Top 10 Compliance Check"""
+        self.scanner.scan_results = {'semgrep': {'status': 'success', 'findings': []}}
         compliance = self.scanner.check_owasp_compliance()
         
         # Verify: OWASP Compliance Structure
@@ -109,8 +139,9 @@ class TestSecurityScanner(unittest.TestCase):
         self.assertIn('A02_cryptographic_failures', compliance)
         self.assertIn('A03_injection', compliance)
         
-        # Default sollte PASS sein
+        # Ohne Findings eines gelaufenen Tools PASS, ohne Tool-Lauf keine Bewertung
         self.assertEqual(compliance['A01_broken_access_control'], 'PASS')
+        self.assertEqual(compliance['A06_vulnerable_components'], 'NOT_EVALUATED')
     
     def test_check_owasp_compliance_with_issues(self):
         """Test: OWASP Compliance mit kritischen Issues"""
@@ -206,9 +237,10 @@ class TestSecurityScanner(unittest.TestCase):
                 self.assertGreaterEqual(score, min_score)
                 self.assertLessEqual(score, max_score)
     
-    @patch('subprocess.run')
+    @patch('security_scanner.run_command')
     def test_run_semgrep_scan_success(self, mock_run):
         """Test: Erfolgreicher Semgrep Scan"""
+        self._install_custom_semgrep_rules()
         # Setup: Mock successful Semgrep output
         mock_output = {
             "results": [
@@ -223,11 +255,7 @@ class TestSecurityScanner(unittest.TestCase):
             ]
         }
         
-        mock_run.return_value = Mock(
-            returncode=0,
-            stdout=json.dumps(mock_output),
-            stderr=""
-        )
+        mock_run.return_value = process_result(returncode=0, stdout=json.dumps(mock_output), stderr="")
         
         result = self.scanner.run_semgrep_scan()
         
@@ -236,16 +264,49 @@ class TestSecurityScanner(unittest.TestCase):
         self.assertEqual(result['status'], 'success')
         self.assertEqual(result['total_issues'], 2)
         self.assertEqual(result['critical_issues'], 2)  # Beide sind ERROR/WARNING
+        # Ausgabe wird nicht im Report behalten, das Spool-File ist geschlossen
+        self.assertNotIn('raw_output', result)
+        self.assertTrue(mock_run.return_value.stdout_file.closed)
     
-    @patch('subprocess.run')
+    @patch('security_scanner.run_command')
+    def test_run_semgrep_scan_reports_most_severe_findings(self, mock_run):
+        """Test: Report enthält die schwersten Findings, nicht die ersten"""
+        self._install_custom_semgrep_rules()
+        mock_output = {
+            "results": [{"check_id": f"info-{i}", "extra": {"severity": "INFO"}} for i in range(20)]
+            + [{"check_id": "sqli", "extra": {"severity": "ERROR"}}]
+        }
+        mock_run.return_value = process_result(returncode=0, stdout=json.dumps(mock_output), stderr="")
+        self.scanner.tools['semgrep']['report_limit'] = 3
+        
+        result = self.scanner.run_semgrep_scan()
+        
+        self.assertEqual(len(result['results']), 3)
+        self.assertEqual(result['results'][0]['rule_id'], 'sqli')
+        self.assertEqual(result['total_issues'], 21)
+    
+    @patch('security_scanner.run_command')
+    def test_run_semgrep_scan_reports_rejected_rule_packs(self, mock_run):
+        """Test: Packs mit verletztem Pin stehen im Semgrep-Ergebnis"""
+        self._install_custom_semgrep_rules()
+        (self.source_dir / "Api.cs").write_text("class Api {}")
+        self.scanner.rules_dir.mkdir()
+        (self.scanner.rules_dir / "p-csharp.yml").write_text("rules: [{id: tampered}]\n")
+        (self.scanner.rules_dir / "semgrep-rule-packs.lock.json").write_text(json.dumps(
+            {'version': 1, 'packs': {'p/csharp': {'file': 'p-csharp.yml', 'sha256': '0' * 64}}}))
+        mock_run.return_value = process_result(returncode=0, stdout=json.dumps({'results': []}), stderr="")
+
+        result = self.scanner.run_semgrep_scan()
+
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['rejected_rule_packs'], ['p/csharp'])
+
+    @patch('security_scanner.run_command')
     def test_run_semgrep_scan_failure(self, mock_run):
         """Test: Semgrep Scan Fehler"""
+        self._install_custom_semgrep_rules()
         # Setup: Mock failed Semgrep
-        mock_run.return_value = Mock(
-            returncode=1,
-            stdout="",
-            stderr="Semgrep error: invalid configuration"
-        )
+        mock_run.return_value = process_result(returncode=1, stdout="", stderr="Semgrep error: invalid configuration")
         
         result = self.scanner.run_semgrep_scan()
         
@@ -254,7 +315,65 @@ class TestSecurityScanner(unittest.TestCase):
         self.assertEqual(result['status'], 'error')
         self.assertIn('error', result)
     
-    @patch('subprocess.run')
+    @patch('security_scanner.run_command')
+    def test_run_semgrep_scan_uses_local_rules_offline(self, mock_run):
+        """Test: Semgrep läuft mit lokalem Rule-Set statt Registry"""
+        self._install_custom_semgrep_rules()
+        mock_run.return_value = process_result(returncode=0, stdout=json.dumps({"results": []}), stderr="")
+        
+        self.scanner.run_semgrep_scan()
+        
+        cmd = mock_run.call_args[0][0]
+        self.assertNotIn('--config=auto', cmd)
+        self.assertIn('--metrics=off', cmd)
+        rule_set = Path(next(arg for arg in cmd if arg.startswith('--config=')).split('=', 1)[1])
+        self.assertTrue((rule_set / "custom-semgrep-rules.yml").exists())
+    
+    @patch('security_scanner.run_command')
+    def test_tools_without_inputs_are_not_launched(self, mock_run):
+        """Test: Ohne Quellcode und Manifeste startet nur GitLeaks"""
+        mock_run.return_value = process_result(returncode=0, stdout="", stderr="")
+        
+        report = self.scanner.run_comprehensive_scan()
+        
+        launched = [call[0][0][0] for call in mock_run.call_args_list]
+        self.assertEqual(launched, ['gitleaks'])
+        for tool in ('semgrep', 'trivy', 'dependency_check', 'eslint_security'):
+            self.assertEqual(report['tool_results'][tool]['status'], 'skipped')
+        self.assertEqual(report['tool_results']['dependency_check']['reason'], 'no nuget/npm manifests')
+        self.assertEqual(security_scanner.FINDINGS.value(tool='gitleaks', severity='CRITICAL'), 0)
+        self.assertGreaterEqual(security_scanner.TOOL_RUNS.value(tool='trivy', status='skipped'), 1)
+    
+    @patch('security_scanner.run_command')
+    def test_incremental_scan_rescans_only_changed_files(self, mock_run):
+        """Test: Watch-Modus scannt nur geänderte Dateien und behält übrige Findings"""
+        self._install_custom_semgrep_rules()
+        (self.source_dir / "Api.cs").write_text("class Api {}")
+        (self.source_dir / "Service.cs").write_text("class Service {}")
+        self.scanner.scan_results = {'semgrep': {
+            'tool': 'semgrep', 'status': 'success',
+            'findings': [make_finding('semgrep', rule_id='sqli', severity='HIGH', path=path)
+                         for path in ('Api.cs', 'Service.cs')]
+        }}
+        mock_run.return_value = process_result(returncode=0, stdout=json.dumps({"results": []}), stderr="")
+
+        report = self.scanner.run_incremental_scan({'semgrep': ['Api.cs']}, 'Api.cs changed')
+
+        cmd = mock_run.call_args[0][0]
+        self.assertEqual(cmd[-1], str(self.source_dir / "Api.cs"))
+        semgrep = report['tool_results']['semgrep']
+        self.assertEqual([f['path'] for f in semgrep['findings']], ['Service.cs'])
+        self.assertEqual(semgrep['total_issues'], 1)
+
+    @patch('security_scanner.run_command')
+    def test_run_semgrep_scan_without_rules_fails_fast(self, mock_run):
+        """Test: Ohne lokale Regeln wird Semgrep nicht gestartet"""
+        result = self.scanner.run_semgrep_scan()
+        
+        self.assertEqual(result['status'], 'error')
+        mock_run.assert_not_called()
+    
+    @patch('security_scanner.run_command')
     def test_run_gitleaks_scan_secrets_found(self, mock_run):
         """Test: GitLeaks findet Secrets"""
         # Setup: Mock GitLeaks mit Secrets
@@ -266,16 +385,12 @@ class TestSecurityScanner(unittest.TestCase):
             }
         ]
         
-        # GitLeaks schreibt JSON-Report
-        report_file = self.reports_dir / "gitleaks-report.json"
+        # GitLeaks schreibt JSON-Report ins Arbeitsverzeichnis des Laufs
+        report_file = self.scanner.work_dir / "gitleaks-report.json"
         with open(report_file, 'w') as f:
             json.dump(mock_secrets, f)
         
-        mock_run.return_value = Mock(
-            returncode=1,  # GitLeaks returniert 1 wenn Secrets gefunden
-            stdout="",
-            stderr=""
-        )
+        mock_run.return_value = process_result(returncode=1, stdout="", stderr="")  # GitLeaks returniert 1 wenn Secrets gefunden
         
         result = self.scanner.run_gitleaks_scan()
         
@@ -285,19 +400,15 @@ class TestSecurityScanner(unittest.TestCase):
         self.assertEqual(result['secrets_found'], 1)
         self.assertEqual(result['return_code'], 1)
     
-    @patch('subprocess.run')
+    @patch('security_scanner.run_command')
     def test_run_gitleaks_scan_no_secrets(self, mock_run):
         """Test: GitLeaks findet keine Secrets"""
         # Setup: Mock GitLeaks ohne Secrets (leere Datei)
-        report_file = self.reports_dir / "gitleaks-report.json"
+        report_file = self.scanner.work_dir / "gitleaks-report.json"
         with open(report_file, 'w') as f:
             json.dump([], f)
         
-        mock_run.return_value = Mock(
-            returncode=0,  # GitLeaks returniert 0 wenn keine Secrets
-            stdout="",
-            stderr=""
-        )
+        mock_run.return_value = process_result(returncode=0, stdout="", stderr="")  # GitLeaks returniert 0 wenn keine Secrets
         
         result = self.scanner.run_gitleaks_scan()
         
@@ -307,6 +418,294 @@ class TestSecurityScanner(unittest.TestCase):
         self.assertEqual(result['secrets_found'], 0)
         self.assertEqual(result['return_code'], 0)
 
+    @patch('security_scanner.run_command')
+    def test_each_scan_writes_its_own_profile(self, mock_run):
+        """Test: Mehrere Scans eines Prozesses (Watch-Modus) kumulieren ihre Profile nicht"""
+        mock_run.side_effect = lambda cmd, **kwargs: process_result()
+        self.scanner.enable_profiling('cprofile')
+
+        summaries = []
+        for _ in range(2):
+            self.scanner.run_comprehensive_scan()
+            stem = self.scanner.report_file.stem
+            summaries.append(json.loads((self.reports_dir / f"{stem}.profile.json").read_text()))
+
+        for summary in summaries:
+            builds = [row for row in summary['phases']['index']['top_functions']
+                      if row['function'].endswith(':build')]
+            self.assertEqual([row['calls'] for row in builds], [1])
+
+    @patch('security_scanner.run_command')
+    def test_tool_artifacts_are_archived_by_content_hash(self, mock_run):
+        """Test: Tool-Artefakte der Arbeitsverzeichnisse bleiben dedupliziert über report_sha256 erhalten"""
+        def fake_gitleaks(cmd, **kwargs):
+            Path(cmd[cmd.index('--report-path') + 1]).write_text("[]")
+            return process_result(returncode=0, stdout="", stderr="")
+        mock_run.side_effect = fake_gitleaks
+
+        reports = [self.scanner.run_comprehensive_scan() for _ in range(2)]
+
+        gitleaks = [report['tool_results']['gitleaks'] for report in reports]
+        self.assertEqual(gitleaks[0]['report_sha256'], gitleaks[1]['report_sha256'])
+        self.assertEqual(Path(gitleaks[0]['report_file']).read_text(), "[]")
+        self.assertNotEqual(reports[0]['scan_metadata']['run_id'], reports[1]['scan_metadata']['run_id'])
+        self.assertEqual(len(list(self.reports_dir.glob("security-report-*.json"))), 2)
+        # Arbeitsverzeichnisse werden nach dem Scan entfernt
+        self.assertEqual(list((self.reports_dir / "runs").iterdir()), [])
+
+
+class TestDependencyCheckCache(unittest.TestCase):
+    """Tests für den inkrementellen Dependency Check"""
+    
+    def setUp(self):
+        """Setup für jeden Test"""
+        if SecurityScanner is None:
+            self.skipTest("SecurityScanner nicht verfügbar")
+            
+        self.test_dir = tempfile.mkdtemp()
+        self.source_dir = Path(self.test_dir) / "src"
+        self.reports_dir = Path(self.test_dir) / "reports"
+        self.config_dir = Path(self.test_dir) / "config"
+        
+        # Zwei Projekte aus unterschiedlichen Ecosystems
+        (self.source_dir / "backend").mkdir(parents=True)
+        (self.source_dir / "frontend").mkdir(parents=True)
+        self.reports_dir.mkdir(parents=True)
+        self.config_dir.mkdir(parents=True)
+        (self.source_dir / "backend" / "Booking.Api.csproj").write_text("<Project />")
+        (self.source_dir / "frontend" / "package-lock.json").write_text("{}")
+        
+        self.scanner = SecurityScanner()
+        self.scanner.source_dir = self.source_dir
+        self.scanner.reports_dir = self.reports_dir
+        self.scanner.config_dir = self.config_dir
+    
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+    
+    def _fake_dependency_check(self, cmd, **kwargs):
+        """Simuliert die Dependency-Check CLI für die übergebenen --scan Pfade"""
+        scanned = [cmd[i + 1] for i, arg in enumerate(cmd) if arg == '--scan']
+        dependencies = []
+        for path in scanned:
+            if path.endswith('.csproj'):
+                dependencies.append({
+                    'fileName': 'Newtonsoft.Json:12.0.1',
+                    'filePath': path,
+                    'packages': [{'id': 'pkg:nuget/Newtonsoft.Json@12.0.1'}],
+                    'vulnerabilities': [{'name': 'CVE-2024-0001', 'severity': 'HIGH'}]
+                })
+            else:
+                dependencies.append({
+                    'fileName': 'jest:29.0.0',
+                    'filePath': f"{path}?jest",
+                    'packages': [{'id': 'pkg:npm/jest@29.0.0'}],
+                    'vulnerabilities': [{'name': 'CVE-2021-44906', 'severity': 'CRITICAL'}]
+                })
+        
+        out_dir = Path(cmd[cmd.index('--out') + 1])
+        with open(out_dir / "dependency-check-report.json", 'w') as f:
+            json.dump({'dependencies': dependencies}, f)
+        return process_result(returncode=0, stdout="", stderr="")
+    
+    @patch('security_scanner.run_command')
+    def test_unchanged_manifests_are_served_from_cache(self, mock_run):
+        """Test: Unveränderte Manifeste starten keine neue Analyse"""
+        mock_run.side_effect = self._fake_dependency_check
+        
+        first = self.scanner.run_dependency_check()
+        second = self.scanner.run_dependency_check()
+        
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(first['manifests_scanned'], 2)
+        self.assertEqual(second['manifests_scanned'], 0)
+        self.assertEqual(second['manifests_cached'], 2)
+        self.assertEqual(second['total_dependencies'], 2)
+        self.assertEqual(second['critical_vulnerabilities'], 2)
+    
+    @patch('security_scanner.run_command')
+    def test_only_changed_manifest_is_rescanned(self, mock_run):
+        """Test: Nur das geänderte Manifest wird erneut analysiert"""
+        mock_run.side_effect = self._fake_dependency_check
+        self.scanner.run_dependency_check()
+        
+        (self.source_dir / "frontend" / "package-lock.json").write_text('{"lockfileVersion": 3}')
+        result = self.scanner.run_dependency_check()
+        
+        scanned = [arg for arg in mock_run.call_args[0][0] if arg.endswith('package-lock.json')]
+        self.assertEqual(len(scanned), 1)
+        self.assertNotIn('Booking.Api.csproj', ' '.join(mock_run.call_args[0][0]))
+        self.assertEqual(result['manifests_scanned'], 1)
+        self.assertEqual(result['total_dependencies'], 2)
+    
+    @patch('security_scanner.run_command')
+    def test_cached_results_respect_current_suppressions(self, mock_run):
+        """Test: Gecachte Ergebnisse werden gegen neue Suppressions geprüft"""
+        mock_run.side_effect = self._fake_dependency_check
+        self.scanner.run_dependency_check()
+        
+        (self.config_dir / "dependency-check-suppressions.xml").write_text(
+            '<suppressions xmlns="https://jeremylong.github.io/DependencyCheck/dependency-suppression.1.3.xsd">'
+            '<suppress><notes>Dev only</notes>'
+            '<packageUrl regex="true">^pkg:npm/jest@.*$</packageUrl>'
+            '<cve>CVE-2021-44906</cve></suppress></suppressions>'
+        )
+        self.scanner.scan_results['dependency_check'] = self.scanner.run_dependency_check()
+        self.scanner.apply_suppressions()
+        result = self.scanner.scan_results['dependency_check']
+        
+        self.assertEqual(mock_run.call_count, 1)
+        self.assertEqual(result['total_vulnerabilities'], 1)
+        self.assertEqual(result['critical_vulnerabilities'], 1)
+        self.assertEqual(result['suppressed_count'], 1)
+
+    @patch('security_scanner.run_command')
+    def test_expired_entries_are_rescanned(self, mock_run):
+        """Test: Unveränderte Manifeste werden nach Ablauf der TTL gegen die aktuelle DB neu analysiert"""
+        mock_run.side_effect = self._fake_dependency_check
+        self.scanner.run_dependency_check()
+
+        cache_file = self.reports_dir / "cache" / "dependency-check-cache.json"
+        data = json.loads(cache_file.read_text())
+        entries = data['sources'][str(self.source_dir.resolve())]
+        entries['backend/Booking.Api.csproj']['scanned_at'] = '2020-01-01T00:00:00'
+        cache_file.write_text(json.dumps(data))
+
+        result = self.scanner.run_dependency_check()
+
+        self.assertEqual(mock_run.call_count, 2)
+        self.assertIn('Booking.Api.csproj', ' '.join(mock_run.call_args[0][0]))
+        self.assertEqual(result['manifests_scanned'], 1)
+        self.assertEqual(result['manifests_cached'], 1)
+
+    @patch('security_scanner.run_command')
+    def test_source_trees_do_not_share_cache_entries(self, mock_run):
+        """Test: Zwei Quellbäume auf demselben Reports-Volume verdrängen sich nicht"""
+        mock_run.side_effect = self._fake_dependency_check
+        other_source = Path(self.test_dir) / "other"
+        (other_source / "api").mkdir(parents=True)
+        (other_source / "api" / "Api.csproj").write_text("<Project />")
+        other = SecurityScanner()
+        other.source_dir = other_source
+        other.reports_dir = self.reports_dir
+        other.config_dir = self.config_dir
+
+        self.scanner.run_dependency_check()
+        other.run_dependency_check()
+        first = self.scanner.run_dependency_check()
+        second = other.run_dependency_check()
+
+        self.assertEqual(mock_run.call_count, 2)
+        self.assertEqual(first['manifests_cached'], 2)
+        self.assertEqual(second['manifests_cached'], 1)
+        self.assertTrue(all(f['file_path'].startswith(str(other_source)) for f in second['findings']))
+
+    @patch('security_scanner.run_command')
+    def test_no_manifests_skips_analyser(self, mock_run):
+        """Test: Ohne Manifeste wird Dependency Check nicht gestartet"""
+        shutil.rmtree(self.source_dir)
+        self.source_dir.mkdir()
+        
+        result = self.scanner.run_dependency_check()
+        
+        mock_run.assert_not_called()
+        self.assertEqual(result['status'], 'success')
+        self.assertEqual(result['total_dependencies'], 0)
+
+
+class TestStoredResults(unittest.TestCase):
+    """Tests für Reports aus gespeicherten Ergebnissen"""
+    
+    def setUp(self):
+        """Setup für jeden Test"""
+        if SecurityScanner is None:
+            self.skipTest("SecurityScanner nicht verfügbar")
+            
+        self.test_dir = tempfile.mkdtemp()
+        self.reports_dir = Path(self.test_dir) / "reports"
+        self.config_dir = Path(self.test_dir) / "config"
+        self.reports_dir.mkdir(parents=True)
+        self.config_dir.mkdir(parents=True)
+        
+        # Gespeicherter Report eines früheren Scans
+        self.report_file = self.reports_dir / "security-report-20250101-020000.json"
+        with open(self.report_file, 'w') as f:
+            json.dump({
+                'scan_metadata': {'timestamp': '2025-01-01T02:00:00', 'source_directory': self.test_dir},
+                'tool_results': {
+                    'semgrep': {
+                        'tool': 'semgrep',
+                        'status': 'success',
+                        'total_issues': 1,
+                        'critical_issues': 1,
+                        'findings': [{'tool': 'semgrep', 'rule_id': 'sql-injection', 'severity': 'HIGH',
+                                      'vulnerability_id': '', 'path': 'api.cs', 'package_ids': [],
+                                      'cwes': ['CWE-89']}]
+                    }
+                }
+            }, f)
+    
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        if os.path.exists(self.test_dir):
+            shutil.rmtree(self.test_dir)
+    
+    def test_from_results_loads_lazily(self):
+        """Test: Ergebnisse werden erst beim Zugriff geladen"""
+        scanner = SecurityScanner.from_results(self.reports_dir)
+        
+        self.assertEqual(scanner.results_source, self.report_file)
+        self.assertIsNone(scanner._scan_results)
+        self.assertEqual(scanner.scan_results['semgrep']['critical_issues'], 1)
+        self.assertEqual(scanner.check_owasp_compliance()['A03_injection'], 'REVIEW_REQUIRED')
+    
+    @patch('security_scanner.run_command')
+    def test_render_stored_report_applies_current_allowlist(self, mock_run):
+        """Test: Neu gerenderter Report berücksichtigt die aktuelle Allowlist ohne Tool-Lauf"""
+        with open(self.config_dir / "security-allowlist.json", 'w') as f:
+            json.dump({'rules': [{'rule_ids': ['sql-injection']}]}, f)
+        
+        scanner = SecurityScanner.from_results(self.report_file)
+        scanner.config_dir = self.config_dir
+        report = scanner.render_stored_report()
+        
+        mock_run.assert_not_called()
+        self.assertEqual(report['security_summary']['critical_issues'], 0)
+        self.assertEqual(report['scan_metadata']['rendered_from'], str(self.report_file))
+        self.assertEqual(report['scan_metadata']['original_timestamp'], '2025-01-01T02:00:00')
+    
+    def test_profile_is_written_next_to_report(self):
+        """Test: --profile legt das Profil neben den neu gerenderten Report"""
+        scanner = SecurityScanner.from_results(self.report_file)
+        scanner.config_dir = self.config_dir
+        scanner.enable_profiling('cprofile')
+        
+        scanner.render_stored_report()
+        
+        stem = scanner.report_file.stem
+        summary = json.loads((self.reports_dir / f"{stem}.profile.json").read_text())
+        self.assertEqual(set(summary['phases']), {'load', 'suppressions', 'report', 'report/write'})
+        self.assertTrue((self.reports_dir / f"{stem}.report.write.pstats").exists())
+        self.assertEqual(SecurityScanner.from_results(self.reports_dir).results_source, scanner.report_file)
+    
+    def test_profile_flag_does_not_consume_subcommand(self):
+        """Test: --profile nimmt den Subcommand nicht als Modus"""
+        args = security_scanner.parse_args(['--profile', 'scan'])
+        self.assertEqual((args.profile, args.profile_mode, args.command), (True, 'sampling', 'scan'))
+        
+        args = security_scanner.parse_args(['--profile', '--profile-mode', 'cprofile', 'report', '/x'])
+        self.assertEqual((args.profile_mode, args.command, args.results), ('cprofile', 'report', '/x'))
+    
+    def test_from_results_without_reports(self):
+        """Test: Leeres Verzeichnis liefert einen klaren Fehler"""
+        empty_dir = Path(self.test_dir) / "empty"
+        empty_dir.mkdir()
+        
+        with self.assertRaises(FileNotFoundError):
+            SecurityScanner.from_results(empty_dir)
+
 
 class TestSecurityIntegration(unittest.TestCase):
     """Integration Tests für Security Expert Agent S7"""
@@ -411,7 +810,7 @@ class TestSecurityPolicies(unittest.TestCase):
             self.assertGreaterEqual(len(compliance), 3)
             
             for category in compliance:
-                self.assertIn(compliance[category], ['PASS', 'REVIEW_REQUIRED', 'FAIL'])
+                self.assertIn(compliance[category], ['PASS', 'REVIEW_REQUIRED', 'FAIL', 'NOT_EVALUATED'])
     
     def test_sans_top_25_coverage(self):
         """Test: SANS Top 25 CWE Coverage"""
@@ -427,7 +826,7 @@ class TestSecurityPolicies(unittest.TestCase):
             
             for cwe in critical_cwes:
                 self.assertIn(cwe, compliance)
-                self.assertIn(compliance[cwe], ['PASS', 'REVIEW_REQUIRED', 'FAIL'])
+                self.assertIn(compliance[cwe], ['PASS', 'REVIEW_REQUIRED', 'FAIL', 'NOT_EVALUATED'])
 
 
 if __name__ == '__main__':
@@ -441,6 +840,8 @@ if __name__ == '__main__':
     
     # Füge Test-Klassen hinzu
     suite.addTests(loader.loadTestsFromTestCase(TestSecurityScanner))
+    suite.addTests(loader.loadTestsFromTestCase(TestDependencyCheckCache))
+    suite.addTests(loader.loadTestsFromTestCase(TestStoredResults))
     suite.addTests(loader.loadTestsFromTestCase(TestSecurityIntegration))
     suite.addTests(loader.loadTestsFromTestCase(TestSecurityPolicies))
     
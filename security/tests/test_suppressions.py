@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+"""
+Test Suite für die Suppression-Engine von Agent S7
+Testet Dependency-Check Suppressions und die Allowlist für alle Tools
+"""
+
+import unittest
+import json
+import os
+import tempfile
+import shutil
+from datetime import date, timedelta
+from pathlib import Path
+import sys
+
+# Füge Security Scanner zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+from findings import make_finding
+from suppressions import SuppressionEngine
+
+
+class TestSuppressionEngine(unittest.TestCase):
+    """Test Suite für die Suppression-Engine"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.config_dir = Path(tempfile.mkdtemp())
+
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        shutil.rmtree(self.config_dir)
+
+    def _write_allowlist(self, rules):
+        with open(self.config_dir / "security-allowlist.json", 'w') as f:
+            json.dump({'version': 1, 'rules': rules}, f)
+
+    def _write_dependency_check(self, body):
+        (self.config_dir / "dependency-check-suppressions.xml").write_text(
+            '<suppressions xmlns="https://jeremylong.github.io/DependencyCheck/dependency-suppression.1.3.xsd">'
+            f'{body}</suppressions>'
+        )
+
+    def test_dependency_check_rule_matches_package_and_cve(self):
+        """Test: packageUrl-Regex und CVE müssen beide zutreffen"""
+        self._write_dependency_check(
+            '<suppress><notes>Dev only</notes>'
+            '<packageUrl regex="true">^pkg:npm/jest@.*$</packageUrl>'
+            '<cve>CVE-2021-44906</cve></suppress>'
+        )
+        engine = SuppressionEngine.load(self.config_dir)
+
+        jest = make_finding('dependency_check', vulnerability_id='CVE-2021-44906',
+                            package_ids=['pkg:npm/jest@29.0.0'])
+        other_package = make_finding('dependency_check', vulnerability_id='CVE-2021-44906',
+                                     package_ids=['pkg:npm/minimist@1.2.0'])
+        other_cve = make_finding('dependency_check', vulnerability_id='CVE-2022-0001',
+                                 package_ids=['pkg:npm/jest@29.0.0'])
+
+        self.assertTrue(engine.is_suppressed(jest))
+        self.assertFalse(engine.is_suppressed(other_package))
+        self.assertFalse(engine.is_suppressed(other_cve))
+
+    def test_dependency_check_regex_must_match_whole_value(self):
+        """Test: Wie bei Dependency-Check trifft eine Regex nur den ganzen Wert, kein Präfix"""
+        self._write_dependency_check(
+            '<suppress><packageUrl regex="true">pkg:npm/jest@.*</packageUrl></suppress>'
+            '<suppress><packageUrl regex="true">pkg:npm/minimist</packageUrl></suppress>'
+        )
+        engine = SuppressionEngine.load(self.config_dir)
+
+        self.assertTrue(engine.is_suppressed(
+            make_finding('dependency_check', vulnerability_id='CVE-1', package_ids=['pkg:npm/jest@29.0.0'])))
+        self.assertFalse(engine.is_suppressed(
+            make_finding('dependency_check', vulnerability_id='CVE-1', package_ids=['pkg:npm/jest-cli@29.0.0'])))
+        self.assertFalse(engine.is_suppressed(
+            make_finding('dependency_check', vulnerability_id='CVE-1', package_ids=['pkg:npm/minimist@1.2.0'])))
+
+    def test_dependency_check_literals_ignore_case(self):
+        """Test: Werte ohne regex="true" werden ohne Groß-/Kleinschreibung verglichen"""
+        self._write_dependency_check(
+            '<suppress><gav>org.Example:Lib:1.0</gav><cve>CVE-2021-1</cve></suppress>'
+            '<suppress><packageUrl regex="true">pkg:maven/org\\.example/Other@.*</packageUrl></suppress>'
+        )
+        engine = SuppressionEngine.load(self.config_dir)
+
+        self.assertTrue(engine.is_suppressed(
+            make_finding('dependency_check', vulnerability_id='CVE-2021-1', package_ids=['org.example:lib:1.0'])))
+        self.assertFalse(engine.is_suppressed(
+            make_finding('dependency_check', vulnerability_id='CVE-2021-1', package_ids=['org.example:lib:1.01'])))
+        self.assertFalse(engine.is_suppressed(
+            make_finding('dependency_check', vulnerability_id='CVE-2', package_ids=['pkg:maven/org.example/other@1'])))
+
+    def test_dependency_check_sha1_narrows_to_one_dependency(self):
+        """Test: sha1 schränkt die Suppression auf genau eine Dependency ein"""
+        self._write_dependency_check(
+            '<suppress><sha1>ABC123</sha1><cve>CVE-2021-1</cve></suppress>'
+            '<suppress><sha1>def456</sha1></suppress>'
+        )
+        engine = SuppressionEngine.load(self.config_dir)
+
+        self.assertTrue(engine.is_suppressed(
+            make_finding('dependency_check', vulnerability_id='CVE-2021-1', sha1='abc123')))
+        self.assertFalse(engine.is_suppressed(
+            make_finding('dependency_check', vulnerability_id='CVE-2021-1', sha1='999999')))
+        self.assertFalse(engine.is_suppressed(
+            make_finding('dependency_check', vulnerability_id='CVE-2021-2', sha1='abc123')))
+        self.assertTrue(engine.is_suppressed(
+            make_finding('dependency_check', vulnerability_id='CVE-2021-3', sha1='def456')))
+
+    def test_dependency_check_file_path_matches_absolute_path(self):
+        """Test: filePath wird wie bei Dependency-Check gegen den absoluten Pfad geprüft"""
+        self._write_dependency_check(
+            '<suppress><filePath>/app/src/frontend/node_modules/jest/package.json</filePath>'
+            '<cve>CVE-2021-44906</cve></suppress>'
+        )
+        engine = SuppressionEngine.load(self.config_dir)
+
+        jest = make_finding('dependency_check', vulnerability_id='CVE-2021-44906',
+                            path='frontend/node_modules/jest/package.json',
+                            file_path='/app/src/frontend/node_modules/jest/package.json')
+        other = make_finding('dependency_check', vulnerability_id='CVE-2021-44906',
+                             path='frontend/node_modules/minimist/package.json',
+                             file_path='/app/src/frontend/node_modules/minimist/package.json')
+
+        self.assertTrue(engine.is_suppressed(jest))
+        self.assertFalse(engine.is_suppressed(other))
+
+    def test_dependency_check_rules_apply_to_trivy(self):
+        """Test: Dependency-Check Suppressions gelten auch für Trivy-Findings"""
+        self._write_dependency_check('<suppress><cve>CVE-2021-44906</cve></suppress>')
+        engine = SuppressionEngine.load(self.config_dir)
+
+        self.assertTrue(engine.is_suppressed(make_finding('trivy', vulnerability_id='CVE-2021-44906')))
+        self.assertFalse(engine.is_suppressed(make_finding('semgrep', vulnerability_id='CVE-2021-44906')))
+
+    def test_expired_suppression_is_ignored(self):
+        """Test: Abgelaufene Suppressions werden nicht angewendet"""
+        yesterday = (date.today() - timedelta(days=1)).isoformat()
+        self._write_dependency_check(f'<suppress until="{yesterday}Z"><cve>CVE-2021-44906</cve></suppress>')
+        engine = SuppressionEngine.load(self.config_dir)
+
+        self.assertEqual(engine.rules, [])
+        self.assertFalse(engine.is_suppressed(make_finding('trivy', vulnerability_id='CVE-2021-44906')))
+
+    def test_allowlist_package_urls_match_substrings(self):
+        """Test: package_urls der Allowlist treffen wie bisher auch Teilstrings"""
+        self._write_allowlist([{'package_urls': ['pkg:npm/jest'], 'vulnerability_ids': ['CVE-1']}])
+        engine = SuppressionEngine.load(self.config_dir)
+
+        self.assertTrue(engine.is_suppressed(
+            make_finding('trivy', vulnerability_id='CVE-1', package_ids=['pkg:npm/jest-cli@29.0.0'])))
+
+    def test_allowlist_rule_ids_and_path_globs(self):
+        """Test: Rule-IDs und Pfad-Globs aus der Allowlist"""
+        self._write_allowlist([{
+            'notes': 'Test-Fixtures enthalten absichtlich Dummy-Secrets',
+            'tools': ['gitleaks'],
+            'rule_ids': ['generic-api-key'],
+            'paths': ['tests/fixtures/*']
+        }])
+        engine = SuppressionEngine.load(self.config_dir)
+
+        fixture = make_finding('gitleaks', rule_id='generic-api-key', path='tests/fixtures/keys.json')
+        production = make_finding('gitleaks', rule_id='generic-api-key', path='backend/appsettings.json')
+
+        self.assertTrue(engine.is_suppressed(fixture))
+        self.assertFalse(engine.is_suppressed(production))
+        self.assertIn('generic-api-key', engine.by_rule_id)
+
+    def test_cwe_rules_are_not_hash_indexed(self):
+        """Test: CWE-Regeln werden für jedes Finding geprüft"""
+        self._write_allowlist([{'tools': ['semgrep'], 'cwes': ['CWE-79']}])
+        engine = SuppressionEngine.load(self.config_dir)
+
+        self.assertEqual(len(engine.unindexed), 1)
+        self.assertTrue(engine.is_suppressed(make_finding('semgrep', rule_id='xss', cwes=['CWE-79'])))
+        self.assertFalse(engine.is_suppressed(make_finding('semgrep', rule_id='sqli', cwes=['CWE-89'])))
+
+    def test_apply_reevaluates_previously_suppressed_findings(self):
+        """Test: Eine geänderte Allowlist wirkt ohne erneuten Tool-Lauf"""
+        results = {
+            'status': 'success',
+            'findings': [
+                make_finding('semgrep', rule_id='rule-a', severity='HIGH'),
+                make_finding('semgrep', rule_id='rule-b', severity='HIGH'),
+            ]
+        }
+
+        self._write_allowlist([{'rule_ids': ['rule-a']}])
+        SuppressionEngine.load(self.config_dir).apply('semgrep', results)
+        self.assertEqual(results['critical_issues'], 1)
+        self.assertEqual(results['suppressed_count'], 1)
+
+        self._write_allowlist([{'rule_ids': ['rule-b']}])
+        SuppressionEngine.load(self.config_dir).apply('semgrep', results)
+        self.assertEqual([f['rule_id'] for f in results['findings']], ['rule-a'])
+        self.assertEqual([f['rule_id'] for f in results['suppressed_findings']], ['rule-b'])
+
+    def test_missing_config_suppresses_nothing(self):
+        """Test: Ohne Konfiguration wird nichts unterdrückt"""
+        engine = SuppressionEngine.load(self.config_dir)
+
+        self.assertFalse(engine.is_suppressed(make_finding('trivy', vulnerability_id='CVE-2021-44906')))
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Test Suite für den Target-Index von Agent S7
+Testet die Erkennung von Sprachen, Manifesten und Lockfiles und die Tool-Anforderungen
+"""
+
+import unittest
+import os
+import sys
+import tempfile
+import shutil
+from pathlib import Path
+
+# Füge Security Scanner zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+from target_index import TargetIndex
+
+
+class TestTargetIndex(unittest.TestCase):
+    """Test Suite für TargetIndex"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.source_dir = Path(tempfile.mkdtemp())
+        for directory in ['backend/Booking.Api', 'frontend/src', 'frontend/node_modules/lib']:
+            (self.source_dir / directory).mkdir(parents=True)
+        (self.source_dir / 'backend' / 'Booking.Api' / 'Program.cs').write_text('class Program {}')
+        (self.source_dir / 'backend' / 'Booking.Api' / 'Booking.Api.csproj').write_text('<Project />')
+        (self.source_dir / 'backend' / 'Dockerfile').write_text('FROM scratch')
+        (self.source_dir / 'frontend' / 'src' / 'page.tsx').write_text('export default {}')
+        (self.source_dir / 'frontend' / 'node_modules' / 'lib' / 'index.py').write_text('')
+
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        shutil.rmtree(self.source_dir)
+
+    def test_single_pass_detects_languages_and_manifests(self):
+        """Test: Sprachen und Manifeste werden erkannt, node_modules wird ignoriert"""
+        index = TargetIndex.build(self.source_dir)
+
+        self.assertEqual(set(index.languages), {'csharp', 'dockerfile', 'typescript'})
+        self.assertEqual(index.manifest_paths(), ['backend/Booking.Api/Booking.Api.csproj'])
+        self.assertEqual(index.lockfiles, {})
+
+    def test_languages_under_targets(self):
+        """Test: Sprachen werden pro Shard-Target bestimmt"""
+        index = TargetIndex.build(self.source_dir)
+
+        self.assertEqual(index.languages_under([self.source_dir / 'frontend']), {'typescript'})
+        self.assertEqual(index.languages_under([Path('backend')]), {'csharp', 'dockerfile'})
+        self.assertEqual(len(index.languages_under([self.source_dir])), 3)
+
+    def test_missing_requirements(self):
+        """Test: Tools ohne passende Eingaben liefern einen Grund zum Überspringen"""
+        index = TargetIndex.build(self.source_dir)
+
+        self.assertIsNone(index.missing({'manifests': ['nuget', 'npm']}))
+        self.assertIsNone(index.missing({'paths': ['frontend'], 'languages': ['javascript', 'typescript']}))
+        self.assertEqual(index.missing({'lockfiles': ['npm']}), 'no npm lockfiles')
+        self.assertEqual(index.missing({'paths': ['backend'], 'languages': ['typescript']}), 'no typescript files')
+        self.assertEqual(index.missing({'paths': ['mobile']}), 'mobile not found')
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)
@@ -0,0 +1,228 @@
+#!/usr/bin/env python3
+"""
+Test Suite für den Watch-Modus von Agent S7
+Testet Änderungserkennung, Debounce und die Auswahl der betroffenen Tools
+"""
+
+import unittest
+import os
+import time
+import tempfile
+import shutil
+from pathlib import Path
+import sys
+
+# Füge Security Scanner zum Python Path hinzu
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'scanner'))
+
+from findings import make_finding, select_top
+from watcher import ChangeDetector, ChangeSet, ScanWatcher, git_head, merge_incremental, plan_incremental
+
+LANGUAGES = ['csharp', 'dockerfile', 'javascript', 'python', 'typescript']
+
+
+class StubScanner:
+    """Scanner-Ersatz ohne externe Tools, requires wie im SecurityScanner"""
+
+    def __init__(self, source_dir: Path):
+        self.source_dir = source_dir
+        self.tools = {
+            'semgrep': {'enabled': True, 'requires': {'languages': LANGUAGES}},
+            'trivy': {'enabled': True, 'requires': {'lockfiles': ['nuget', 'npm', 'pip']}},
+            'dependency_check': {'enabled': True, 'requires': {'manifests': ['nuget', 'npm']}},
+            'gitleaks': {'enabled': True},
+            'eslint_security': {'enabled': True,
+                                'requires': {'paths': ['frontend'], 'languages': ['javascript', 'typescript']}},
+        }
+        self.scans = []
+
+    def tool_runners(self):
+        return {tool: None for tool in self.tools}
+
+    def select_report_findings(self, tool, findings):
+        return select_top(findings, 10)
+
+    def run_comprehensive_scan(self):
+        self.scans.append(('full', None))
+        return {'mode': 'full'}
+
+    def run_incremental_scan(self, plan, changes):
+        self.scans.append(('incremental', plan))
+        return {'mode': 'incremental'}
+
+
+class TestChangeDetection(unittest.TestCase):
+    """Test Suite für ChangeDetector und git_head"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.source_dir = Path(tempfile.mkdtemp())
+        (self.source_dir / 'backend').mkdir()
+        (self.source_dir / 'node_modules').mkdir()
+        (self.source_dir / 'backend' / 'Program.cs').write_text('class Program {}')
+        (self.source_dir / 'backend' / 'Old.cs').write_text('class Old {}')
+
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        shutil.rmtree(self.source_dir)
+
+    def _init_git(self, sha: str):
+        git_dir = self.source_dir / '.git'
+        (git_dir / 'refs' / 'heads').mkdir(parents=True)
+        (git_dir / 'HEAD').write_text('ref: refs/heads/main\n')
+        (git_dir / 'refs' / 'heads' / 'main').write_text(sha + '\n')
+
+    def test_git_head_resolves_loose_and_packed_refs(self):
+        """Test: HEAD wird über lose und gepackte Refs aufgelöst"""
+        self.assertIsNone(git_head(self.source_dir))
+
+        self._init_git('a' * 40)
+        self.assertEqual(git_head(self.source_dir), 'a' * 40)
+
+        (self.source_dir / '.git' / 'refs' / 'heads' / 'main').unlink()
+        (self.source_dir / '.git' / 'packed-refs').write_text(
+            '# pack-refs with: peeled\n' + 'b' * 40 + ' refs/heads/main\n')
+        self.assertEqual(git_head(self.source_dir), 'b' * 40)
+
+    def test_detects_changed_added_and_deleted_files(self):
+        """Test: Änderungen werden erkannt, ignorierte Verzeichnisse nicht"""
+        self._init_git('a' * 40)
+        detector = ChangeDetector(self.source_dir)
+
+        (self.source_dir / 'backend' / 'Program.cs').write_text('class Program { int x; }')
+        (self.source_dir / 'backend' / 'Old.cs').unlink()
+        (self.source_dir / 'backend' / 'New.cs').write_text('class New {}')
+        (self.source_dir / 'node_modules' / 'lib.js').write_text('')
+        changes = detector.poll()
+
+        self.assertEqual(changes.changed, {'backend/Program.cs', 'backend/New.cs'})
+        self.assertEqual(changes.deleted, {'backend/Old.cs'})
+        self.assertFalse(changes.head_changed)
+        self.assertFalse(detector.poll())
+
+        (self.source_dir / '.git' / 'refs' / 'heads' / 'main').write_text('c' * 40 + '\n')
+        self.assertTrue(detector.poll().head_changed)
+
+    def test_changes_are_coalesced(self):
+        """Test: Gelöschte und wieder angelegte Dateien gelten als geändert"""
+        pending = ChangeSet(deleted={'a.cs'})
+        pending.merge(ChangeSet(changed={'a.cs', 'b.cs'}))
+        pending.merge(ChangeSet(deleted={'b.cs'}, head_changed=True))
+
+        self.assertEqual(pending.changed, {'a.cs'})
+        self.assertEqual(pending.deleted, {'b.cs'})
+        self.assertTrue(pending.head_changed)
+
+
+class TestIncrementalPlanning(unittest.TestCase):
+    """Test Suite für plan_incremental und merge_incremental"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.scanner = StubScanner(Path('/app/src'))
+
+    def test_only_affected_tools_are_planned(self):
+        """Test: Dateitypen bestimmen die Tools, Semgrep/ESLint nur für geänderte Dateien"""
+        changes = ChangeSet(changed={'frontend/src/page.tsx', 'backend/Api.cs', 'README.md'})
+        self.assertEqual(plan_incremental(self.scanner, changes), {
+            'semgrep': ['backend/Api.cs', 'frontend/src/page.tsx'],
+            'eslint_security': ['frontend/src/page.tsx'],
+        })
+
+        changes = ChangeSet(changed={'frontend/package-lock.json', 'backend/Booking.Api.csproj'})
+        self.assertEqual(plan_incremental(self.scanner, changes), {'trivy': None, 'dependency_check': None})
+
+        self.assertEqual(plan_incremental(self.scanner, ChangeSet(head_changed=True)), {'gitleaks': None})
+        self.assertEqual(plan_incremental(self.scanner, ChangeSet(changed={'docs/guide.md'})), {})
+
+    def test_disabled_tools_are_not_planned(self):
+        """Test: Deaktivierte Tools laufen auch im Watch-Modus nicht"""
+        self.scanner.tools['semgrep']['enabled'] = False
+
+        self.assertEqual(plan_incremental(self.scanner, ChangeSet(changed={'backend/Api.cs'})), {})
+
+    def test_merge_replaces_findings_of_changed_files(self):
+        """Test: Findings geänderter und gelöschter Dateien werden ersetzt, andere bleiben"""
+        previous = {
+            'tool': 'semgrep', 'status': 'success', 'raw_output': '{}',
+            'findings': [make_finding('semgrep', rule_id='sqli', severity='HIGH', path='a.cs'),
+                         make_finding('semgrep', rule_id='xss', severity='HIGH', path='b.cs')],
+            'suppressed_findings': [make_finding('semgrep', rule_id='weak-hash', severity='LOW', path='c.cs')],
+        }
+        fresh = {'tool': 'semgrep', 'status': 'success',
+                 'findings': [make_finding('semgrep', rule_id='path-traversal', severity='MEDIUM', path='a.cs')]}
+
+        merged = merge_incremental('semgrep', previous, fresh, ['a.cs', 'b.cs'], self.scanner)
+
+        self.assertEqual(sorted(f['rule_id'] for f in merged['findings']), ['path-traversal', 'weak-hash'])
+        self.assertEqual(merged['total_issues'], 2)
+        self.assertNotIn('raw_output', merged)
+        self.assertNotIn('suppressed_findings', merged)
+
+    def test_failed_incremental_run_keeps_previous_result(self):
+        """Test: Ein fehlgeschlagener Lauf verwirft die bisherigen Findings nicht"""
+        previous = {'tool': 'semgrep', 'status': 'success',
+                    'findings': [make_finding('semgrep', rule_id='sqli', severity='HIGH', path='a.cs')]}
+
+        merged = merge_incremental('semgrep', previous, {'tool': 'semgrep', 'status': 'timeout'},
+                                   ['a.cs'], self.scanner)
+
+        self.assertEqual(merged['status'], 'success')
+        self.assertEqual(len(merged['findings']), 1)
+        self.assertEqual(merged['incremental_error'], 'timeout')
+
+
+class TestScanWatcher(unittest.TestCase):
+    """Test Suite für den Watch-Loop"""
+
+    def setUp(self):
+        """Setup für jeden Test"""
+        self.source_dir = Path(tempfile.mkdtemp())
+        (self.source_dir / 'Api.cs').write_text('class Api {}')
+        self.scanner = StubScanner(self.source_dir)
+
+    def tearDown(self):
+        """Cleanup nach jedem Test"""
+        shutil.rmtree(self.source_dir)
+
+    def _change_after_first_scan(self, *paths):
+        scan = self.scanner.run_comprehensive_scan
+
+        def run_and_change():
+            report = scan()
+            for path in paths:
+                (self.source_dir / path).write_text(f'// {time.time()}')
+            return report
+
+        self.scanner.run_comprehensive_scan = run_and_change
+
+    def test_changes_trigger_one_debounced_incremental_scan(self):
+        """Test: Mehrere Änderungen ergeben nach dem Debounce einen inkrementellen Scan"""
+        self._change_after_first_scan('Api.cs', 'Service.cs', 'notes.txt')
+        watcher = ScanWatcher(self.scanner, poll_interval=0.01, debounce=0.05, max_delay=5)
+
+        report = watcher.run(max_scans=2)
+
+        self.assertEqual(report, {'mode': 'incremental'})
+        self.assertEqual(self.scanner.scans, [('full', None), ('incremental', {'semgrep': ['Api.cs', 'Service.cs']})])
+
+    def test_periodic_full_rescan(self):
+        """Test: Nach full_interval läuft ein vollständiger Scan statt eines inkrementellen"""
+        self._change_after_first_scan('Api.cs')
+        watcher = ScanWatcher(self.scanner, poll_interval=0.01, debounce=5, max_delay=5, full_interval=0)
+
+        watcher.run(max_scans=2)
+
+        self.assertEqual([mode for mode, _ in self.scanner.scans], ['full', 'full'])
+
+    def test_stop_ends_watch_loop(self):
+        """Test: stop() beendet den Loop ohne weitere Scans"""
+        watcher = ScanWatcher(self.scanner, poll_interval=0.01)
+        watcher.stop()
+
+        self.assertEqual(watcher.run(), {'mode': 'full'})
+        self.assertEqual(len(self.scanner.scans), 1)
+
+
+if __name__ == '__main__':
+    unittest.main(verbosity=2)